@@ -1,14 +1,67 @@
-"""directory imports from the challenge sub-package."""
+"""directory imports from the challenge sub-package.
+
+The transform, extract and upload sub-packages depend on pandas, numpy and
+boto3, which are slow to import. They are imported lazily, on first
+attribute access, so that parsing a DAG file - which only needs the DAG
+structure - does not pay for them until a task actually runs.
+"""
+
+import importlib
+import sys
+import types
+
+# the stage instrumentation is imported first, as the operation classes of
+# the sub-packages below decorate their methods with it when defined.
+from .metrics import *
+
 from .sample import *
 
 from .storage import *
 
-from .transform import *
-
 from .network import *
 
-from .upload import *
+from .dto import *
+
+# mapping of each lazily-loaded name exposed by the package to the
+# sub-package (relative to this package) in which it is defined.
+_LAZY_ATTRIBUTES = {'TransformOperations': '.transform',
+                    'ArticleDeduplicator': '.transform',
+                    'DEDUPLICATE_ENV_VARIABLE': '.transform',
+                    'DEDUPLICATE_TITLES_ENV_VARIABLE': '.transform',
+                    'SeenArticleIndex': '.transform',
+                    'INCREMENTAL_ENV_VARIABLE': '.transform',
+                    'RETENTION_ENV_VARIABLE': '.transform',
+                    'incremental_requested': '.transform',
+                    'seen_article_index': '.transform',
+                    'seen_article_scope': '.transform',
+                    'filter_delivered_articles': '.transform',
+                    'UploadOperations': '.upload',
+                    'ExtractOperations': '.extract'}
 
-from .extract import *
 
-from .dto import *
+class _LazyPackage(types.ModuleType):
+    """Module type that imports a heavy sub-package the first time one of its
+    names is looked up on the `challenge` package.
+
+    A module subclass is used, rather than a module-level __getattr__, since
+    the latter is only available from Python 3.7 and the project runs on 3.6.
+    """
+
+    def __getattr__(self, name):
+        if name not in _LAZY_ATTRIBUTES:
+            raise AttributeError("module {} has no attribute {}"
+                                 .format(self.__name__, name))
+
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name],
+                                         self.__name__)
+        value = getattr(module, name)
+
+        # cache the resolved name so later lookups skip __getattr__ entirely
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(_LAZY_ATTRIBUTES))
+
+
+sys.modules[__name__].__class__ = _LazyPackage
@@ -1,2 +1,5 @@
-"""directory imports for the NewsInfoDTO class."""
+"""directory imports for the NewsInfoDTO, Article and ArticleBatch
+classes."""
 from .newsinfo_dto import *
+
+from .article_dto import *
@@ -0,0 +1,121 @@
+"""Tempus challenge  - Operations and Functions: Article Records
+
+Describes the code definitions of the compact news article record, and the
+batch of articles that flows from the extraction to the transformation of
+the news headlines, in the DAG pipelines.
+"""
+
+
+import typing
+
+
+class Article(typing.NamedTuple):
+    """A single news article, extracted from a News API top-headlines json.
+
+    A tuple is all an article needs, rather than a dictionary or a
+    list-per-field, which keeps the memory used per article small. The
+    order of the fields is the order of the columns of the headlines csv
+    (see ARTICLE_CSV_COLUMNS).
+    """
+
+    source_id: str
+    source_name: str
+    author: str
+    title: str
+    description: str
+    url: str
+    url_to_image: str
+    published_at: str
+    content: str
+
+    @classmethod
+    def from_json(cls, article: dict):
+        """Returns the record of an article of a News API top-headlines
+        json; fields missing from the json are left as None.
+
+        # Arguments:
+            :param article: a json object of the 'articles' list.
+            :type article: dict
+        """
+
+        source = article.get('source') or {}
+
+        return cls(source_id=source.get('id'),
+                   source_name=source.get('name'),
+                   author=article.get('author'),
+                   title=article.get('title'),
+                   description=article.get('description'),
+                   url=article.get('url'),
+                   url_to_image=article.get('urlToImage'),
+                   published_at=article.get('publishedAt'),
+                   content=article.get('content'))
+
+
+# mapping of each Article field to its column in the headlines csv
+ARTICLE_CSV_COLUMNS = {'source_id': 'news_source_id',
+                       'source_name': 'news_source_name',
+                       'author': 'news_author',
+                       'title': 'news_title',
+                       'description': 'news_description',
+                       'url': 'news_url',
+                       'url_to_image': 'news_image_url',
+                       'published_at': 'news_publication_date',
+                       'content': 'news_content'}
+
+# Article fields whose csv columns hold few distinct values (the handful of
+# news sources), stored as categoricals, and those holding timestamps.
+CATEGORICAL_FIELDS = ('source_id', 'source_name')
+DATETIME_FIELDS = ('published_at',)
+
+
+class ArticleBatch:
+    """Batch of the Article records extracted from one or more top-headlines
+    jsons.
+
+    A batch is empty (falsy) when no articles were extracted. Its records
+    are turned into a DataFrame in one go, with the csv columns named
+    through ARTICLE_CSV_COLUMNS rather than relying on any field order.
+
+    # Arguments:
+        :param articles: the Article records of the batch.
+        :type articles: list
+    """
+
+    __slots__ = ('articles',)
+
+    def __init__(self, articles=None):
+        self.articles = list(articles or [])
+
+    @classmethod
+    def from_json_articles(cls, articles, limit=None):
+        """Returns the batch of the articles of a News API top-headlines
+        json.
+
+        # Arguments:
+            :param articles: the 'articles' list of the json.
+            :type articles: list
+            :param limit: the number of articles to extract at most.
+            :type limit: int
+        """
+
+        articles = articles or []
+        if limit is not None:
+            articles = articles[:limit]
+
+        return cls(Article.from_json(article) for article in articles)
+
+    @classmethod
+    def csv_columns(cls) -> list:
+        """returns the names of the csv columns of the Article fields, in
+        field order."""
+
+        return [ARTICLE_CSV_COLUMNS[field] for field in Article._fields]
+
+    def __len__(self):
+        return len(self.articles)
+
+    def __iter__(self):
+        return iter(self.articles)
+
+    def __repr__(self):
+        return "ArticleBatch({} articles)".format(len(self.articles))
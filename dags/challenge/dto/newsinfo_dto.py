@@ -112,14 +112,19 @@ class NewsInfoDTO:
                 raise ValueError("No S3 Bucket exists for this Pipeline")
 
         def load_news_files(self, news_dir_path=None):
-            """Gets the file contents of the pipeline's news directory."""
+            """Gets the json files the upstream task published to the
+            pipeline's news directory, as listed in its manifest.
+            """
 
             files = []
             if not news_dir_path:
                 news_dir_path = self.news_directory
 
-            if news_dir_path and os.listdir(news_dir_path):
-                for data_file in os.listdir(news_dir_path):
-                    if data_file.endswith('.json'):
-                        files.append(data_file)
+            try:
+                files = c.FileStorage.manifest_filenames(news_dir_path,
+                                                         '.json')
+            except FileNotFoundError:
+                # the upstream task has not published any news files
+                pass
+
             return files
@@ -5,8 +5,7 @@ relevant news source and headline data from JSON news files, in the
 DAG pipelines.
 """
 
-import numpy as np
-
+import itertools
 import json
 import logging
 import os
@@ -14,6 +13,8 @@ import requests
 
 import pandas as pd
 
+import challenge as c
+
 # ensures that function outputs and any errors encountered
 # are logged to the Airflow console
 log = logging.getLogger(__name__)
@@ -22,6 +23,10 @@ log = logging.getLogger(__name__)
 # airflow creates a home environment variable pointing to the location
 HOME_DIRECTORY = str(os.environ['HOME'])
 
+# number of articles extracted at a time when a json file is read
+# incrementally (see extract_news_data_batches)
+ARTICLE_BATCH_SIZE = 1000
+
 """
 Many of these methods all look like they could be functions in a separate module.
 The giveaway for that is that this class isn't really stateful. There also isn't
@@ -184,6 +189,7 @@ class ExtractOperations:
         return query_keyword.lower()
 
     @classmethod
+    @c.instrumented("extract")
     def extract_jsons_source_info(cls, json_list, json_directory):
         """Parses a given list of news jsons for their source ids and names.
 
@@ -211,6 +217,7 @@ class ExtractOperations:
             json_path = os.path.join(json_directory, js)
 
             # read each news json and extract the news sources
+            c.record_file_read(json_path)
             with open(json_path, "r") as js_file:
                 try:
                     raw_data = json.load(js_file)
@@ -255,7 +262,11 @@ class ExtractOperations:
         the unformatted content of the article
         - content
 
-        Returns a dictionary containing all these extracted information.
+        Returns an ArticleBatch holding an Article record of each article,
+        which is empty if the news data has no articles.
+
+        The DataFrame holds the news json in a single row; see
+        extract_news_data for extracting from the json itself.
 
         # Arguments:
             :param frame: a Pandas DataFrame containing news data
@@ -264,56 +275,85 @@ class ExtractOperations:
 
         log.info("Running extract_news_data_from_dataframe method")
 
-        num_of_articles = frame['totalResults'][0]
+        return cls.extract_news_data({'totalResults': frame['totalResults'][0],
+                                      'articles': frame['articles'][0]})
+
+    @classmethod
+    def extract_news_data(cls, json_data):
+        """Returns the news data extracted from a top-headlines json, as
+        read from its file (see FileStorage.json_to_dataframe_reader).
+
+        The articles are turned straight into an ArticleBatch of Article
+        records - the fields extracted are those listed in
+        extract_news_data_from_dataframe - with no DataFrame built around
+        the json first. At most 'totalResults' articles are extracted.
+
+        # Arguments:
+            :param json_data: the top-headlines json.
+            :type json_data: dict
+        """
+
+        log.info("Running extract_news_data method")
 
-        # dictionary representing the extracted news data
-        extracted_data = {}
+        num_of_articles = json_data['totalResults']
 
         # error check - no articles means this json had no news data
         if num_of_articles < 1:
-            return extracted_data
+            return c.ArticleBatch()
 
-        """
-        Can this section be modularized into its own method?
-        """
-        # Using Pandas, extract required information from the given dataframe
-        # each is a return list of data.
-        source_id = [frame['articles'][0][index]['source']['id']
-                     for index in np.arange(num_of_articles)]
+        # build a compact record of each article straight from its json
+        # object, rather than a list of values per field.
+        extracted_data = c.ArticleBatch.from_json_articles(
+            json_data['articles'], limit=num_of_articles)
 
-        source_name = [frame['articles'][0][index]['source']['name']
-                       for index in np.arange(num_of_articles)]
+        c.MetricsEmitter.shared().increment(c.ARTICLES_EXTRACTED,
+                                            len(extracted_data))
 
-        author = [frame['articles'][0][index]['author']
-                  for index in np.arange(num_of_articles)]
+        return extracted_data
 
-        title = [frame['articles'][0][index]['title']
-                 for index in np.arange(num_of_articles)]
+    @classmethod
+    def extract_news_data_batches(cls, json_file, batch_size=None):
+        """Yields the news data of a top-headlines json file in batches,
+        reading and parsing the file's articles one at a time.
 
-        description = [frame['articles'][0][index]['description']
-                       for index in np.arange(num_of_articles)]
+        The counterpart of extract_news_data_from_dataframe for files too
+        large to load whole: only a batch of Article records, and the
+        article being parsed, are held in memory at once (see
+        JsonArrayReader). As there, at most 'totalResults' articles are
+        extracted, read from the head of the file.
 
-        url = [frame['articles'][0][index]['url']
-               for index in np.arange(num_of_articles)]
+        # Arguments:
+            :param json_file: path to the json file.
+            :type json_file: str
+            :param batch_size: the number of articles per batch.
+                Defaults to ARTICLE_BATCH_SIZE.
+            :type batch_size: int
 
-        url_to_image = [frame['articles'][0][index]['urlToImage']
-                        for index in np.arange(num_of_articles)]
+        # Raises:
+            ValueError: while iterating, if the file is not valid json.
+        """
 
-        published_at = [frame['articles'][0][index]['publishedAt']
-                        for index in np.arange(num_of_articles)]
+        log.info("Running extract_news_data_batches method")
 
-        content = [frame['articles'][0][index]['content']
-                   for index in np.arange(num_of_articles)]
+        if not batch_size:
+            batch_size = ARTICLE_BATCH_SIZE
 
-        # compose a dictionary with the extracted information
-        extracted_data = {'source_id': source_id,
-                          'source_name': source_name,
-                          'author': author,
-                          'title': title,
-                          'description': description,
-                          'url': url,
-                          'url_to_image': url_to_image,
-                          'published_at': published_at,
-                          'content': content}
+        with open(json_file, "rb") as inputfile:
+            head = inputfile.read(c.HEAD_SIZE)
+        fields = c.peek_json_fields(head, ['totalResults'])
+        num_of_articles = fields.get('totalResults')
 
-        return extracted_data
+        articles = iter(c.JsonArrayReader(json_file, 'articles'))
+        if isinstance(num_of_articles, int):
+            articles = itertools.islice(articles, max(num_of_articles, 0))
+
+        while True:
+            batch = c.ArticleBatch(c.Article.from_json(article)
+                                   for article in itertools.islice(
+                                       articles, batch_size))
+            if not batch:
+                return
+
+            c.MetricsEmitter.shared().increment(c.ARTICLES_EXTRACTED,
+                                                len(batch))
+            yield batch
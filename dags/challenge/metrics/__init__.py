@@ -0,0 +1,9 @@
+"""directory imports for the stage instrumentation and profiling functions,
+the metrics emitters and the environment flag helpers."""
+from .environment_flags import *
+
+from .instrumentation import *
+
+from .metrics_emitter import *
+
+from .profiling import *
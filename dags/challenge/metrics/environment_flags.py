@@ -0,0 +1,13 @@
+"""Tempus challenge  - Operations and Functions: Environment Flags
+
+Describes the code definitions used to read the environment variables that
+turn the optional behaviours of the DAG pipelines on and off. It depends on
+nothing but the standard library, so that the network and storage tasks can
+read their flags without importing the transform sub-package.
+"""
+
+
+def is_truthy(value) -> bool:
+    """returns whether an environment variable's value turns a flag on."""
+
+    return str(value).lower() in ("1", "true", "yes", "on")
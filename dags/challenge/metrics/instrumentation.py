@@ -0,0 +1,375 @@
+"""Tempus challenge  - Operations and Functions: Stage Instrumentation
+
+Describes the code definitions used to measure each operation run in the
+tasks of the DAG pipelines - its duration, the bytes it read and wrote,
+the records it processed and its memory use - so that the stage which is
+the bottleneck of a pipeline run can be found from its task logs and XCom.
+"""
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import challenge as c
+
+try:
+    import resource
+except ImportError:
+    # resource is unavailable on Windows, where no memory use is recorded.
+    resource = None
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# XCom key under which a task's stage measurements are pushed
+STAGE_METRICS_XCOM_KEY = "stage_metrics"
+
+# prefix of the structured log lines holding a stage measurement, so they
+# can be picked out of the Airflow task logs
+STAGE_METRICS_LOG_PREFIX = "STAGE_METRICS"
+
+# environment variables naming the DAG and task a process runs, as Airflow's
+# PythonOperator exports them from the task's context
+TASK_DAG_ID_VARIABLE = "AIRFLOW_CTX_DAG_ID"
+TASK_ID_VARIABLE = "AIRFLOW_CTX_TASK_ID"
+
+# measurements of the instrumented calls in progress on each thread,
+# outermost first.
+_active = threading.local()
+
+
+def _active_measurements() -> list:
+    """returns the stack of measurements in progress on this thread."""
+
+    if not hasattr(_active, "stack"):
+        _active.stack = []
+    return _active.stack
+
+
+def current_rss():
+    """returns the resident memory of this process in bytes, or None where
+    it cannot be read (off Linux, or under a fake filesystem in tests)."""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def peak_rss():
+    """returns the peak resident memory of this process so far in bytes, or
+    None where it cannot be read."""
+
+    if not resource:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports the peak in bytes, Linux in kilobytes
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+class StageMeasurement:
+    """Measurement of a single instrumented operation call.
+
+    The bytes and records counted while the call is in progress include
+    those of the instrumented calls it makes, so the outermost measurement
+    of a task holds the task's totals. It also holds a `breakdown` of the
+    operations called under it, by operation, to single out the slowest.
+
+    # Arguments:
+        :param stage: pipeline stage the operation belongs to, e.g.
+            'network', 'extract', 'transform', 'storage' or 'upload'.
+        :type stage: str
+        :param operation: name of the operation measured.
+        :type operation: str
+    """
+
+    def __init__(self, stage, operation):
+        self.stage = stage
+        self.operation = operation
+        self.started_at = None
+        self.duration = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.rows = 0
+        self.status = "running"
+        self.error = None
+        self.rss_start = None
+        self.rss_end = None
+        self.peak_rss_start = None
+        self.peak_rss_end = None
+        self.breakdown = {}
+        self._clock_start = None
+
+    def start(self):
+        """records the time and memory use at the start of the call."""
+
+        self.started_at = time.time()
+        self.rss_start = current_rss()
+        self.peak_rss_start = peak_rss()
+        self._clock_start = time.perf_counter()
+
+    def stop(self, error=None):
+        """records the time and memory use at the end of the call, and
+        whether it raised an error."""
+
+        self.duration = time.perf_counter() - self._clock_start
+        self.rss_end = current_rss()
+        self.peak_rss_end = peak_rss()
+        self.status = "failed" if error else "success"
+        if error:
+            self.error = "{}: {}".format(type(error).__name__, error)
+
+    def add_call(self, measurement):
+        """adds the measurement of a call made under this one to the
+        breakdown of operations."""
+
+        key = "{}.{}".format(measurement.stage, measurement.operation)
+        entry = self.breakdown.setdefault(key, {"calls": 0,
+                                                "failed_calls": 0,
+                                                "duration_seconds": 0.0,
+                                                "bytes_read": 0,
+                                                "bytes_written": 0,
+                                                "rows": 0})
+        entry["calls"] += 1
+        entry["failed_calls"] += measurement.status == "failed"
+        entry["duration_seconds"] += measurement.duration
+        entry["bytes_read"] += measurement.bytes_read
+        entry["bytes_written"] += measurement.bytes_written
+        entry["rows"] += measurement.rows
+
+    def as_record(self) -> dict:
+        """returns the measurement as a json-serializable dictionary.
+
+        `peak_rss_bytes` is the peak resident memory of the process at the
+        end of the call, and `peak_rss_growth_bytes` how far the call raised
+        it - the memory the call needed beyond what the process had already
+        used. Memory fields are None where memory use cannot be read.
+        """
+
+        peak_growth = None
+        if self.peak_rss_start is not None and self.peak_rss_end is not None:
+            peak_growth = self.peak_rss_end - self.peak_rss_start
+
+        record = {"stage": self.stage,
+                  "operation": self.operation,
+                  "status": self.status,
+                  "error": self.error,
+                  "started_at": self.started_at,
+                  "duration_seconds": self.duration,
+                  "bytes_read": self.bytes_read,
+                  "bytes_written": self.bytes_written,
+                  "rows": self.rows,
+                  "rss_start_bytes": self.rss_start,
+                  "rss_end_bytes": self.rss_end,
+                  "peak_rss_bytes": self.peak_rss_end,
+                  "peak_rss_growth_bytes": peak_growth}
+
+        if self.breakdown:
+            record["breakdown"] = self.breakdown
+
+        return record
+
+
+@contextlib.contextmanager
+def measure_stage(stage, operation, context=None):
+    """Context manager measuring the block of code it wraps as a call of an
+    operation of a pipeline stage, yielding its StageMeasurement.
+
+    On exit the measurement is logged as a structured record - a log line
+    prefixed with STAGE_METRICS_LOG_PREFIX followed by the record as json,
+    with the record also attached to the log record as `stage_metrics`.
+    The outermost measurement of a task is logged at INFO level and, if the
+    Airflow context holds the task instance, pushed to XCom under the
+    STAGE_METRICS_XCOM_KEY key; the calls nested in it are logged at DEBUG
+    level, and summed up in its breakdown. The outermost measurement also
+    flushes the shared metrics emitter, labelled with the task it ran in
+    (see task_labels).
+
+    # Arguments:
+        :param stage: pipeline stage the operation belongs to.
+        :type stage: str
+        :param operation: name of the operation measured.
+        :type operation: str
+        :param context: the Airflow context of the running task, if any.
+        :type context: dict
+    """
+
+    measurement = StageMeasurement(stage, operation)
+    stack = _active_measurements()
+    stack.append(measurement)
+    measurement.start()
+
+    error = None
+    try:
+        yield measurement
+    except BaseException as err:
+        error = err
+        raise
+    finally:
+        measurement.stop(error)
+        stack.remove(measurement)
+
+        record = measurement.as_record()
+        message = "{} {}".format(STAGE_METRICS_LOG_PREFIX,
+                                 json.dumps(record, sort_keys=True))
+
+        if stack:
+            stack[0].add_call(measurement)
+            log.debug(message, extra={"stage_metrics": record})
+        else:
+            log.info(message, extra={"stage_metrics": record})
+            push_stage_metrics(record, context or {})
+
+            # export the metrics the task gathered, where so configured
+            c.MetricsEmitter.shared().flush(operation,
+                                            task_labels(context or {}))
+
+
+def task_labels(context) -> dict:
+    """returns the dag_id and task_id of the task an operation runs in,
+    read from its Airflow context or, for operators that pass no context
+    (e.g. a SimpleHttpOperator's response check), from the variables
+    exported to the environment (see export_task_identity). Names that
+    cannot be found are left out.
+
+    # Arguments:
+        :param context: the Airflow context of the running task.
+        :type context: dict
+    """
+
+    dag_id = getattr(context.get("dag"), "dag_id", None)
+    task = (context.get("task") or context.get("ti")
+            or context.get("task_instance"))
+    task_id = getattr(task, "task_id", None)
+
+    labels = {}
+    if not isinstance(dag_id, str):
+        dag_id = os.environ.get(TASK_DAG_ID_VARIABLE)
+    if dag_id:
+        labels["dag_id"] = dag_id
+    if not isinstance(task_id, str):
+        task_id = os.environ.get(TASK_ID_VARIABLE)
+    if task_id:
+        labels["task_id"] = task_id
+
+    return labels
+
+
+def export_task_identity(dag_id, task_id):
+    """exports the dag_id and task_id of the running task to the
+    environment, as the PythonOperator does, for operations run by
+    operators that pass them no Airflow context.
+
+    # Arguments:
+        :param dag_id: id of the DAG the task belongs to.
+        :type dag_id: str
+        :param task_id: id of the running task.
+        :type task_id: str
+    """
+
+    os.environ[TASK_DAG_ID_VARIABLE] = dag_id
+    os.environ[TASK_ID_VARIABLE] = task_id
+
+
+def push_stage_metrics(record, context):
+    """pushes a stage measurement to XCom through the task instance in an
+    Airflow context. Does nothing outside of an Airflow task.
+
+    # Arguments:
+        :param record: the stage measurement, as a dictionary.
+        :type record: dict
+        :param context: the Airflow context of the running task.
+        :type context: dict
+    """
+
+    task_instance = context.get("ti") or context.get("task_instance")
+    if not task_instance:
+        return
+
+    try:
+        task_instance.xcom_push(key=STAGE_METRICS_XCOM_KEY, value=record)
+    except Exception as err:
+        # the metrics must never fail the task they measure
+        log.info("Stage metrics could not be pushed to XCom: {}".format(err))
+
+
+def instrumented(stage):
+    """Decorator measuring every call of an operation as a call of the given
+    pipeline stage (see measure_stage). Keyword arguments of the call are
+    used as its Airflow context.
+
+    Apply it beneath @classmethod:
+
+        @classmethod
+        @c.instrumented("storage")
+        def create_storage(cls, **context):
+
+    # Arguments:
+        :param stage: pipeline stage the decorated operation belongs to.
+        :type stage: str
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure_stage(stage, func.__name__, kwargs):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def record_bytes_read(count):
+    """counts bytes read by the operation calls in progress on this thread."""
+
+    for measurement in _active_measurements():
+        measurement.bytes_read += count
+
+
+def record_bytes_written(count):
+    """counts bytes written by the operation calls in progress on this
+    thread."""
+
+    for measurement in _active_measurements():
+        measurement.bytes_written += count
+
+
+def record_rows(count):
+    """counts records (articles, sources or csv rows) processed by the
+    operation calls in progress on this thread."""
+
+    for measurement in _active_measurements():
+        measurement.rows += count
+
+
+def record_file_read(path):
+    """counts the size of a file about to be read, or already read, by the
+    operation calls in progress on this thread. Paths that are not files
+    (e.g. json strings passed to a reader in tests) are ignored."""
+
+    if isinstance(path, str) and os.path.isfile(path):
+        record_bytes_read(os.path.getsize(path))
+
+
+def record_response(response):
+    """counts the body of an http response received by the operation calls
+    in progress on this thread. A body not read yet - that of a response
+    requested with stream=True - is left unread, and counted as it is
+    streamed to a file instead (see FileStorage.write_response_to_file)."""
+
+    content = getattr(response, "_content", None)
+    if isinstance(content, bytes):
+        record_bytes_read(len(content))
@@ -0,0 +1,353 @@
+"""Tempus challenge  - Operations and Functions: Metrics Export
+
+Describes the code definitions of the optional metrics emitters, which
+export the throughput and latency of the DAG pipelines' tasks - requests
+made to the News API, articles extracted, csv rows written and bytes
+uploaded - as StatsD datagrams or as a Prometheus textfile-collector file.
+"""
+
+import logging
+import os
+import re
+import socket
+import threading
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# prefix of the names of all the exported metrics
+DEFAULT_METRICS_PREFIX = os.environ.get('METRICS_PREFIX', 'tempus_challenge')
+
+# default port of a StatsD daemon
+DEFAULT_STATSD_PORT = 8125
+
+# upper bounds, in seconds, of the buckets of the latency histograms
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# names of the metrics fed by the operations
+NEWS_API_REQUESTS = "news_api_requests"
+NEWS_API_REQUEST_DURATION = "news_api_request_duration"
+ARTICLES_EXTRACTED = "articles_extracted"
+CSV_ROWS_WRITTEN = "csv_rows_written"
+BYTES_UPLOADED = "bytes_uploaded"
+FILES_UPLOADED = "files_uploaded"
+DUPLICATE_ARTICLES_DROPPED = "duplicate_articles_dropped"
+ARTICLES_ALREADY_DELIVERED = "articles_already_delivered"
+SOURCES_PAST_DEADLINE = "sources_past_deadline"
+HEDGED_REQUESTS = "hedged_requests"
+HEDGED_REQUESTS_WON = "hedged_requests_won"
+
+
+class MetricsEmitter:
+    """Emitter of the pipeline metrics, which discards them.
+
+    This is the emitter in use when no metrics export is configured; the
+    StatsdEmitter and PrometheusTextfileEmitter subclasses export them.
+    Emitters never raise, so a metrics backend that is down cannot fail a
+    task.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Returns the emitter shared by all the operations run in this
+        process, configured from the environment on first use.
+
+        METRICS_STATSD_HOST (and METRICS_STATSD_PORT) enables the StatsD
+        export, METRICS_TEXTFILE_DIRECTORY the Prometheus textfile export.
+        Both can be enabled at once; with neither, metrics are discarded.
+        """
+
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls.from_environment()
+            return cls._shared
+
+    @classmethod
+    def from_environment(cls):
+        """Returns a new emitter configured from the environment variables
+        (see `shared`)."""
+
+        emitters = []
+
+        statsd_host = os.environ.get('METRICS_STATSD_HOST')
+        if statsd_host:
+            port = int(os.environ.get('METRICS_STATSD_PORT',
+                                      DEFAULT_STATSD_PORT))
+            emitters.append(StatsdEmitter(statsd_host, port))
+
+        textfile_dir = os.environ.get('METRICS_TEXTFILE_DIRECTORY')
+        if textfile_dir:
+            emitters.append(PrometheusTextfileEmitter(textfile_dir))
+
+        if not emitters:
+            return MetricsEmitter()
+        if len(emitters) == 1:
+            return emitters[0]
+        return MultiEmitter(emitters)
+
+    def increment(self, name, value=1, labels=None):
+        """Adds to a counter.
+
+        # Arguments:
+            :param name: name of the counter.
+            :type name: str
+            :param value: amount to add to the counter.
+            :type value: int
+            :param labels: label names and values the count is broken down
+                by, e.g. {'status': 200}.
+            :type labels: dict
+        """
+
+    def observe(self, name, seconds, labels=None):
+        """Records a duration in a latency histogram.
+
+        # Arguments:
+            :param name: name of the histogram.
+            :type name: str
+            :param seconds: the duration observed.
+            :type seconds: float
+            :param labels: label names and values the histogram is broken
+                down by.
+            :type labels: dict
+        """
+
+    def record_request(self, status, seconds):
+        """Counts a request made to the News API, by response status (or
+        'error' for requests that got no response), and records its
+        duration in the request latency histogram.
+
+        # Arguments:
+            :param status: the response's status code, or 'error'.
+            :type status: int
+            :param seconds: the duration of the request.
+            :type seconds: float
+        """
+
+        self.increment(NEWS_API_REQUESTS, labels={'status': status})
+        self.observe(NEWS_API_REQUEST_DURATION, seconds)
+
+    def flush(self, job=None, labels=None):
+        """Exports the metrics gathered so far, for emitters that do not
+        export them as they are recorded. Called when a task's outermost
+        instrumented operation finishes.
+
+        # Arguments:
+            :param job: name of the operation that finished.
+            :type job: str
+            :param labels: the dag_id and task_id of the task the operation
+                ran in, as far as they are known.
+            :type labels: dict
+        """
+
+
+class StatsdEmitter(MetricsEmitter):
+    """Emitter sending each metric as a StatsD datagram over UDP, as it is
+    recorded.
+
+    Labels are folded into the metric name, as plain StatsD has none: a
+    News API request answered with a 200 is counted as
+    `<prefix>.news_api_requests.status_200`. Durations are sent as timers,
+    in milliseconds, from which the StatsD daemon derives the latency
+    percentiles and histograms.
+
+    # Arguments:
+        :param host: host name of the StatsD daemon.
+        :type host: str
+        :param port: UDP port of the StatsD daemon.
+        :type port: int
+        :param prefix: prefix of the metric names.
+        :type prefix: str
+    """
+
+    def __init__(self, host, port=None, prefix=None):
+        self.address = (host, port or DEFAULT_STATSD_PORT)
+        self.prefix = prefix or DEFAULT_METRICS_PREFIX
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def metric_name(self, name, labels=None) -> str:
+        """returns the StatsD name of a metric, with its labels folded in."""
+
+        parts = [self.prefix, name]
+        for key, value in sorted((labels or {}).items()):
+            parts.append(re.sub(r'[^\w]', '_', "{}_{}".format(key, value)))
+
+        return ".".join(parts)
+
+    def send(self, datagram):
+        """sends a datagram to the StatsD daemon, dropping it on errors."""
+
+        try:
+            self.socket.sendto(datagram.encode('utf-8'), self.address)
+        except OSError as err:
+            log.info("StatsD metric could not be sent: {}".format(err))
+
+    def increment(self, name, value=1, labels=None):
+        self.send("{}:{}|c".format(self.metric_name(name, labels), value))
+
+    def observe(self, name, seconds, labels=None):
+        self.send("{}:{:.3f}|ms".format(self.metric_name(name, labels),
+                                        seconds * 1000))
+
+
+class PrometheusTextfileEmitter(MetricsEmitter):
+    """Emitter keeping the metrics in memory, and writing them out in the
+    Prometheus text format, to be read by the node exporter's textfile
+    collector.
+
+    Counters are exported as `<prefix>_<name>_total` and durations as
+    `<prefix>_<name>_seconds` histograms. Each finished task writes the
+    metrics of its process to a `<prefix>_<dag_id>_<task_id>.prom` file in
+    the directory - or `<prefix>_<job>.prom` outside of an Airflow task -
+    moved into place atomically so the collector never reads a partial
+    file. Every series is labelled with the task's dag_id and task_id, so
+    the tasks of different pipelines neither overwrite each other's file
+    nor export clashing series.
+
+    # Arguments:
+        :param directory: directory watched by the textfile collector.
+        :type directory: str
+        :param prefix: prefix of the metric names.
+        :type prefix: str
+        :param buckets: upper bounds, in seconds, of the histogram buckets.
+        :type buckets: tuple
+    """
+
+    def __init__(self, directory, prefix=None, buckets=None):
+        self.directory = directory
+        self.prefix = prefix or DEFAULT_METRICS_PREFIX
+        self.buckets = tuple(sorted(buckets or DEFAULT_LATENCY_BUCKETS))
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    @classmethod
+    def label_key(cls, labels) -> tuple:
+        """returns a hashable, ordered form of a metric's labels."""
+
+        return tuple(sorted((str(key), str(value))
+                            for key, value in (labels or {}).items()))
+
+    @classmethod
+    def format_labels(cls, label_key, extra=None) -> str:
+        """returns labels in the Prometheus text format, e.g.
+        '{status="200"}', or '' if there are none."""
+
+        pairs = list(label_key) + list(extra or [])
+        if not pairs:
+            return ""
+
+        return "{" + ",".join('{}="{}"'.format(key, value.replace('"', '\\"'))
+                              for key, value in pairs) + "}"
+
+    def increment(self, name, value=1, labels=None):
+        key = (name, self.label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, labels=None):
+        key = (name, self.label_key(labels))
+        with self.lock:
+            histogram = self.histograms.setdefault(
+                key, {'buckets': [0] * len(self.buckets),
+                      'sum': 0.0,
+                      'count': 0})
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    def render(self, labels=None) -> str:
+        """returns the metrics in the Prometheus text format, with the given
+        labels added to every series."""
+
+        lines = []
+        task_key = self.label_key(labels)
+
+        # snapshot the metrics, as other threads may still be recording
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = []
+            for key in sorted(self.histograms):
+                histogram = self.histograms[key]
+                histograms.append((key, {'buckets': list(histogram['buckets']),
+                                         'sum': histogram['sum'],
+                                         'count': histogram['count']}))
+
+        typed = set()
+        for (name, label_key), value in counters:
+            label_key = task_key + label_key
+            metric = "{}_{}_total".format(self.prefix, name)
+            if metric not in typed:
+                lines.append("# TYPE {} counter".format(metric))
+                typed.add(metric)
+            lines.append("{}{} {}".format(metric,
+                                          self.format_labels(label_key),
+                                          value))
+
+        for (name, label_key), histogram in histograms:
+            label_key = task_key + label_key
+            metric = "{}_{}_seconds".format(self.prefix, name)
+            if metric not in typed:
+                lines.append("# TYPE {} histogram".format(metric))
+                typed.add(metric)
+            bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+            counts = histogram['buckets'] + [histogram['count']]
+            for bound, count in zip(bounds, counts):
+                lines.append("{}_bucket{} {}".format(
+                    metric,
+                    self.format_labels(label_key, [('le', bound)]),
+                    count))
+            labels = self.format_labels(label_key)
+            lines.append("{}_sum{} {}".format(metric, labels,
+                                              histogram['sum']))
+            lines.append("{}_count{} {}".format(metric, labels,
+                                                histogram['count']))
+
+        return "\n".join(lines) + "\n"
+
+    def flush(self, job=None, labels=None):
+        labels = labels or {}
+        if labels.get('dag_id') and labels.get('task_id'):
+            name = "{}_{}".format(labels['dag_id'], labels['task_id'])
+        else:
+            name = job or "pipeline"
+        filename = "{}_{}.prom".format(self.prefix, name)
+        path = os.path.join(self.directory, filename)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", 'w') as outputfile:
+                outputfile.write(self.render(labels))
+            os.replace(path + ".tmp", path)
+        except OSError as err:
+            log.info("Prometheus metrics could not be written: {}"
+                     .format(err))
+
+
+class MultiEmitter(MetricsEmitter):
+    """Emitter passing every metric on to several emitters.
+
+    # Arguments:
+        :param emitters: the emitters to pass the metrics on to.
+        :type emitters: list
+    """
+
+    def __init__(self, emitters):
+        self.emitters = list(emitters)
+
+    def increment(self, name, value=1, labels=None):
+        for emitter in self.emitters:
+            emitter.increment(name, value, labels)
+
+    def observe(self, name, seconds, labels=None):
+        for emitter in self.emitters:
+            emitter.observe(name, seconds, labels)
+
+    def flush(self, job=None, labels=None):
+        for emitter in self.emitters:
+            emitter.flush(job, labels)
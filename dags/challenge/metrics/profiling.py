@@ -0,0 +1,131 @@
+"""Tempus challenge  - Operations and Functions: Task Profiling
+
+Describes the code definitions of the opt-in profiling mode of the DAG
+pipelines' tasks, which runs a task under cProfile and stores its profile
+next to the run's outputs, to find the hot spots of a slow production run.
+"""
+
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# environment variable turning profiling on for every run of the transform
+# task, e.g. TRANSFORM_PROFILE=1
+PROFILE_ENV_VARIABLE = "TRANSFORM_PROFILE"
+
+# DAG param, or key of the configuration of a triggered DAG run, turning
+# profiling on for a single run, e.g.
+# `airflow trigger_dag -c '{"profile_transform": true}' tempus_challenge_dag`
+PROFILE_PARAM = "profile_transform"
+
+# number of functions listed in the text summary of a profile
+PROFILE_SUMMARY_LINES = 40
+
+
+def profiling_requested(context) -> bool:
+    """returns whether profiling is turned on for the running task, by the
+    PROFILE_ENV_VARIABLE environment variable, the PROFILE_PARAM DAG param
+    or the configuration of the triggered DAG run.
+
+    # Arguments:
+        :param context: the Airflow context of the running task.
+        :type context: dict
+    """
+
+    flag = os.environ.get(PROFILE_ENV_VARIABLE, "").lower()
+    if flag in ("1", "true", "yes", "on"):
+        return True
+
+    params = context.get("params")
+    if isinstance(params, dict) and params.get(PROFILE_PARAM):
+        return True
+
+    dag_run_conf = getattr(context.get("dag_run"), "conf", None)
+    if isinstance(dag_run_conf, dict) and dag_run_conf.get(PROFILE_PARAM):
+        return True
+
+    return False
+
+
+@contextlib.contextmanager
+def profile_to_directory(directory, name, enabled=True):
+    """Context manager running the block of code it wraps under cProfile,
+    and saving the profile in a directory when the block exits (see
+    save_profile). Yields the profiler, or None when not profiling.
+
+    The profiler is skipped, rather than failing the task, if another
+    profiler is already running in the process.
+
+    # Arguments:
+        :param directory: directory to save the profile in.
+        :type directory: str
+        :param name: name of the profile files, without their extension.
+        :type name: str
+        :param enabled: whether to profile at all.
+        :type enabled: bool
+    """
+
+    if not enabled:
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as err:
+        log.info("Profiling skipped: {}".format(err))
+        yield None
+        return
+
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        save_profile(profiler, directory, name)
+
+
+def save_profile(profiler, directory, name):
+    """Saves a profile as a `<name>.prof` file, loadable with pstats or
+    profile viewers such as snakeviz, and a `<name>.txt` summary of the
+    functions taking the most cumulative time, which is also logged.
+
+    Returns the path to the `.prof` file, or None if it could not be saved;
+    a profile that cannot be saved never fails the task it profiled.
+
+    # Arguments:
+        :param profiler: the profiler whose profile to save.
+        :type profiler: cProfile.Profile
+        :param directory: directory to save the profile in.
+        :type directory: str
+        :param name: name of the profile files, without their extension.
+        :type name: str
+    """
+
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+
+    profile_path = os.path.join(directory, name + ".prof")
+    summary_path = os.path.join(directory, name + ".txt")
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        stats.dump_stats(profile_path)
+        with open(summary_path, "w") as outputfile:
+            outputfile.write(summary.getvalue())
+    except OSError as err:
+        log.info("Profile could not be saved in {}: {}"
+                 .format(directory, err))
+        return None
+
+    log.info("Profile saved in {}".format(profile_path))
+    log.info(summary.getvalue())
+
+    return profile_path
@@ -1,2 +1,16 @@
-"""directory imports for the NetworkOperations class."""
+"""directory imports for the NetworkOperations, ResponseCache, RateLimiter,
+AsyncFetchEngine, FetchDeadline, RequestHedger and SourceStatistics
+classes."""
 from .network_operations import *
+
+from .response_cache import *
+
+from .rate_limiter import *
+
+from .async_fetch import *
+
+from .fetch_deadline import *
+
+from .hedged_requests import *
+
+from .source_statistics import *
@@ -0,0 +1,331 @@
+"""Tempus challenge  - Operations and Functions: Concurrent News API Fetching
+
+Describes the code definitions of the asyncio fetch engine, which makes many
+remote calls to the News API concurrently on a single thread, in the DAG
+pipelines.
+"""
+
+
+import asyncio
+import concurrent.futures
+import datetime
+import logging
+import os
+import time
+
+import requests
+
+import challenge as c
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# default number of requests the engine keeps in flight at once. The
+# shared rate limiter's adaptive concurrency limit can lower it further.
+DEFAULT_MAX_CONNECTIONS = 20
+
+# default number of seconds allowed to open a connection, and to wait for
+# each read from it, before the request is failed with a timeout. They
+# apply to every News API call, synchronous ones included (see RateLimiter),
+# and can be overridden through environment variables.
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get('NEWS_API_CONNECT_TIMEOUT',
+                                               10))
+DEFAULT_READ_TIMEOUT = float(os.environ.get('NEWS_API_READ_TIMEOUT', 30))
+
+
+class AsyncFetchEngine:
+    """Fetches many News API urls concurrently with asyncio.
+
+    The requests are scheduled on an asyncio event loop, and sent by a
+    requests.Session from a pool of worker threads, one per connection
+    allowed. Connections are kept alive and pooled per host, so
+    consecutive requests reuse them rather than paying for a new TCP and
+    TLS handshake each time. Each request has connect and read timeouts,
+    and a batch of requests can be given an overall deadline, after which
+    the requests still in flight are cancelled - their responses, once the
+    worker threads receive them, are discarded.
+
+    Every request takes a token from the shared RateLimiter's bucket, so
+    the engine and any synchronous News API calls share one quota, and the
+    number of requests in flight follows the limiter's adaptive concurrency
+    limit. A '429 Too Many Requests' response is waited out and retried the
+    same way RateLimiter.call() does.
+
+    Sending the requests with requests rather than an asyncio http client
+    - aiohttp is not a dependency of the project - keeps them behaving like
+    the synchronous News API calls: proxies are taken from the
+    HTTP(S)_PROXY and NO_PROXY environment variables, redirects are
+    followed, and the requests.Response objects returned are processed by
+    the same code. Only the plain GET requests the News API needs are
+    supported.
+
+    # Arguments:
+        :param max_connections: the largest number of requests in flight at
+            once. Defaults to DEFAULT_MAX_CONNECTIONS.
+        :type max_connections: int
+        :param connect_timeout: number of seconds allowed to open a
+            connection. Defaults to DEFAULT_CONNECT_TIMEOUT.
+        :type connect_timeout: float
+        :param read_timeout: number of seconds allowed for each read from a
+            connection. Defaults to DEFAULT_READ_TIMEOUT.
+        :type read_timeout: float
+        :param rate_limiter: the rate limiter requests are made under.
+            Defaults to the one shared by all News API calls.
+        :type rate_limiter: object
+    """
+
+    def __init__(self,
+                 max_connections=None,
+                 connect_timeout=None,
+                 read_timeout=None,
+                 rate_limiter=None):
+        if not max_connections:
+            max_connections = DEFAULT_MAX_CONNECTIONS
+        if not connect_timeout:
+            connect_timeout = DEFAULT_CONNECT_TIMEOUT
+        if not read_timeout:
+            read_timeout = DEFAULT_READ_TIMEOUT
+        if not rate_limiter:
+            rate_limiter = c.RateLimiter.shared()
+
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.rate_limiter = rate_limiter
+
+        # the session requests are sent with, and its worker threads;
+        # opened by each batch of requests, and closed after it.
+        self.session = None
+        self.executor = None
+        self.in_flight = 0
+        self.slot_waiters = []
+
+    def fetch_many_sync(self, request_list, deadline=None) -> list:
+        """Fetches a list of requests concurrently, blocking until done.
+
+        This is the synchronous entry point, usable from an Airflow
+        PythonOperator callable. It runs the requests on a private event
+        loop, and closes the pooled connections, the worker threads and the
+        loop afterwards.
+
+        Returns the result of each request in order: either its
+        requests.Response, or the exception the request failed with.
+
+        # Arguments:
+            :param request_list: list of (url, params) tuples to fetch.
+            :type request_list: list
+            :param deadline: number of seconds after which the requests
+                still in flight are cancelled and fail with a
+                requests.exceptions.Timeout. Defaults to the time left
+                before the run-level deadline in force, if any (see
+                fetch_deadline); no deadline otherwise.
+            :type deadline: float
+        """
+
+        log.info("Running fetch_many_sync method")
+
+        run_deadline = c.active_deadline()
+        if run_deadline is not None:
+            remaining = run_deadline.remaining()
+            deadline = remaining if deadline is None else min(deadline,
+                                                              remaining)
+
+        loop = asyncio.new_event_loop()
+
+        # the asyncio primitives of Python 3.6 bind to the current event
+        # loop, so the private loop is made current while it runs.
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(self.fetch_many(request_list,
+                                                           deadline))
+        finally:
+            self.close()
+            loop.close()
+            asyncio.set_event_loop(None)
+
+    async def fetch_many(self, request_list, deadline=None) -> list:
+        """Fetches a list of requests concurrently.
+
+        Returns the result of each request in order: either its
+        requests.Response, or the exception the request failed with.
+
+        # Arguments:
+            :param request_list: list of (url, params) tuples to fetch.
+            :type request_list: list
+            :param deadline: number of seconds after which the requests
+                still in flight are cancelled. No deadline if not set.
+            :type deadline: float
+        """
+
+        if not request_list:
+            return []
+
+        self.open()
+        tasks = [asyncio.ensure_future(self.fetch(url, params))
+                 for url, params in request_list]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        # cancel whatever is still running once the deadline has passed,
+        # and wait for the cancellations to close their connections.
+        for task in pending:
+            task.cancel()
+        if pending:
+            log.info("Cancelled {} requests after a {}s deadline"
+                     .format(len(pending), deadline))
+            await asyncio.wait(pending)
+
+        results = []
+        for task in tasks:
+            if task.cancelled():
+                results.append(requests.exceptions.Timeout(
+                    "Deadline of {}s exceeded".format(deadline)))
+            elif task.exception() is not None:
+                results.append(task.exception())
+            else:
+                results.append(task.result())
+
+        return results
+
+    async def fetch(self, url, params=None):
+        """Makes a GET request under the rate limit and returns its
+        response as a requests.Response object.
+
+        # Arguments:
+            :param url: the url of the request.
+            :type url: str
+            :param params: the query parameters of the request.
+            :type params: dict
+
+        # Raises:
+            requests.exceptions.ConnectTimeout: if no connection could be
+                opened in time.
+            requests.exceptions.ReadTimeout: if the server did not respond
+                in time.
+            requests.exceptions.ConnectionError: if the connection failed.
+        """
+
+        self.open()
+        prepared = self.session.prepare_request(
+            requests.Request('GET', url, params=params))
+        attempt = 0
+        emitter = c.MetricsEmitter.shared()
+
+        while True:
+            await self.acquire_slot()
+            try:
+                await self.acquire_token()
+                started = time.perf_counter()
+                try:
+                    response = await self.send(prepared)
+                except Exception:
+                    emitter.record_request('error',
+                                           time.perf_counter() - started)
+                    raise
+                response.elapsed = datetime.timedelta(
+                    seconds=time.perf_counter() - started)
+                emitter.record_request(response.status_code,
+                                       response.elapsed.total_seconds())
+            finally:
+                self.release_slot()
+
+            concurrency = self.rate_limiter.concurrency
+            if response.status_code != requests.codes.too_many_requests:
+                concurrency.record_success()
+                return response
+
+            concurrency.record_throttled()
+            if attempt >= self.rate_limiter.max_retries:
+                return response
+
+            # stop every caller sharing the limiter, not only this one
+            delay = self.rate_limiter.retry_after_seconds(response)
+            self.rate_limiter.bucket.pause(delay)
+            attempt += 1
+
+    async def acquire_slot(self):
+        """Waits until a request can be put in flight."""
+
+        while self.in_flight >= self.connection_limit():
+            waiter = asyncio.get_event_loop().create_future()
+            self.slot_waiters.append(waiter)
+            await waiter
+        self.in_flight += 1
+
+    def release_slot(self):
+        """Marks a request in flight as finished, waking the waiting ones."""
+
+        self.in_flight -= 1
+        for waiter in self.slot_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self.slot_waiters = []
+
+    def connection_limit(self) -> int:
+        """Returns the number of requests allowed in flight right now."""
+        return min(self.max_connections,
+                   self.rate_limiter.concurrency.limit)
+
+    async def acquire_token(self):
+        """Waits for a token from the rate limiter's bucket, yielding to
+        the other requests instead of blocking the event loop."""
+
+        while True:
+            delay = self.rate_limiter.bucket.try_acquire()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    async def send(self, prepared):
+        """Sends a prepared request on one of the engine's worker threads,
+        and waits for its response without blocking the event loop."""
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor,
+                                          self.send_sync,
+                                          prepared)
+
+    def send_sync(self, prepared):
+        """Sends a prepared request with the engine's requests.Session.
+
+        The request goes through the session like any other News API call:
+        proxies are taken from the environment, redirects are followed, and
+        the connection is taken from, and returned to, the session's pool.
+        """
+
+        settings = self.session.merge_environment_settings(
+            prepared.url, {}, None, None, None)
+
+        return self.session.send(prepared,
+                                 timeout=(self.connect_timeout,
+                                          self.read_timeout),
+                                 **settings)
+
+    def open(self):
+        """Opens the session and worker threads requests are sent with,
+        unless they are open already."""
+
+        if self.session is not None:
+            return
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.max_connections,
+            pool_maxsize=self.max_connections)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_connections)
+
+    def close(self):
+        """Closes the session's pooled connections and lets the worker
+        threads go, without waiting for requests cancelled past a deadline
+        to finish."""
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        if self.session is not None:
+            self.session.close()
+        self.session = None
+        self.executor = None
+        self.slot_waiters = []
@@ -0,0 +1,144 @@
+"""Tempus challenge  - Operations and Functions: News API Fetch Deadline
+
+Describes the code definitions of the run-level deadline - the time budget
+of all the News API calls of a task - which bounds how long a run of the
+DAG pipelines waits on slow or hung requests.
+"""
+
+
+import contextlib
+import logging
+import os
+import threading
+import time
+
+import requests
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# environment variable setting the number of seconds the News API calls of
+# a task may take altogether, e.g. NEWS_API_RUN_DEADLINE=600
+DEADLINE_ENV_VARIABLE = "NEWS_API_RUN_DEADLINE"
+
+# the deadline in force for the task running on each thread
+_active = threading.local()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised for a News API call that is not made, or is cut short,
+    because the run's deadline has passed."""
+
+
+class FetchDeadline:
+    """Time budget of all the News API calls made by a task.
+
+    While a deadline is in force (see fetch_deadline), every call made
+    under the rate limiter has its connect and read timeouts cut down to
+    the time left, a call started after the deadline fails straight away
+    with DeadlineExceeded, and the asyncio fetch engine cancels the
+    requests still in flight when it passes. The calls made before the
+    deadline keep their results, so a task can write out what it fetched
+    and report the rest as missing.
+
+    # Arguments:
+        :param seconds: number of seconds the calls may take altogether.
+        :type seconds: float
+        :param clock: function returning the current time in seconds.
+            Defaults to time.monotonic().
+        :type clock: function
+
+    # Raises:
+        ValueError: if the number of seconds is not positive.
+    """
+
+    def __init__(self, seconds, clock=None):
+        if seconds <= 0:
+            raise ValueError("Deadline must be positive, got {}"
+                             .format(seconds))
+
+        self.seconds = float(seconds)
+        self.clock = clock or time.monotonic
+        self.expires_at = self.clock() + self.seconds
+
+    @classmethod
+    def from_environment(cls):
+        """Returns a deadline of the number of seconds set by the
+        DEADLINE_ENV_VARIABLE environment variable, or None if it is not
+        set."""
+
+        seconds = os.environ.get(DEADLINE_ENV_VARIABLE, "").strip()
+        if not seconds:
+            return None
+
+        return cls(float(seconds))
+
+    def remaining(self) -> float:
+        """Returns the number of seconds left before the deadline, 0 once
+        it has passed."""
+
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        """returns whether the deadline has passed."""
+        return self.remaining() <= 0
+
+    def timeout(self, timeout):
+        """Returns a requests timeout - a number of seconds or a (connect,
+        read) tuple - cut down to the time left before the deadline.
+
+        # Arguments:
+            :param timeout: the timeout of the call, if any.
+            :type timeout: float or tuple
+
+        # Raises:
+            DeadlineExceeded: if the deadline has passed.
+        """
+
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Run deadline of {}s exceeded"
+                                   .format(self.seconds))
+
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining)
+                         for part in timeout)
+
+        return min(timeout, remaining)
+
+
+def active_deadline():
+    """returns the deadline in force on this thread, or None."""
+    return getattr(_active, "deadline", None)
+
+
+@contextlib.contextmanager
+def fetch_deadline(deadline=None):
+    """Context manager putting a run-level deadline in force for the News
+    API calls made on this thread, within the block it wraps. Yields the
+    deadline, or None if there is none.
+
+    # Arguments:
+        :param deadline: the deadline to put in force. Defaults to one set
+            from the environment (see FetchDeadline.from_environment).
+        :type deadline: FetchDeadline
+    """
+
+    if deadline is None:
+        deadline = FetchDeadline.from_environment()
+    if deadline is None:
+        yield None
+        return
+
+    previous = active_deadline()
+    _active.deadline = deadline
+    log.info("News API calls have a deadline of {}s".format(
+             deadline.seconds))
+
+    try:
+        yield deadline
+    finally:
+        _active.deadline = previous
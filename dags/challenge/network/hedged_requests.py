@@ -0,0 +1,289 @@
+"""Tempus challenge  - Operations and Functions: Hedged News API Requests
+
+Describes the code definitions of request hedging - sending a duplicate of
+a News API call that is taking unusually long, and using whichever copy
+answers first - which cuts the tail latency of the DAG pipelines' fetches.
+"""
+
+
+import concurrent.futures
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+import challenge as c
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is unavailable on Windows, where history updates are unlocked.
+    fcntl = None
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# environment variable turning request hedging on, e.g. NEWS_API_HEDGING=1
+HEDGING_ENV_VARIABLE = "NEWS_API_HEDGING"
+
+# environment variable setting the latency percentile of recent calls after
+# which a call is hedged, e.g. NEWS_API_HEDGE_PERCENTILE=90
+HEDGE_PERCENTILE_ENV_VARIABLE = "NEWS_API_HEDGE_PERCENTILE"
+
+# by default, the 5% slowest calls are hedged - costing about 5% more
+# requests against the News API quota.
+DEFAULT_HEDGE_PERCENTILE = 95.0
+
+# number of most recent call latencies kept between runs, and the number
+# needed before the percentile is trusted enough to hedge on.
+LATENCY_HISTORY_SIZE = 500
+MIN_LATENCY_SAMPLES = 20
+
+# the hedger in force for the task running on each thread
+_active = threading.local()
+
+
+class LatencyHistory:
+    """Latencies of the most recent News API calls, persisted between runs
+    of the DAG pipelines in the 'latency' cache directory.
+
+    # Arguments:
+        :param path: path to the json file of the history.
+        :type path: str
+        :param size: number of most recent latencies kept.
+            Defaults to LATENCY_HISTORY_SIZE.
+        :type size: int
+    """
+
+    def __init__(self, path, size=None):
+        if not size:
+            size = LATENCY_HISTORY_SIZE
+
+        self.path = path
+        self.size = size
+
+    @classmethod
+    def shared(cls):
+        """Returns the history of every News API call of the pipelines."""
+
+        cache_dir = c.FileStorage.get_cache_directory('latency')
+
+        return cls(os.path.join(cache_dir, "news_api_calls.json"))
+
+    def read(self) -> list:
+        """Returns the recorded latencies, in seconds, oldest first; empty
+        if none were recorded yet."""
+
+        if not os.path.isfile(self.path):
+            return []
+
+        with open(self.path, "r") as inputfile:
+            return json.load(inputfile)["latencies"]
+
+    def percentile(self, percentile):
+        """Returns a percentile of the recorded latencies, or None if too
+        few were recorded (see MIN_LATENCY_SAMPLES).
+
+        # Arguments:
+            :param percentile: the percentile, between 0 and 100.
+            :type percentile: float
+        """
+
+        latencies = sorted(self.read())
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return None
+
+        # nearest-rank percentile
+        rank = int(round(percentile / 100.0 * (len(latencies) - 1)))
+        return latencies[min(len(latencies) - 1, max(0, rank))]
+
+    def record(self, latencies):
+        """Appends the latencies of a run's calls, keeping the most recent.
+
+        # Arguments:
+            :param latencies: latencies of the calls, in seconds.
+            :type latencies: list
+        """
+
+        if not latencies:
+            return
+
+        with open(self.path + ".lock", 'a') as lockfile:
+            if fcntl:
+                fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+            recorded = (self.read() + list(latencies))[-self.size:]
+
+            with open(self.path + ".tmp", 'w+') as outputfile:
+                json.dump({"latencies": recorded}, outputfile)
+            os.replace(self.path + ".tmp", self.path)
+
+
+class RequestHedger:
+    """Sends a duplicate of a News API call that has not answered within a
+    delay, and returns whichever copy answers first.
+
+    A call is only hedged when the rate limiter's bucket has a token to
+    spare for the duplicate, so hedging never waits on the quota or adds to
+    throttling. The copy that loses the race is left to finish on its own,
+    bounded by its timeouts, and its response is discarded. A copy failing
+    does not fail the call while the other is still running.
+
+    The latency of every call is recorded, so the delay of the next run
+    can be learned from this one's (see LatencyHistory). For a call the
+    duplicate answered, that is the time the first copy had taken so far.
+
+    # Arguments:
+        :param delay: number of seconds after which a call is hedged. Calls
+            are not hedged if not set.
+        :type delay: float
+        :param max_workers: the largest number of copies in flight at once.
+        :type max_workers: int
+    """
+
+    def __init__(self, delay=None, max_workers=None):
+        if not max_workers:
+            max_workers = 2 * c.DEFAULT_MAX_CONCURRENCY
+
+        self.delay = delay
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.hedged = 0
+        self.hedges_won = 0
+
+    @classmethod
+    def requested(cls) -> bool:
+        """returns whether request hedging is turned on, by the
+        HEDGING_ENV_VARIABLE environment variable."""
+
+        return c.is_truthy(os.environ.get(HEDGING_ENV_VARIABLE, ""))
+
+    @classmethod
+    def from_history(cls, history):
+        """Returns a hedger whose delay is the hedge percentile (see
+        HEDGE_PERCENTILE_ENV_VARIABLE) of a latency history.
+
+        # Arguments:
+            :param history: latencies of recent News API calls.
+            :type history: LatencyHistory
+        """
+
+        percentile = float(os.environ.get(HEDGE_PERCENTILE_ENV_VARIABLE,
+                                          DEFAULT_HEDGE_PERCENTILE))
+        delay = history.percentile(percentile)
+        if delay is None:
+            log.info("Too few recorded latencies to hedge News API calls")
+        else:
+            log.info("News API calls are hedged after {:.3f}s, the p{:g} "
+                     "of recent calls".format(delay, percentile))
+
+        return cls(delay)
+
+    def call(self, http_method, args, kwargs, bucket=None):
+        """Makes a remote call, hedging it if it does not answer within the
+        delay.
+
+        Returns the response of whichever copy of the call answered first.
+
+        # Arguments:
+            :param http_method: the Python function making the remote call.
+            :type http_method: function
+            :param args: positional arguments of the remote call.
+            :type args: tuple
+            :param kwargs: keyword arguments of the remote call.
+            :type kwargs: dict
+            :param bucket: token bucket the duplicate must take a token
+                from. No token is taken if not set.
+            :type bucket: TokenBucket
+
+        # Raises:
+            Exception: the error of the first copy, if every copy failed.
+        """
+
+        started = time.perf_counter()
+        try:
+            return self.first_response(http_method, args, kwargs, bucket)
+        finally:
+            with self.lock:
+                self.latencies.append(time.perf_counter() - started)
+
+    def first_response(self, http_method, args, kwargs, bucket):
+        """Returns the response of whichever copy of a remote call answers
+        first; see call()."""
+
+        if self.delay is None:
+            return http_method(*args, **kwargs)
+
+        primary = self.executor.submit(http_method, *args, **kwargs)
+
+        done, _ = concurrent.futures.wait([primary], timeout=self.delay)
+        if done or (bucket is not None and bucket.try_acquire()):
+            return primary.result()
+
+        hedge = self.executor.submit(http_method, *args, **kwargs)
+        with self.lock:
+            self.hedged += 1
+        c.MetricsEmitter.shared().increment(c.HEDGED_REQUESTS)
+
+        for future in concurrent.futures.as_completed([primary, hedge]):
+            if future.exception() is not None:
+                continue
+            if future is hedge:
+                with self.lock:
+                    self.hedges_won += 1
+                c.MetricsEmitter.shared().increment(c.HEDGED_REQUESTS_WON)
+            return future.result()
+
+        raise primary.exception()
+
+    def close(self):
+        """Stops taking calls, without waiting for the losing copies."""
+        self.executor.shutdown(wait=False)
+
+
+def active_hedger():
+    """returns the request hedger in force on this thread, or None."""
+    return getattr(_active, "hedger", None)
+
+
+@contextlib.contextmanager
+def request_hedging(history=None, enabled=None):
+    """Context manager putting request hedging in force for the News API
+    calls made on this thread, within the block it wraps. The latencies of
+    the calls are added to the history on the way out, whatever the
+    outcome. Yields the hedger, or None when not enabled.
+
+    # Arguments:
+        :param history: latencies of recent News API calls, which set the
+            hedging delay. Defaults to LatencyHistory.shared().
+        :type history: LatencyHistory
+        :param enabled: whether to hedge at all. Defaults to
+            RequestHedger.requested().
+        :type enabled: bool
+    """
+
+    if enabled is None:
+        enabled = RequestHedger.requested()
+    if not enabled:
+        yield None
+        return
+
+    if history is None:
+        history = LatencyHistory.shared()
+
+    hedger = RequestHedger.from_history(history)
+    previous = active_hedger()
+    _active.hedger = hedger
+
+    try:
+        yield hedger
+    finally:
+        _active.hedger = previous
+        hedger.close()
+        history.record(hedger.latencies)
+        log.info("Hedged {} News API calls, {} answered first by the "
+                 "duplicate".format(hedger.hedged, hedger.hedges_won))
@@ -5,9 +5,15 @@ news data from an external News API, in the DAG pipelines.
 """
 
 
+import copy
+import json
 import logging
+import math
 import os
+import random
 import requests
+import time
+import urllib.parse
 
 from airflow.models import Variable
 
@@ -21,11 +27,53 @@ log = logging.getLogger(__name__)
 # airflow creates a home environment variable pointing to the location
 HOME_DIRECTORY = str(os.environ['HOME'])
 
+# base url of the News API. It can be pointed at a stand-in server, e.g.
+# for benchmarking, with the NEWS_API_URL environment variable.
+DEFAULT_NEWS_API_URL = "https://newsapi.org"
+
+# number of times a single news source's headlines are requested before the
+# source is given up on, and the bounds (in seconds) of the jittered
+# exponential backoff waited between those attempts.
+SOURCE_MAX_ATTEMPTS = 3
+SOURCE_BACKOFF_BASE = 1.0
+SOURCE_BACKOFF_CAP = 30.0
+
+# http status codes after which a source's headlines request is worth
+# retrying. Any other error status (e.g. a bad api key or an unknown source)
+# fails the same way every time, so it is not retried.
+RETRYABLE_STATUS_CODES = [requests.codes.request_timeout,
+                          requests.codes.too_many_requests,
+                          requests.codes.internal_server_error,
+                          requests.codes.bad_gateway,
+                          requests.codes.service_unavailable,
+                          requests.codes.gateway_timeout]
+
+# number of articles requested per page of top-headlines - the largest page
+# the News API serves - and the page size it uses when none is requested.
+HEADLINES_PAGE_SIZE = 100
+NEWS_API_DEFAULT_PAGE_SIZE = 20
+
 
 class NetworkOperations:
     """Handles functionality for making remote calls to the News API."""
 
     @classmethod
+    def news_api_url(cls, path) -> str:
+        """Returns the full url of a News API endpoint path.
+
+        The base url is read from the NEWS_API_URL environment variable on
+        every call, defaulting to DEFAULT_NEWS_API_URL.
+
+        # Arguments:
+            :param path: the path of the endpoint e.g. '/v2/sources'.
+            :type path: str
+        """
+
+        base_url = os.environ.get('NEWS_API_URL', DEFAULT_NEWS_API_URL)
+        return base_url.rstrip('/') + path
+
+    @classmethod
+    @c.instrumented("network")
     def get_news(cls,
                  response: requests.Response,
                  news_dir=None,
@@ -88,10 +136,21 @@ class NetworkOperations:
         if not filename:
             fname = "english_news_sources"
 
+        c.record_response(response)
+
+        # write the data to file if the response status is 'okay'. The body
+        # of a requests.Response is streamed to the file as it is, without
+        # parsing it into a copy of the json data first.
+        if status_code == requests.codes.ok and c.is_streamable(response):
+            c.FileStorage.write_response_to_file(response,
+                                                 path_to_dir=news_dir,
+                                                 filename=fname)
+
+            return [True, status_code]
+
         # copy of the json data
         json_data = response.json()
 
-        # write the data to file if the response status is 'okay'
         if status_code == requests.codes.ok:
             c.FileStorage.write_json_to_file(data=json_data,
                                              path_to_dir=news_dir,
@@ -104,6 +163,64 @@ class NetworkOperations:
             return [False, status_code]
 
     @classmethod
+    @c.instrumented("network")
+    def get_news_sources(cls,
+                         url_endpoint=None,
+                         response_cache=None,
+                         **context):
+        """Macro function for the Airflow PythonOperator that retrieves the
+        english news sources, through the on-disk News API response cache.
+
+        The english sources list rarely changes between nightly runs, so
+        rather than re-downloading it every time, the response is served
+        from the cache (see the ResponseCache class) while it is fresh, and
+        revalidated with a conditional request once it is stale. The
+        response is then processed and stored exactly as the `get_news`
+        callback of the SimpleHTTPOperator would.
+
+        # Arguments:
+            :param url_endpoint: the news api sources url address. If not
+                filled in the default News API sources endpoint is used.
+            :type url_endpoint: str
+            :param response_cache: the cache to retrieve the sources through.
+                Defaults to a ResponseCache on the persistent 'http' cache
+                directory.
+            :type response_cache: object
+            :param context: airflow context object of the currently running
+                pipeline.
+            :type context: dict
+
+        # Raises:
+            ValueError: if the News API responds with an error status.
+        """
+
+        log.info("Running get_news_sources method")
+
+        # reference to the news api key
+        apikey = os.environ['NEWS_API_KEY']
+
+        if not url_endpoint:
+            url_endpoint = cls.news_api_url("/v2/sources")
+        if not response_cache:
+            response_cache = c.ResponseCache()
+
+        params = {'language': 'en', 'apiKey': apikey}
+        response = response_cache.get(url_endpoint, params)
+        log.info("News sources served from cache: {}".format(
+                 response.from_cache))
+
+        # store the sources in the current pipeline's news directory
+        dag_id = str(context['dag'].dag_id)
+        status, status_code = cls.get_news(response, gb_var=dag_id)
+
+        if not status:
+            raise ValueError("News sources request failed with status {}"
+                             .format(status_code))
+
+        return status
+
+    @classmethod
+    @c.instrumented("network")
     def get_news_headlines(cls, **context):
         """Macro function for the Airflow PythonOperator that processes
         the retrieved upstream news json data into top-headlines.
@@ -114,18 +231,26 @@ class NetworkOperations:
 
         - getting the context-specific news directory.
 
-        - for each json file in that directory
+        - for each json file listed in that directory's manifest
            - read the file (json.load)
            - get the news sources id and put them in a list.
 
+        - request the first page of every source's headlines concurrently,
+          the sources slowest in earlier runs first
+          (get_headlines_concurrently).
+
         - for each source id in the list
-           - make remote httpcall to get its headlines as json
+           - request the rest of its headlines, retrying a failed source
            - write the json to the 'headlines' directory (write_json_to_file)
 
         # Arguments:
             :param context: airflow context object of the currently running
                 pipeline.
             :type context: dict
+
+        # Raises:
+            FileNotFoundError: if the upstream task published no news files.
+            ValueError: if no news sources could be extracted from the files.
         """
 
         log.info("Running get_news_headlines method")
@@ -143,6 +268,13 @@ class NetworkOperations:
         source_headlines_writer = c.FileStorage.write_source_headlines_to_file
         source_extract_func = c.ExtractOperations.extract_jsons_source_info
 
+        # the upstream task publishes the news files it wrote in the news
+        # directory's manifest. Fail fast if it published nothing, rather
+        # than polling the directory for them.
+        if not pipeline_info.news_files:
+            raise FileNotFoundError("No news files published in {}".format(
+                                    pipeline_info.news_directory))
+
         # extract the news source tag information from jsons in the directory
         source_info = source_extract_func(pipeline_info.news_files,
                                           pipeline_info.news_directory)
@@ -155,16 +287,42 @@ class NetworkOperations:
         extracted_ids = source_info[0]
         extracted_names = source_info[1]
 
+        # with watermarks, only the articles each source published since
+        # the last successful run are kept.
+        watermarks = None
+        if c.HeadlineWatermarks.requested():
+            watermarks = c.HeadlineWatermarks.for_pipeline(dag_id)
+
         # get the headlines of sources, write them to json files. Note status.
-        write_stat = source_headlines_writer(extracted_ids,
-                                             extracted_names,
-                                             pipeline_info.headlines_directory,
-                                             apikey)
+        # Under a run-level deadline, the sources not fetched in time are
+        # left out and recorded in the failure ledger.
+        with c.fetch_deadline(), c.request_hedging():
+            # the first pages are requested concurrently, slowest source
+            # first, so that a slow source does not hold up the others. With
+            # hedging, the sources are instead requested one at a time, and
+            # their slow requests duplicated to cut the run's tail latency.
+            headline_func = None
+            if not c.RequestHedger.requested():
+                first_pages = cls.get_headlines_concurrently(
+                    source_ids=extracted_ids,
+                    api_key=apikey,
+                    page_size=HEADLINES_PAGE_SIZE)
+                headline_func = cls.prefetched_headlines(
+                    first_pages['sources'])
+
+            write_stat = source_headlines_writer(
+                extracted_ids,
+                extracted_names,
+                pipeline_info.headlines_directory,
+                apikey,
+                headline_func=headline_func,
+                watermarks=watermarks)
 
         # PythonOperator callable needs to return True or False status.
         return write_stat
 
     @classmethod
+    @c.instrumented("network")
     def get_news_keyword_headlines(cls,
                                    response: requests.Response,
                                    headlines_dir=None,
@@ -203,15 +361,52 @@ class NetworkOperations:
         if not headlines_dir:
             headlines_dir = pipeline_info.headlines_directory
 
-        # retrieve the json data from the Response object
+        # retrieve the json data from the Response object, and from the
+        # remaining pages of the keyword's headlines if there are several.
+        # Under a run-level deadline, the pages not fetched in time fail
+        # the task, so that Airflow retries it.
+        c.record_response(response)
+        with c.fetch_deadline():
+            response = cls.get_remaining_headline_pages(response)
+
+        # a page that failed leaves nothing worth writing: fail the task,
+        # so that Airflow retries the keyword's headlines as a whole
+        if response.status_code != requests.codes.ok:
+            log.info("Headlines of '{}' could not be retrieved: HTTP status "
+                     "{}".format(query, response.status_code))
+            return False
+
+        # without watermarks, the body is written out as it is, streamed
+        # to the file rather than parsed and serialized again.
+        if not c.HeadlineWatermarks.requested() and \
+                c.is_streamable(response):
+            write_stat = c.FileStorage.write_response_to_file(
+                response,
+                headlines_dir,
+                filename)
+
+            return bool(write_stat and os.listdir(headlines_dir))
+
         json_data = response.json()
 
+        # with watermarks, only the articles published about the keyword
+        # since the last successful run are kept.
+        new_watermarks = None
+        if c.HeadlineWatermarks.requested():
+            watermarks = c.HeadlineWatermarks.for_pipeline(pipeline_name)
+            key = watermarks.keyword_key(query)
+            json_data, watermark = watermarks.filter_headlines(key, json_data)
+            if watermark:
+                new_watermarks = {key: watermark}
+
         # write to json data to a file with the query-keyword as its filename.
         # Note status of the operation. True implies the write went okay,
         # False otherwise.
-        write_stat = c.FileStorage.write_json_to_file(json_data,
-                                                      headlines_dir,
-                                                      filename)
+        write_stat = c.FileStorage.write_json_to_file(
+            json_data,
+            headlines_dir,
+            filename,
+            watermarks=new_watermarks)
 
         # file-write was successful and 'headlines' folder contains the json
         if write_stat and os.listdir(headlines_dir):
@@ -220,13 +415,452 @@ class NetworkOperations:
             return False
 
     @classmethod
+    @c.instrumented("network")
+    def get_headlines_concurrently(cls,
+                                   source_ids=None,
+                                   keywords=None,
+                                   api_key=None,
+                                   url_endpoint=None,
+                                   engine=None,
+                                   deadline=None,
+                                   statistics=None,
+                                   page_size=None) -> dict:
+        """Retrieves the top-headlines of many news sources and keywords
+        concurrently, on a single thread, with the asyncio fetch engine.
+
+        This is a synchronous call, usable from an Airflow PythonOperator
+        callable; see the AsyncFetchEngine class for how the requests are
+        pooled, timed out, rate limited and cancelled.
+
+        The requests are started longest-processing-time-first, by the
+        latency and payload size of each source and keyword in earlier
+        runs, which are then updated with this run's (see
+        SourceStatistics).
+
+        Returns a dictionary with a 'sources' and a 'keywords' dictionary,
+        mapping each source id and keyword to its requests.Response - or to
+        the exception its request failed with.
+
+        # Arguments:
+            :param source_ids: list of news source ids to get headlines of.
+            :type source_ids: list
+            :param keywords: list of query keywords to get headlines of.
+            :type keywords: list
+            :param api_key: the News API Key for using the News API service.
+            :type api_key: str
+            :param url_endpoint: the news api top-headlines url address. If
+                not filled in the default News API endpoint is used.
+            :type url_endpoint: str
+            :param engine: the fetch engine to make the requests with.
+                Defaults to a new AsyncFetchEngine.
+            :type engine: object
+            :param deadline: number of seconds after which the requests
+                still in flight are cancelled. No deadline if not set.
+            :type deadline: float
+            :param statistics: the fetch statistics to schedule the
+                requests by. Defaults to SourceStatistics.shared().
+            :type statistics: SourceStatistics
+            :param page_size: the number of articles per page. Defaults to
+                the News API's own page size.
+            :type page_size: int
+
+        # Raises:
+            ValueError: if neither source ids nor keywords are passed in.
+            ValueError: if no News API Key argument is passed in.
+        """
+
+        log.info("Running get_headlines_concurrently method")
+
+        source_ids = list(source_ids or [])
+        keywords = list(keywords or [])
+
+        if not source_ids and not keywords:
+            raise ValueError("No news sources or keywords to retrieve")
+        if not api_key:
+            raise ValueError("No News API Key found")
+
+        if not url_endpoint:
+            url_endpoint = cls.news_api_url("/v2/top-headlines")
+        if not engine:
+            engine = c.AsyncFetchEngine()
+        if not statistics:
+            statistics = c.SourceStatistics.shared()
+
+        # the query parameters of each source's and keyword's request, by
+        # its statistics key
+        params = {}
+        for source in source_ids:
+            params[c.HeadlineWatermarks.source_key(source)] = {
+                'sources': source, 'apiKey': api_key}
+        for keyword in keywords:
+            params[c.HeadlineWatermarks.keyword_key(keyword)] = {
+                'q': keyword, 'apiKey': api_key}
+
+        if page_size:
+            for request_params in params.values():
+                request_params['pageSize'] = page_size
+
+        schedule = statistics.schedule(list(params))
+        request_list = [(url_endpoint, params[key]) for key in schedule]
+
+        results = engine.fetch_many_sync(request_list, deadline=deadline)
+        results_by_key = dict(zip(schedule, results))
+
+        observations = {}
+        for key, response in results_by_key.items():
+            c.record_response(response)
+            observation = c.SourceStatistics.observe(response)
+            if observation:
+                observations[key] = observation
+        statistics.record(observations)
+
+        source_key = c.HeadlineWatermarks.source_key
+        keyword_key = c.HeadlineWatermarks.keyword_key
+
+        return {'sources': {source: results_by_key[source_key(source)]
+                            for source in source_ids},
+                'keywords': {keyword: results_by_key[keyword_key(keyword)]
+                             for keyword in keywords}}
+
+    @classmethod
+    def prefetched_headlines(cls, first_pages):
+        """Returns a headline function, for write_source_headlines_to_file(),
+        that completes the first pages of the sources' headlines already
+        retrieved.
+
+        The function requests the remaining pages of a source's first page
+        (see get_remaining_headline_pages), and raises the error its
+        request failed with. A source without a first page, or asked for
+        again when its headlines are retried, is requested anew with
+        get_paged_source_headlines().
+
+        # Arguments:
+            :param first_pages: the response of each source's first page,
+                or the exception its request failed with, keyed by source
+                id (see get_headlines_concurrently).
+            :type first_pages: dict
+        """
+
+        first_pages = dict(first_pages)
+
+        def headline_func(source_id, api_key=None):
+            first_page = first_pages.pop(source_id, None)
+            if first_page is None:
+                return cls.get_paged_source_headlines(source_id,
+                                                      api_key=api_key)
+            if isinstance(first_page, Exception):
+                raise first_page
+
+            return cls.get_remaining_headline_pages(first_page,
+                                                    keep_partial=True)
+
+        return headline_func
+
+    @classmethod
+    @c.instrumented("network")
+    def get_paged_source_headlines(cls,
+                                   source_id,
+                                   api_key=None,
+                                   url_endpoint=None,
+                                   http_method=None,
+                                   rate_limiter=None,
+                                   engine=None,
+                                   page_size=None,
+                                   max_results=None):
+        """Retrieves all of a news source's top-headlines, page by page.
+
+        The first page is requested under the News API rate limiter; the
+        others, if its 'totalResults' says there are more, are then
+        requested concurrently (see get_remaining_headline_pages).
+
+        Returns a response of the first page, holding the articles of every
+        page in order, so that it can be processed like the response of a
+        single get_source_headlines() call. A page failing with a status
+        not worth retrying ends the paging, keeping the articles of the
+        pages before it (see the `partial_error` of the response).
+
+        # Arguments:
+            :param source_id: the id of the news source.
+            :type source_id: str
+            :param api_key: the News API Key for using the News API service.
+            :type api_key: str
+            :param url_endpoint: the news api top-headlines url address. If
+                not filled in the default News API endpoint is used.
+            :type url_endpoint: str
+            :param http_method: the Python function to use for requesting
+                the first page. Defaults to the Python Request Library's
+                get().
+            :type http_method: function
+            :param rate_limiter: the rate limiter to request the first page
+                under. Defaults to the one shared by all News API calls.
+            :type rate_limiter: object
+            :param engine: the fetch engine to request the other pages with.
+                Defaults to a new AsyncFetchEngine.
+            :type engine: object
+            :param page_size: the number of articles per page. Defaults to
+                HEADLINES_PAGE_SIZE.
+            :type page_size: int
+            :param max_results: the number of articles retrieved at most.
+                All of them if not set.
+            :type max_results: int
+
+        # Raises:
+            ValueError: if no news source id argument is passed in.
+            ValueError: if no News API Key argument is passed in.
+        """
+
+        log.info("Running get_paged_source_headlines method")
+
+        if not source_id:
+            raise ValueError("'source_id' cannot be left blank")
+        if not api_key:
+            raise ValueError("No News API Key found")
+
+        if not url_endpoint:
+            url_endpoint = cls.news_api_url("/v2/top-headlines")
+        if not http_method:
+            http_method = requests.get
+        if not rate_limiter:
+            rate_limiter = c.RateLimiter.shared()
+        if not page_size:
+            page_size = HEADLINES_PAGE_SIZE
+
+        params = {'sources': source_id,
+                  'pageSize': page_size,
+                  'apiKey': api_key}
+
+        response = rate_limiter.call(http_method, url_endpoint, params=params)
+        c.record_response(response)
+
+        # a source keeps the pages fetched before one failing for good, so
+        # that it is not dropped for a limit on how deep it can be paged
+        return cls.get_remaining_headline_pages(response,
+                                                url_endpoint,
+                                                params,
+                                                engine=engine,
+                                                max_results=max_results,
+                                                keep_partial=True)
+
+    @classmethod
+    def get_remaining_headline_pages(cls,
+                                     first_page,
+                                     url_endpoint=None,
+                                     params=None,
+                                     engine=None,
+                                     max_results=None,
+                                     keep_partial=False):
+        """Retrieves the pages of top-headlines following a first page.
+
+        The number of pages is worked out from the first page's
+        'totalResults' and page size, and the remaining pages are requested
+        concurrently with the asyncio fetch engine, which shares the News
+        API rate limiter.
+
+        Returns a response of the first page holding the articles of every
+        page in order - or the first page itself if it failed or is the
+        only one. A remaining page that fails with an error status is
+        returned instead, so that the caller handles (or retries) the
+        headlines like any failed request.
+
+        Given keep_partial, a remaining page failing with a status not
+        worth retrying (such as the '426 Upgrade Required' of a plan past
+        its result limit) stops the paging instead: the articles of the
+        pages fetched so far are returned, and the response flagged with
+        a `partial_error` describing the failure.
+
+        # Arguments:
+            :param first_page: the response of the first page.
+            :type first_page: requests.Response
+            :param url_endpoint: the url the first page was requested from.
+                Defaults to the url of the first page's request.
+            :type url_endpoint: str
+            :param params: the query parameters of the first page. Defaults
+                to those of the first page's request.
+            :type params: dict
+            :param engine: the fetch engine to request the pages with.
+                Defaults to a new AsyncFetchEngine.
+            :type engine: object
+            :param max_results: the number of articles retrieved at most.
+                All of them if not set.
+            :type max_results: int
+            :param keep_partial: whether to keep the pages fetched before a
+                page failing with a status not worth retrying.
+            :type keep_partial: bool
+
+        # Raises:
+            requests.exceptions.RequestException: if a page could not be
+                retrieved.
+        """
+
+        log.info("Running get_remaining_headline_pages method")
+
+        if first_page.status_code != requests.codes.ok:
+            return first_page
+
+        # the total is read from the head of a streamable body where it can
+        # be, so that the body of the only page is never parsed.
+        data = {}
+        if c.is_streamable(first_page):
+            data = c.peek_json_fields(first_page.content[:c.HEAD_SIZE],
+                                      ['totalResults'])
+        if not isinstance(data.get('totalResults'), int):
+            data = first_page.json()
+            if not isinstance(data, dict) or \
+                    not isinstance(data.get('totalResults'), int):
+                return first_page
+
+        if url_endpoint is None or params is None:
+            parts = urllib.parse.urlsplit(first_page.request.url)
+            url_endpoint = urllib.parse.urlunsplit(parts[:3] + ('', ''))
+            params = dict(urllib.parse.parse_qsl(parts.query))
+
+        page_size = int(params.get('pageSize', NEWS_API_DEFAULT_PAGE_SIZE))
+        total = data['totalResults']
+        if max_results:
+            total = min(total, max_results)
+        pages = math.ceil(total / page_size)
+        if pages <= 1:
+            return first_page
+
+        if 'articles' not in data:
+            data = first_page.json()
+        if not isinstance(data, dict) or \
+                not isinstance(data.get('articles'), list):
+            return first_page
+
+        if not engine:
+            engine = c.AsyncFetchEngine()
+
+        request_list = [(url_endpoint, dict(params,
+                                            page=page,
+                                            pageSize=page_size))
+                        for page in range(2, pages + 1)]
+        log.info("Retrieving {} more pages of headlines".format(
+            len(request_list)))
+
+        articles = list(data['articles'])
+        partial_error = None
+        for page, result in enumerate(engine.fetch_many_sync(request_list),
+                                      start=2):
+            if isinstance(result, Exception):
+                raise result
+            c.record_response(result)
+            if result.status_code != requests.codes.ok:
+                if not keep_partial or \
+                        result.status_code in RETRYABLE_STATUS_CODES:
+                    return result
+                # keep the pages fetched before this one, rather than
+                # losing them all to a failure a retry will not fix
+                partial_error = "HTTP status {} on page {} of {}".format(
+                    result.status_code, page, pages)
+                log.info("Keeping the {} articles fetched before: {}".format(
+                    len(articles), partial_error))
+                break
+            articles.extend(result.json().get('articles') or [])
+
+        data['articles'] = articles[:total]
+
+        combined = copy.copy(first_page)
+        combined._content = json.dumps(data).encode('utf-8')
+        combined.encoding = 'utf-8'
+        combined.partial_error = partial_error
+
+        return combined
+
+    @classmethod
+    def get_source_headlines_with_retry(cls,
+                                        source_id,
+                                        api_key,
+                                        headline_func=None,
+                                        max_attempts=None,
+                                        sleep=None) -> dict:
+        """Retrieves a news source's top-headlines, retrying failed calls.
+
+        A call that raises a network error, or returns a retryable status
+        (see RETRYABLE_STATUS_CODES), is retried after a 'full jitter'
+        exponential backoff - a random wait of up to SOURCE_BACKOFF_BASE
+        doubled per attempt, capped at SOURCE_BACKOFF_CAP - so one flaky
+        source costs a few extra requests rather than a rerun of the task.
+
+        Returns a dictionary with the final `response` (None if every
+        attempt raised), the number of `attempts` made, and the last
+        `error` message (None on success).
+
+        No attempt is made, and no backoff waited, past the run-level
+        deadline in force (see fetch_deadline).
+
+        # Arguments:
+            :param source_id: the id of the news source.
+            :type source_id: str
+            :param api_key: the News API Key for using the News API service.
+            :type api_key: str
+            :param headline_func: function to use for retrieving headlines.
+                Defaults to get_paged_source_headlines().
+            :type headline_func: function
+            :param max_attempts: the number of calls made at most.
+                Defaults to SOURCE_MAX_ATTEMPTS.
+            :type max_attempts: int
+            :param sleep: function used to wait between attempts.
+                Defaults to time.sleep().
+            :type sleep: function
+        """
+
+        log.info("Running get_source_headlines_with_retry method")
+
+        if not headline_func:
+            headline_func = cls.get_paged_source_headlines
+        if not max_attempts:
+            max_attempts = SOURCE_MAX_ATTEMPTS
+        if not sleep:
+            sleep = time.sleep
+
+        response = None
+        error = None
+        deadline = c.active_deadline()
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                response = headline_func(source_id, api_key=api_key)
+            except requests.exceptions.RequestException as err:
+                response = None
+                error = "{}: {}".format(type(err).__name__, err)
+            else:
+                if response.status_code == requests.codes.ok:
+                    return {'response': response,
+                            'attempts': attempt,
+                            'error': None}
+
+                error = "HTTP status {}".format(response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    break
+
+            if attempt < max_attempts:
+                backoff = min(SOURCE_BACKOFF_CAP,
+                              SOURCE_BACKOFF_BASE * 2 ** (attempt - 1))
+                delay = random.uniform(0, backoff)
+                if deadline is not None and delay >= deadline.remaining():
+                    log.info("Headlines of {} failed ({}), not retried "
+                             "past the run deadline".format(source_id, error))
+                    break
+                log.info("Headlines of {} failed ({}), retrying in {:.2f}s"
+                         .format(source_id, error, delay))
+                sleep(delay)
+
+        return {'response': response, 'attempts': attempt, 'error': error}
+
+    @classmethod
+    @c.instrumented("network")
     def get_source_headlines(cls,
                              source_id,
                              url_endpoint=None,
                              http_method=None,
-                             api_key=None):
+                             api_key=None,
+                             rate_limiter=None):
         """Retrieves a news source's top-headlines via a remote API call.
 
+        The call is made under the News API rate limiter, which waits out
+        and retries '429 Too Many Requests' responses.
+
         # Arguments:
             :param source_id: the id of the news source.
             :type source_id: str
@@ -240,6 +874,9 @@ class NetworkOperations:
             :param api_key: the News API Key for using the News API service.
                 The key is required to use the API and cannot be left blank.
             :type api_key: str
+            :param rate_limiter: the rate limiter to make the call under.
+                Defaults to the one shared by all News API calls.
+            :type rate_limiter: object
 
         # Raises:
             ValueError: if no news source id argument is passed in.
@@ -259,7 +896,10 @@ class NetworkOperations:
             http_method = requests.get
 
         if not url_endpoint:
-            url_endpoint = "https://newsapi.org/v2/top-headlines?"
+            url_endpoint = cls.news_api_url("/v2/top-headlines?")
+
+        if not rate_limiter:
+            rate_limiter = c.RateLimiter.shared()
 
         # craft the http request
         params = "sources=" + source_id
@@ -267,6 +907,7 @@ class NetworkOperations:
         header = "".join([url_endpoint, params])
         full_request = "&".join([header, key])
 
-        response = http_method(full_request)
+        response = rate_limiter.call(http_method, full_request)
+        c.record_response(response)
 
         return response
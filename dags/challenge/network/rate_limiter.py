@@ -0,0 +1,380 @@
+"""Tempus challenge  - Operations and Functions: News API Rate Limiting
+
+Describes the code definitions of the client-side rate limiter shared by
+every remote call made to the News API, in the DAG pipelines.
+"""
+
+
+import email.utils
+import logging
+import os
+import requests
+import threading
+import time
+
+import challenge as c
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# default number of News API requests per second allowed, on average, and
+# the size of the burst of requests allowed at once. Both can be overridden
+# through environment variables to match the News API plan in use.
+DEFAULT_REQUEST_RATE = float(os.environ.get('NEWS_API_REQUEST_RATE', 5))
+DEFAULT_REQUEST_BURST = int(os.environ.get('NEWS_API_REQUEST_BURST', 10))
+
+# default bounds on the number of News API requests in flight at once
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get('NEWS_API_MAX_CONCURRENCY', 8))
+
+# number of times a request is retried after a '429 Too Many Requests'
+# response, before that response is handed back to the caller.
+DEFAULT_MAX_RETRIES = 5
+
+# number of seconds to wait after a '429 Too Many Requests' response that
+# carries no Retry-After header.
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` operations per second, on average, with
+    bursts of up to `capacity` operations.
+
+    The bucket can also be paused until a point in time, as instructed by a
+    News API Retry-After header, during which no tokens are handed out.
+
+    # Arguments:
+        :param rate: number of tokens added to the bucket per second.
+        :type rate: float
+        :param capacity: maximum number of tokens the bucket holds.
+        :type capacity: int
+        :param clock: function returning the current time in seconds.
+            Defaults to time.monotonic().
+        :type clock: function
+        :param sleep: function used to wait for a number of seconds.
+            Defaults to time.sleep().
+        :type sleep: function
+
+    # Raises:
+        ValueError: if the rate or the capacity is not positive.
+    """
+
+    def __init__(self, rate, capacity, clock=None, sleep=None):
+        if rate <= 0:
+            raise ValueError("Rate limit must be positive, got {}"
+                             .format(rate))
+        if capacity < 1:
+            raise ValueError("Bucket capacity must be at least 1, got {}"
+                             .format(capacity))
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+
+        self.tokens = self.capacity
+        self.updated_at = self.clock()
+        self.paused_until = self.updated_at
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token from the bucket, waiting until one is available.
+
+        Returns the number of seconds spent waiting.
+        """
+
+        waited = 0.0
+
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return waited
+
+            # wait outside of the lock, so other threads can check in too
+            self.sleep(delay)
+            waited += delay
+
+    def try_acquire(self) -> float:
+        """Takes one token from the bucket if one is available, without
+        waiting.
+
+        Returns 0 if a token was taken, otherwise the number of seconds to
+        wait before trying again. Lets callers that cannot block, like the
+        asyncio fetch engine, share the bucket with blocking callers.
+        """
+
+        with self.lock:
+            now = self.clock()
+
+            # top up the bucket with the tokens earned since last time
+            elapsed = max(0.0, now - self.updated_at)
+            self.tokens = min(self.capacity,
+                              self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+
+            return (1 - self.tokens) / self.rate
+
+    def pause(self, seconds):
+        """Hands out no tokens for the next number of seconds, and empties
+        the bucket so requests resume gradually afterwards."""
+
+        with self.lock:
+            until = self.clock() + max(0.0, seconds)
+            self.paused_until = max(self.paused_until, until)
+            self.tokens = 0.0
+
+
+class AdaptiveConcurrency:
+    """Limit on the number of requests in flight at once, which adapts to
+    the News API's rate limiting.
+
+    The limit follows an additive-increase/multiplicative-decrease policy:
+    it is halved whenever the News API responds '429 Too Many Requests' and
+    grows by one after every `limit` successful requests, up to a maximum.
+
+    # Arguments:
+        :param maximum: the largest number of requests in flight at once.
+        :type maximum: int
+        :param minimum: the smallest number of requests in flight at once.
+        :type minimum: int
+
+    # Raises:
+        ValueError: if the bounds are not positive, or are inverted.
+    """
+
+    def __init__(self, maximum, minimum=1):
+        if minimum < 1 or maximum < minimum:
+            raise ValueError("Invalid concurrency bounds {} to {}"
+                             .format(minimum, maximum))
+
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = maximum
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Waits until a request can be put in flight under the limit."""
+
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        """Marks a request in flight as finished."""
+
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def record_success(self):
+        """Grows the limit by one after a full window of successes."""
+
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify_all()
+
+    def record_throttled(self):
+        """Halves the limit after a '429 Too Many Requests' response."""
+
+        with self.condition:
+            self.limit = max(self.minimum, self.limit // 2)
+            self.successes = 0
+            log.info("News API concurrency limit lowered to {}"
+                     .format(self.limit))
+
+
+class RateLimiter:
+    """Client-side rate limiter for the remote calls made to the News API.
+
+    Every call waits for a token from a shared TokenBucket and for a slot
+    under an AdaptiveConcurrency limit. A '429 Too Many Requests' response
+    pauses the whole limiter for as long as its Retry-After header says,
+    lowers the concurrency, and is retried - so a pipeline runs as fast as
+    the quota allows without failing its Airflow task.
+
+    One limiter is shared by every call in a process (see `shared()`), so
+    all the News API calls of a task are throttled together.
+
+    Every call is also given connect and read timeouts, unless it passes
+    its own, so one hung connection cannot block a task until Airflow
+    kills it. While a run-level deadline is in force (see fetch_deadline)
+    the timeouts are cut down to the time left, and a call made after the
+    deadline fails with DeadlineExceeded without being sent.
+
+    While request hedging is in force (see request_hedging), a call that
+    is slow to answer is duplicated, for a token of its own, and counts as
+    one call against the concurrency limit.
+
+    # Arguments:
+        :param rate: number of requests per second allowed, on average.
+            Defaults to DEFAULT_REQUEST_RATE.
+        :type rate: float
+        :param burst: number of requests allowed at once.
+            Defaults to DEFAULT_REQUEST_BURST.
+        :type burst: int
+        :param max_concurrency: the largest number of requests in flight
+            at once. Defaults to DEFAULT_MAX_CONCURRENCY.
+        :type max_concurrency: int
+        :param max_retries: number of times a throttled request is retried.
+            Defaults to DEFAULT_MAX_RETRIES.
+        :type max_retries: int
+        :param timeout: the (connect, read) timeouts of the calls, in
+            seconds. Defaults to DEFAULT_CONNECT_TIMEOUT and
+            DEFAULT_READ_TIMEOUT.
+        :type timeout: tuple
+        :param clock: function returning the current time in seconds.
+        :type clock: function
+        :param sleep: function used to wait for a number of seconds.
+        :type sleep: function
+    """
+
+    # the limiter shared by all the News API calls made in this process
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self,
+                 rate=None,
+                 burst=None,
+                 max_concurrency=None,
+                 max_retries=None,
+                 timeout=None,
+                 clock=None,
+                 sleep=None):
+        if rate is None:
+            rate = DEFAULT_REQUEST_RATE
+        if burst is None:
+            burst = DEFAULT_REQUEST_BURST
+        if max_concurrency is None:
+            max_concurrency = DEFAULT_MAX_CONCURRENCY
+        if max_retries is None:
+            max_retries = DEFAULT_MAX_RETRIES
+        if timeout is None:
+            timeout = (c.DEFAULT_CONNECT_TIMEOUT, c.DEFAULT_READ_TIMEOUT)
+
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+    @classmethod
+    def shared(cls):
+        """Returns the rate limiter shared by all News API calls made in
+        this process, creating it on first use."""
+
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def retry_after_seconds(cls, response) -> float:
+        """Returns the number of seconds a '429 Too Many Requests' response
+        asks the client to wait before retrying.
+
+        The Retry-After header holds either a number of seconds or an HTTP
+        date; DEFAULT_RETRY_AFTER is used if it is missing or malformed.
+        """
+
+        value = response.headers.get('Retry-After')
+        if not value:
+            return DEFAULT_RETRY_AFTER
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+        if retry_date is None:
+            return DEFAULT_RETRY_AFTER
+
+        return max(0.0, retry_date.timestamp() - time.time())
+
+    def call(self, http_method, *args, **kwargs):
+        """Makes a remote call to the News API under the rate limit.
+
+        Returns the response of the call. A throttled call is retried up to
+        `max_retries` times, after which its '429 Too Many Requests'
+        response is returned as-is.
+
+        The call is passed the limiter's timeout, unless a `timeout` keyword
+        argument is given, cut down to the time left before the run-level
+        deadline in force, if any.
+
+        # Arguments:
+            :param http_method: the Python function making the remote call,
+                e.g. the Python Request Library's get().
+            :type http_method: function
+            :param args: positional arguments of the remote call.
+            :type args: tuple
+            :param kwargs: keyword arguments of the remote call.
+            :type kwargs: dict
+
+        # Raises:
+            DeadlineExceeded: if the run-level deadline has passed.
+        """
+
+        attempt = 0
+        emitter = c.MetricsEmitter.shared()
+        timeout = kwargs.pop('timeout', self.timeout)
+
+        while True:
+            self.concurrency.acquire()
+            try:
+                self.bucket.acquire()
+
+                # the deadline is checked once the call is cleared to go,
+                # since waiting for the rate limit may have used it up.
+                deadline = c.active_deadline()
+                if deadline is not None:
+                    kwargs['timeout'] = deadline.timeout(timeout)
+                else:
+                    kwargs['timeout'] = timeout
+
+                hedger = c.active_hedger()
+                started = time.perf_counter()
+                try:
+                    if hedger is not None:
+                        response = hedger.call(http_method, args, kwargs,
+                                               self.bucket)
+                    else:
+                        response = http_method(*args, **kwargs)
+                except Exception:
+                    emitter.record_request('error',
+                                           time.perf_counter() - started)
+                    raise
+                emitter.record_request(response.status_code,
+                                       time.perf_counter() - started)
+            finally:
+                self.concurrency.release()
+
+            if response.status_code != requests.codes.too_many_requests:
+                self.concurrency.record_success()
+                return response
+
+            self.concurrency.record_throttled()
+            if attempt >= self.max_retries:
+                log.info("News API still rate limited after {} retries"
+                         .format(attempt))
+                return response
+
+            # stop every caller sharing this limiter, not only this one
+            delay = self.retry_after_seconds(response)
+            log.info("News API rate limited, retrying in {}s".format(delay))
+            self.bucket.pause(delay)
+            attempt += 1
@@ -0,0 +1,205 @@
+"""Tempus challenge  - Operations and Functions: HTTP Response Cache
+
+Describes the code definitions of an on-disk cache of News API responses,
+used by the Airflow tasks making remote calls in the DAG pipelines.
+"""
+
+
+import hashlib
+import json
+import logging
+import os
+import requests
+import time
+
+from requests.structures import CaseInsensitiveDict
+
+import challenge as c
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# default number of seconds a cached response is served without contacting
+# the News API at all. The english news sources list rarely changes, so a
+# week old copy is good enough; after that the response is revalidated.
+DEFAULT_CACHE_TTL = 7 * 24 * 60 * 60
+
+# request parameters left out of the cache key. The same response is
+# returned whichever News API key is used, and keys should not leak into
+# the cache on disk.
+UNCACHED_PARAMS = ['apiKey']
+
+
+class ResponseCache:
+    """On-disk cache of successful http responses from the News API.
+
+    A cached response younger than the cache's time-to-live is served
+    straight from disk. An older one is revalidated with a conditional
+    request, using the ETag and Last-Modified headers the server sent with
+    it; a '304 Not Modified' reply is then served from disk too, so that the
+    API quota is only spent downloading data that actually changed.
+
+    Each response is stored as two files, named after a hash of the request
+    url and parameters: the raw body, and a json file of its metadata.
+
+    # Arguments:
+        :param cache_dir: directory in which to store the cached responses.
+            Defaults to the persistent 'http' cache directory.
+        :type cache_dir: str
+        :param ttl: number of seconds a cached response is served without
+            revalidating it. Defaults to DEFAULT_CACHE_TTL.
+        :type ttl: int
+        :param http_method: the Python function to use for making the
+            remote call. Defaults to the Python Request Library's get().
+        :type http_method: function
+        :param rate_limiter: the rate limiter remote calls are made under.
+            Defaults to the one shared by all News API calls.
+        :type rate_limiter: object
+    """
+
+    def __init__(self,
+                 cache_dir=None,
+                 ttl=None,
+                 http_method=None,
+                 rate_limiter=None):
+        if not cache_dir:
+            cache_dir = c.FileStorage.get_cache_directory('http')
+        if ttl is None:
+            ttl = DEFAULT_CACHE_TTL
+        if not http_method:
+            http_method = requests.get
+        if not rate_limiter:
+            rate_limiter = c.RateLimiter.shared()
+
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.http_method = http_method
+        self.rate_limiter = rate_limiter
+
+    def cache_key(self, url, params=None) -> str:
+        """Returns the key a request's response is cached under."""
+
+        params = params or {}
+        key_params = sorted((str(name), str(value))
+                            for name, value in params.items()
+                            if name not in UNCACHED_PARAMS)
+        key_data = json.dumps([url, key_params])
+
+        return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+    def get(self, url, params=None):
+        """Returns the response to a GET request, from the cache if possible.
+
+        The returned requests.Response object has an extra `from_cache`
+        attribute, set to True when the body was served from disk.
+
+        Only '200 OK' responses are cached; any other response is returned
+        as-is and leaves an existing cached copy untouched.
+
+        # Arguments:
+            :param url: the url of the request.
+            :type url: str
+            :param params: the query parameters of the request.
+            :type params: dict
+        """
+
+        log.info("Running get method")
+
+        key = self.cache_key(url, params)
+        metadata = self.load_metadata(key)
+
+        # serve a fresh cached response without contacting the server
+        if metadata and time.time() - metadata['stored_at'] < self.ttl:
+            log.info("Serving cached response for {}".format(url))
+            return self.load_response(key, metadata, url, params)
+
+        # revalidate a stale cached response with a conditional request
+        headers = {}
+        if metadata and metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        if metadata and metadata.get('last_modified'):
+            headers['If-Modified-Since'] = metadata['last_modified']
+
+        response = self.rate_limiter.call(self.http_method,
+                                          url,
+                                          params=params,
+                                          headers=headers)
+        response.from_cache = False
+
+        if metadata and response.status_code == requests.codes.not_modified:
+            log.info("Cached response for {} not modified".format(url))
+            metadata['stored_at'] = time.time()
+            self.store_metadata(key, metadata)
+            return self.load_response(key, metadata, url, params)
+
+        if response.status_code == requests.codes.ok:
+            self.store_response(key, response)
+
+        return response
+
+    def metadata_path(self, key) -> str:
+        """Returns the path to the metadata file of a cached response."""
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def body_path(self, key) -> str:
+        """Returns the path to the body file of a cached response."""
+        return os.path.join(self.cache_dir, key + ".body")
+
+    def load_metadata(self, key):
+        """Returns the metadata of a cached response, or None if the response
+        is not cached."""
+
+        if not os.path.isfile(self.metadata_path(key)):
+            return None
+        if not os.path.isfile(self.body_path(key)):
+            return None
+
+        with open(self.metadata_path(key), "r") as inputfile:
+            return json.load(inputfile)
+
+    def store_metadata(self, key, metadata):
+        """Writes the metadata of a cached response to disk."""
+
+        path = self.metadata_path(key)
+        with open(path + ".tmp", "w") as outputfile:
+            json.dump(metadata, outputfile, indent=4)
+        os.replace(path + ".tmp", path)
+
+    def store_response(self, key, response):
+        """Writes the body and metadata of a response to the cache."""
+
+        log.info("Caching response for {}".format(response.url))
+
+        path = self.body_path(key)
+        with open(path + ".tmp", "wb") as outputfile:
+            outputfile.write(response.content)
+        os.replace(path + ".tmp", path)
+
+        metadata = {'url': response.url,
+                    'stored_at': time.time(),
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'content_type': response.headers.get('Content-Type'),
+                    'encoding': response.encoding}
+        self.store_metadata(key, metadata)
+
+    def load_response(self, key, metadata, url, params=None):
+        """Rebuilds a requests.Response object from a cached response."""
+
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response.url = metadata['url']
+        response.encoding = metadata['encoding']
+        response.headers = CaseInsensitiveDict()
+        if metadata.get('content_type'):
+            response.headers['Content-Type'] = metadata['content_type']
+        request = requests.Request('GET', url, params=params)
+        response.request = request.prepare()
+        response.from_cache = True
+
+        with open(self.body_path(key), "rb") as inputfile:
+            response._content = inputfile.read()
+        response._content_consumed = True
+
+        return response
@@ -0,0 +1,158 @@
+"""Tempus challenge  - Operations and Functions: News Source Fetch Statistics
+
+Describes the code definitions of the per-source fetch statistics - how
+long each news source's or keyword's headlines took to retrieve and how
+large they were - persisted between runs of the DAG pipelines, and used to
+schedule the slowest fetches first.
+"""
+
+
+import json
+import logging
+import os
+
+import challenge as c
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is unavailable on Windows, where statistics updates are unlocked.
+    fcntl = None
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# weight of the latest run in a source's statistics, which are moving
+# averages so that a source's estimate follows its recent behaviour without
+# being thrown by a single slow run.
+STATISTICS_SMOOTHING = 0.3
+
+
+class SourceStatistics:
+    """Store of the fetch latency and payload size of each news source and
+    keyword, kept in a small json file in the persistent 'latency' cache
+    directory.
+
+    Each source's statistics are exponentially weighted moving averages of
+    its latency, in seconds, and payload size, in bytes, over the runs that
+    fetched it. They are keyed like the headline watermarks, e.g.
+    'source:wired' or 'keyword:cancer'.
+
+    The statistics are used to order a concurrent fetch
+    longest-processing-time-first (see schedule): starting the slowest
+    fetches first keeps one of them from starting last, after the quick
+    ones are done, and holding up the whole fetch on its own.
+
+    # Arguments:
+        :param path: path to the json file of the store.
+        :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def shared(cls):
+        """Returns the statistics of every news source and keyword of the
+        pipelines."""
+
+        cache_dir = c.FileStorage.get_cache_directory('latency')
+
+        return cls(os.path.join(cache_dir, "news_sources.json"))
+
+    def read(self) -> dict:
+        """Returns the recorded statistics, keyed by source or keyword key;
+        empty if none were recorded yet."""
+
+        if not os.path.isfile(self.path):
+            return {}
+
+        with open(self.path, "r") as inputfile:
+            return json.load(inputfile)
+
+    def schedule(self, keys) -> list:
+        """Returns the keys of the sources and keywords to fetch, ordered
+        by their expected latency - the slowest, then the largest, first.
+
+        Sources without statistics are expected to take as long as the
+        average recorded source, and keep their relative order otherwise.
+
+        # Arguments:
+            :param keys: keys of the sources and keywords to fetch.
+            :type keys: list
+        """
+
+        statistics = self.read()
+        known = [statistics[key] for key in keys if key in statistics]
+        if not known:
+            return list(keys)
+
+        average = {'latency': sum(stat['latency'] for stat in known) /
+                   len(known),
+                   'bytes': sum(stat['bytes'] for stat in known) /
+                   len(known)}
+
+        def expected(key):
+            stat = statistics.get(key, average)
+            return (stat['latency'], stat['bytes'])
+
+        # sorted() is stable, so ties keep the order they were given in
+        return sorted(keys, key=expected, reverse=True)
+
+    def record(self, observations):
+        """Folds the latency and payload size of the sources fetched by a
+        run into their statistics.
+
+        # Arguments:
+            :param observations: (latency, payload size) tuple of each
+                fetched source, keyed by source or keyword key.
+            :type observations: dict
+        """
+
+        if not observations:
+            return
+
+        with open(self.path + ".lock", 'a') as lockfile:
+            if fcntl:
+                fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+            statistics = self.read()
+            for key, (latency, size) in observations.items():
+                stat = statistics.get(key)
+                if stat is None:
+                    stat = {'latency': latency, 'bytes': size, 'samples': 0}
+                else:
+                    stat['latency'] += STATISTICS_SMOOTHING * (
+                        latency - stat['latency'])
+                    stat['bytes'] += STATISTICS_SMOOTHING * (
+                        size - stat['bytes'])
+                stat['samples'] += 1
+                statistics[key] = stat
+
+            with open(self.path + ".tmp", 'w+') as outputfile:
+                json.dump(statistics, outputfile, indent=4, sort_keys=True)
+            os.replace(self.path + ".tmp", self.path)
+
+        log.info("Recorded fetch statistics of {} sources".format(
+                 len(observations)))
+
+    @classmethod
+    def observe(cls, response):
+        """Returns the (latency, payload size) of a successful response, or
+        None for a failed request.
+
+        # Arguments:
+            :param response: the response of the request, or the exception
+                it failed with.
+            :type response: requests.Response
+        """
+
+        if getattr(response, 'status_code', None) != 200:
+            return None
+
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is None:
+            return None
+
+        return (elapsed.total_seconds(), len(response.content or b''))
@@ -1,2 +1,7 @@
-"""directory imports for the FileStorage class."""
+"""directory imports for the FileStorage, HeadlineWatermarks,
+JsonStreamValidator and JsonArrayReader classes."""
 from .filestorage_operations import *
+
+from .headline_watermarks import *
+
+from .json_streaming import *
@@ -5,10 +5,10 @@ tempoary datastores and storing retrieved data in them, in the DAG pipelines.
 """
 
 import errno
+import hashlib
 import json
 import logging
 import os
-import requests
 import shutil
 import time
 
@@ -16,6 +16,12 @@ from airflow.models import Variable
 
 import challenge as c
 
+try:
+    import fcntl
+except ImportError:
+    # fcntl is unavailable on Windows, where manifest updates are unlocked.
+    fcntl = None
+
 # ensures that function outputs and any errors encountered
 # are logged to the Airflow console
 log = logging.getLogger(__name__)
@@ -24,6 +30,17 @@ log = logging.getLogger(__name__)
 # airflow creates a home environment variable pointing to the location
 HOME_DIRECTORY = str(os.environ['HOME'])
 
+# name of the manifest each pipeline stage publishes into a datastore folder
+# once a file in it has been completely written. Downstream tasks read it,
+# instead of waiting on a FileSensor, to find their inputs. It deliberately
+# has no '.json' extension, so it is never mistaken for news data.
+MANIFEST_FILENAME = "_MANIFEST"
+
+# name of the ledger of news sources whose headlines could not be retrieved,
+# written into the 'headlines' folder alongside the headline files. Like the
+# manifest, it has no '.json' extension so it is never read as headlines.
+FAILURE_LEDGER_FILENAME = "_FAILED_SOURCES"
+
 
 class FileStorage:
     """Handles functionality for news data storage on the local filesystem."""
@@ -41,6 +58,7 @@ class FileStorage:
         pass
 
     @classmethod
+    @c.instrumented("storage")
     def create_storage(cls, **context):
         """Creates tempoary data storage for the current DAG pipeline.
 
@@ -155,11 +173,13 @@ class FileStorage:
             return False
 
     @classmethod
+    @c.instrumented("storage")
     def write_json_to_file(cls,
                            data,
                            path_to_dir,
                            filename=None,
-                           create_date=None):
+                           create_date=None,
+                           watermarks=None):
         """Writes given json news data to an existing directory.
 
         Perfoms checks if the json data and directory are valid, otherwise
@@ -177,6 +197,10 @@ class FileStorage:
             :type filename: str
             :param create_date: date the file was created.
             :type create_date: str
+            :param watermarks: the new watermarks of the news sources or
+                keywords the file holds headlines of, published with it in
+                the manifest (see HeadlineWatermarks).
+            :type watermarks: dict
 
         # Raises:
             OSError: if the directory path given does not exist.
@@ -226,16 +250,281 @@ class FileStorage:
         fname = str(create_date) + "_" + str(filename) + ".json"
         fpath = os.path.join(path_to_dir, fname)
 
-        # write the json string data to file.
+        # write the json string data to a temporary file first and move it
+        # into place, so that a partially written file is never visible to
+        # the downstream tasks.
         try:
-            with open(fpath, 'w+') as outputfile:
+            with open(fpath + ".tmp", 'w+') as outputfile:
                 json.dump(data, outputfile, indent=4)
-            # the file-write was successful so return a True status
-            return True
+            os.replace(fpath + ".tmp", fpath)
         except IOError:
             raise IOError("Error in Reading Data - IOError")
 
+        # number of news records (articles or sources) the file holds
+        records = None
+        if isinstance(data, dict):
+            for key in ("articles", "sources"):
+                if isinstance(data.get(key), list):
+                    records = len(data[key])
+                    break
+
+        # signal the completed file to the downstream tasks
+        cls.publish_manifest_entry(path_to_dir, fname, records, watermarks)
+
+        # the file-write was successful so return a True status
+        return True
+
+    @classmethod
+    def write_response_to_file(cls,
+                               response,
+                               path_to_dir,
+                               filename=None,
+                               create_date=None):
+        """Writes the json body of a News API response to an existing
+        directory, as it is read.
+
+        Unlike write_json_to_file(), the body is never parsed into Python
+        objects: it is written to the file chunk by chunk, as
+        response.iter_content() yields it, and validated on the way (see
+        JsonStreamValidator). This keeps the memory used by large responses
+        down to a chunk beyond the body itself - or to a chunk alone, for a
+        response requested with stream=True. The file is named and
+        published in the manifest like those of write_json_to_file().
+
+        # Arguments:
+            :param response: the response whose body to write.
+            :type response: requests.Response
+            :param path_to_dir: folder path where the json file will be
+                stored in.
+            :type path_to_dir: str
+            :param filename: the name of the created json file.
+            :type filename: str
+            :param create_date: date the file was created.
+            :type create_date: str
+
+        # Raises:
+            OSError: if the directory path given does not exist.
+            ValueError: if the body of the response is not valid json.
+        """
+
+        log.info("Running write_response_to_file method")
+
+        if not os.path.isdir(path_to_dir):
+            raise OSError("Directory {} does not exist".format(path_to_dir))
+        if not create_date:
+            create_date = time.strftime("%Y-%m-%d")
+        if not filename:
+            filename = "sample"
+
+        fname = str(create_date) + "_" + str(filename) + ".json"
+        fpath = os.path.join(path_to_dir, fname)
+
+        # write and validate the body chunk by chunk, into a temporary file
+        # which is only moved into place once the whole body is valid.
+        validator = c.JsonStreamValidator()
+
+        # a body already read was counted when the response was received
+        # (see record_response); one requested with stream=True is only
+        # read here, so it is counted as it streams by.
+        streamed = not isinstance(getattr(response, "_content", None), bytes)
+        try:
+            with open(fpath + ".tmp", 'wb') as outputfile:
+                for chunk in response.iter_content(c.STREAM_CHUNK_SIZE):
+                    validator.feed(chunk)
+                    outputfile.write(chunk)
+                    if streamed:
+                        c.record_bytes_read(len(chunk))
+            validator.close()
+        except ValueError as err:
+            os.remove(fpath + ".tmp")
+            raise ValueError("Error Decoding - Data is not Valid JSON: {}"
+                             .format(err))
+        os.replace(fpath + ".tmp", fpath)
+
+        # signal the completed file to the downstream tasks
+        cls.publish_manifest_entry(path_to_dir, fname, validator.records)
+
+        return True
+
+    @classmethod
+    def publish_manifest_entry(cls,
+                               directory,
+                               filename,
+                               records=None,
+                               watermarks=None):
+        """Records a completely written file in a datastore's manifest.
+
+        Each pipeline stage publishes the files it writes in the manifest of
+        the datastore folder they are in, and the next stage reads its input
+        files straight from it rather than listing the directory. A file is
+        only listed once it has been fully written, so the manifest is also
+        the completion signal between the tasks.
+
+        Each entry holds the file's name, size, sha256 checksum and the
+        number of records (articles, sources or csv rows) it holds, and the
+        new watermarks of the headlines it holds, if any. Entries
+        are keyed by filename - publishing a file again replaces its entry -
+        so each file is listed, and processed downstream, exactly once. The
+        manifest also keeps the stage totals and the time of its first and
+        last entries, from which `manifest_stats` derives the throughput.
+
+        Several tasks can write into the same datastore folder in parallel
+        (e.g. the four keyword tasks of the 'tempus_bonus_challenge_dag'),
+        so the read-modify-write of the manifest is done under a file lock
+        and the new manifest is moved into place atomically.
+
+        # Arguments:
+            :param directory: path to the datastore folder the file is in.
+            :type directory: str
+            :param filename: name of the file, in the folder, to record.
+            :type filename: str
+            :param records: number of news records held in the file.
+            :type records: int
+            :param watermarks: the new watermarks of the news sources or
+                keywords the file holds headlines of.
+            :type watermarks: dict
+
+        # Raises:
+            OSError: if the directory path given does not exist.
+        """
+
+        log.info("Running publish_manifest_entry method")
+
+        if not os.path.isdir(directory):
+            raise OSError("Directory {} does not exist".format(directory))
+
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+
+        # size and checksum of the published file
+        file_path = os.path.join(directory, filename)
+        checksum = hashlib.sha256()
+        with open(file_path, "rb") as inputfile:
+            for chunk in iter(lambda: inputfile.read(65536), b""):
+                checksum.update(chunk)
+
+        entry = {"name": filename,
+                 "size": os.path.getsize(file_path),
+                 "sha256": checksum.hexdigest(),
+                 "records": records}
+        if watermarks:
+            entry["watermarks"] = watermarks
+
+        # count the file towards the instrumented operation that wrote it
+        c.record_bytes_written(entry["size"])
+        c.record_rows(records or 0)
+        if filename.endswith(".csv"):
+            c.MetricsEmitter.shared().increment(c.CSV_ROWS_WRITTEN,
+                                                records or 0)
+
+        with open(manifest_path + ".lock", 'a') as lockfile:
+            if fcntl:
+                fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+            try:
+                manifest = cls.read_manifest(directory)
+            except FileNotFoundError:
+                manifest = {"directory": directory,
+                            "started_at": time.time(),
+                            "files": []}
+
+            files = [item for item in manifest["files"]
+                     if item["name"] != filename]
+            files.append(entry)
+
+            manifest["files"] = files
+            manifest["updated_at"] = time.time()
+            manifest["total_bytes"] = sum(item["size"] for item in files)
+            manifest["total_records"] = sum(item["records"] or 0
+                                            for item in files)
+
+            with open(manifest_path + ".tmp", 'w+') as outputfile:
+                json.dump(manifest, outputfile, indent=4)
+            os.replace(manifest_path + ".tmp", manifest_path)
+
+        return manifest
+
+    @classmethod
+    def read_manifest(cls, directory):
+        """Returns the manifest published in a given datastore folder.
+
+        # Arguments:
+            :param directory: path to the datastore folder.
+            :type directory: str
+
+        # Raises:
+            FileNotFoundError: if no manifest has been published in the
+                folder, i.e. the upstream task has not written any files.
+        """
+
+        log.info("Running read_manifest method")
+
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        if not os.path.isfile(manifest_path):
+            raise FileNotFoundError("No manifest in {}".format(directory))
+
+        with open(manifest_path, "r") as inputfile:
+            return json.load(inputfile)
+
     @classmethod
+    def manifest_filenames(cls, directory, extension=None):
+        """Returns the names of the files published in a datastore folder's
+        manifest, in the order they were published.
+
+        # Arguments:
+            :param directory: path to the datastore folder.
+            :type directory: str
+            :param extension: only return files with this extension,
+                e.g. '.json'. All files are returned if left blank.
+            :type extension: str
+
+        # Raises:
+            FileNotFoundError: if no manifest has been published in the
+                folder.
+        """
+
+        log.info("Running manifest_filenames method")
+
+        manifest = cls.read_manifest(directory)
+
+        # log the throughput of the stage that wrote these files, now that
+        # the next stage is about to consume them
+        log.info("Manifest Stats: {}".format(cls.manifest_stats(manifest)))
+
+        names = [item["name"] for item in manifest["files"]]
+        if extension:
+            names = [name for name in names if name.endswith(extension)]
+
+        return names
+
+    @classmethod
+    def manifest_stats(cls, manifest):
+        """Returns the file, byte and record totals and throughput of the
+        pipeline stage that published a given manifest.
+
+        # Arguments:
+            :param manifest: manifest returned by `read_manifest`.
+            :type manifest: dict
+        """
+
+        elapsed = manifest["updated_at"] - manifest["started_at"]
+
+        stats = {"files": len(manifest["files"]),
+                 "bytes": manifest["total_bytes"],
+                 "records": manifest["total_records"],
+                 "seconds": round(elapsed, 3),
+                 "bytes_per_second": None,
+                 "records_per_second": None}
+
+        # a stage that published a single file has no measurable duration
+        if elapsed > 0:
+            stats["bytes_per_second"] = round(stats["bytes"] / elapsed, 3)
+            stats["records_per_second"] = round(stats["records"] / elapsed,
+                                                3)
+
+        return stats
+
+    @classmethod
+    @c.instrumented("storage")
     def json_to_dataframe_reader(cls, json_file, reader_func=None):
         """Reads in a news json file and returns a structure suitable
         for a Pandas DataFrame.
@@ -268,6 +557,7 @@ class FileStorage:
         try:
             with open(json_file, "r") as inputfile:
                 reader_data = reader_func(inputfile)
+            c.record_file_read(json_file)
 
         except IOError as err:
             # log the error in airflow and reraise to the caller
@@ -283,14 +573,35 @@ class FileStorage:
         return reader_data
 
     @classmethod
+    @c.instrumented("storage")
     def write_source_headlines_to_file(cls,
                                        source_ids,
                                        source_names,
                                        headline_dir,
                                        api_key,
-                                       headline_func=None):
+                                       headline_func=None,
+                                       max_attempts=None,
+                                       sleep=None,
+                                       watermarks=None):
         """Writes extracted news source headline json data to an existing directory.
 
+        Each source's headlines are requested with per-source retries (see
+        NetworkOperations.get_source_headlines_with_retry), so a flaky
+        source does not fail the whole task. Sources that still fail are
+        skipped, and recorded in a failure ledger in the headlines
+        directory (see FAILURE_LEDGER_FILENAME). Sources whose paging was
+        cut short by a failing page keep the articles already fetched, and
+        are recorded in the ledger as partial.
+
+        Given the watermarks of the pipeline, only the articles each source
+        published at or after its watermark are written (see
+        HeadlineWatermarks).
+
+        Once the run-level deadline in force (see fetch_deadline) has
+        passed, the remaining sources are not requested. They are recorded
+        in the failure ledger, which is flagged as cut short by the
+        deadline, and the headlines fetched in time are kept.
+
         # Arguments:
             :param source_ids: list of news source id tags.
             :type source_ids: list
@@ -303,7 +614,16 @@ class FileStorage:
                 of a source's top headlines remotely.
             :type api_key: str
             :param headline_func: function to use for extracting headlines.
+                Defaults to NetworkOperations.get_paged_source_headlines(),
+                which retrieves every page of a source's headlines.
             :type headline_func: function
+            :param max_attempts: the number of requests made at most for
+                each source.
+            :type max_attempts: int
+            :param sleep: function used to wait between a source's retries.
+            :type sleep: function
+            :param watermarks: the watermark store of the pipeline.
+            :type watermarks: HeadlineWatermarks
 
         # Raises:
             ValueError: if any of the arguments are left blank.
@@ -319,7 +639,8 @@ class FileStorage:
         to break in order to preserve conciseness, practicality, and readability.
         """
         if not headline_func:
-            headline_func = c.NetworkOperations.get_source_headlines
+            headline_func = c.NetworkOperations.get_paged_source_headlines
+        retry_func = c.NetworkOperations.get_source_headlines_with_retry
 
         # error check for non-set arguments
         ### I would specify which argument(s) is/are blank.
@@ -332,28 +653,104 @@ class FileStorage:
         if not api_key:
             raise ValueError("Argument '{}' is blank".format(api_key))
 
+        # sources whose headlines could not be retrieved, even after retries
+        failures = []
+        written = 0
+        deadline = c.active_deadline()
+        deadline_exceeded = False
+
         # get the headlines of each source
         for index, value in enumerate(source_ids):
-            headlines_obj = headline_func(value, api_key=api_key)
-            if headlines_obj.status_code == requests.codes.ok:
-                headline_json = headlines_obj.json()
-
-                # descriptive name of the headline file.
-                # use the source id rather than source name, since
-                # (after testing) it was discovered that strange formattings
-                # like 'Reddit /r/all' get read by the open() like a directory
-                # path rather than a filename, and hence requires another
-                # separate parsing all together.
-                # Is of the form  'source_id' + '_headlines'
-                fname = str(value) + "_headlines"
-
-                # write this json object to the headlines directory
-                cls.write_json_to_file(headline_json,
-                                       headline_dir,
-                                       fname)
+            if deadline is not None and deadline.expired():
+                # record the source as failed, without requesting it
+                deadline_exceeded = True
+                result = {'response': None,
+                          'attempts': 0,
+                          'error': "Run deadline of {}s exceeded".format(
+                              deadline.seconds)}
+            else:
+                result = retry_func(value,
+                                    api_key,
+                                    headline_func=headline_func,
+                                    max_attempts=max_attempts,
+                                    sleep=sleep)
+            headlines_obj = result['response']
+
+            if result['error']:
+                status_code = None
+                if headlines_obj is not None:
+                    status_code = headlines_obj.status_code
+                source_name = None
+                if index < len(source_names):
+                    source_name = source_names[index]
+                failures.append({'source_id': value,
+                                 'source_name': source_name,
+                                 'attempts': result['attempts'],
+                                 'status_code': status_code,
+                                 'error': result['error']})
+                continue
+
+            # the articles of a source whose paging stopped at a failing
+            # page are written, and the source recorded as partial
+            partial_error = getattr(headlines_obj, 'partial_error', None)
+            if isinstance(partial_error, str):
+                source_name = None
+                if index < len(source_names):
+                    source_name = source_names[index]
+                failures.append({'source_id': value,
+                                 'source_name': source_name,
+                                 'attempts': result['attempts'],
+                                 'status_code': headlines_obj.status_code,
+                                 'error': partial_error,
+                                 'partial': True})
+
+            # descriptive name of the headline file.
+            # use the source id rather than source name, since
+            # (after testing) it was discovered that strange formattings
+            # like 'Reddit /r/all' get read by the open() like a directory
+            # path rather than a filename, and hence requires another
+            # separate parsing all together.
+            # Is of the form  'source_id' + '_headlines'
+            fname = str(value) + "_headlines"
+
+            # without watermarks, the body is streamed to the file as it is
+            if not watermarks and c.is_streamable(headlines_obj):
+                cls.write_response_to_file(headlines_obj, headline_dir, fname)
+                written += 1
+                continue
+
+            headline_json = headlines_obj.json()
+
+            # keep only the articles published at or after the source's
+            # watermark
+            new_watermarks = None
+            if watermarks:
+                key = watermarks.source_key(value)
+                headline_json, watermark = watermarks.filter_headlines(
+                    key, headline_json)
+                if watermark:
+                    new_watermarks = {key: watermark}
+
+            # write this json object to the headlines directory
+            cls.write_json_to_file(headline_json,
+                                   headline_dir,
+                                   fname,
+                                   watermarks=new_watermarks)
+            written += 1
+
+        if deadline_exceeded:
+            skipped = sum(1 for fail in failures if not fail['attempts'])
+            log.info("Run deadline exceeded: headlines of {} of {} sources "
+                     "were not requested".format(skipped, len(source_ids)))
+            c.MetricsEmitter.shared().increment(c.SOURCES_PAST_DEADLINE,
+                                                skipped)
+
+        cls.write_failure_ledger(headline_dir,
+                                 failures,
+                                 deadline_exceeded=deadline_exceeded)
 
         # return with a verification that these operations succeeded
-        if os.listdir(headline_dir):
+        if written:
             # airflow logging
             log.info("Files in Headlines Directory: ")
             log.info(os.listdir(headline_dir))
@@ -362,6 +759,92 @@ class FileStorage:
         else:
             return False
 
+    @classmethod
+    def write_failure_ledger(cls, directory, failures,
+                             deadline_exceeded=False):
+        """Records the news sources whose headlines could not be retrieved.
+
+        The ledger is a json file named FAILURE_LEDGER_FILENAME in the given
+        directory, listing each failed source with the number of attempts
+        made and the last error seen. It is removed when nothing failed, so
+        its presence alone signals a partial run.
+
+        # Arguments:
+            :param directory: the headlines directory the ledger belongs to.
+            :type directory: str
+            :param failures: list of dictionaries describing each failure.
+            :type failures: list
+            :param deadline_exceeded: whether the run was cut short by its
+                deadline.
+            :type deadline_exceeded: bool
+        """
+
+        log.info("Running write_failure_ledger method")
+
+        ledger_path = os.path.join(directory, FAILURE_LEDGER_FILENAME)
+
+        if not failures:
+            if os.path.isfile(ledger_path):
+                os.remove(ledger_path)
+            return
+
+        log.info("Headlines of {} sources could not be retrieved: {}".format(
+                 len(failures), [fail['source_id'] for fail in failures]))
+
+        with open(ledger_path + ".tmp", "w") as outputfile:
+            json.dump({'failures': failures,
+                       'deadline_exceeded': deadline_exceeded,
+                       'recorded_at': time.time()}, outputfile, indent=4)
+        os.replace(ledger_path + ".tmp", ledger_path)
+
+    @classmethod
+    def read_failure_ledger(cls, directory) -> list:
+        """Returns the news sources recorded as failed in a directory's
+        failure ledger, or an empty list if none failed.
+
+        # Arguments:
+            :param directory: the headlines directory the ledger belongs to.
+            :type directory: str
+        """
+
+        log.info("Running read_failure_ledger method")
+
+        ledger_path = os.path.join(directory, FAILURE_LEDGER_FILENAME)
+        if not os.path.isfile(ledger_path):
+            return []
+
+        with open(ledger_path, "r") as inputfile:
+            return json.load(inputfile)['failures']
+
+    @classmethod
+    def get_cache_directory(cls, cache_name: str):
+        """Returns the path to a named cache directory, creating it if needed.
+
+        Unlike the per-pipeline 'news', 'headlines' and 'csv' datastores,
+        which are recreated on every pipeline run, the cache directories
+        persist between runs.
+
+        # Arguments:
+            :param cache_name: the name of the cache e.g. 'http'.
+            :type cache_name: str
+
+        # Raises:
+            ValueError: if the cache name is left blank.
+        """
+
+        log.info("Running get_cache_directory method")
+
+        if not cache_name:
+            raise ValueError("Argument cache_name cannot be left blank")
+
+        cache_path = os.path.join(HOME_DIRECTORY,
+                                  'tempdata',
+                                  'cache',
+                                  cache_name)
+        os.makedirs(cache_path, exist_ok=True)
+
+        return cache_path
+
     @classmethod
     def get_news_directory(cls, pipeline_name: str):
         """Returns the news directory path for a given DAG pipeline.
@@ -0,0 +1,230 @@
+"""Tempus challenge  - Operations and Functions: Headline Watermarks
+
+Describes the code definitions of the high-water marks - the latest article
+publication time seen - of each news source and keyword, persisted between
+runs of the DAG pipelines so that each run only fetches newer articles.
+"""
+
+
+import datetime
+import json
+import logging
+import os
+import re
+
+import challenge as c
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is unavailable on Windows, where watermark updates are unlocked.
+    fcntl = None
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# environment variable turning watermark-based incremental fetching on for
+# both pipelines, e.g. FETCH_WATERMARKS=1
+WATERMARKS_ENV_VARIABLE = "FETCH_WATERMARKS"
+
+# format the watermarks are stored in, as the News API's publishedAt
+WATERMARK_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# publishedAt timestamps, e.g. '2018-10-11T23:33:03Z',
+# '2018-10-11T23:33:03.123Z' or '2018-10-11T23:33:03+00:00'
+PUBLISHED_AT_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:\.\d+)?"
+    r"(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def parse_published_at(value):
+    """returns the UTC datetime of a publishedAt timestamp, or None if it is
+    missing or cannot be parsed. Timestamps without an offset are taken to
+    be in UTC."""
+
+    if not isinstance(value, str):
+        return None
+
+    match = PUBLISHED_AT_PATTERN.match(value.strip())
+    if not match:
+        return None
+
+    date, time_of_day, offset = match.groups()
+    moment = datetime.datetime.strptime(date + " " + time_of_day,
+                                        "%Y-%m-%d %H:%M:%S")
+
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        digits = offset[1:].replace(":", "")
+        moment -= sign * datetime.timedelta(hours=int(digits[:2]),
+                                            minutes=int(digits[2:]))
+
+    return moment
+
+
+class HeadlineWatermarks:
+    """Store of the watermark of each news source and keyword of a pipeline.
+
+    The News API's top-headlines endpoint, which both pipelines query, has
+    no date filter; so a source's or keyword's articles are filtered once
+    fetched, keeping only those published at or after its watermark (see
+    filter_headlines), before they are written to the 'headlines' folder.
+    Articles without a publication time are always kept. Articles published
+    in the same second as the watermark are kept too, as some may not have
+    been delivered yet; those that were are delivered again, unless the
+    seen article index leaves them out (see seen_article_index).
+
+    The new watermark of each headlines file is published in the folder's
+    manifest alongside the file, and only committed to the store by the
+    transformation task once it succeeds (see commit_manifest). A failed or
+    retried run thus fetches the same articles again, rather than losing
+    them.
+
+    The watermarks are kept in a small json file in the persistent
+    'watermarks' cache directory.
+
+    # Arguments:
+        :param path: path to the json file of the store.
+        :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def for_pipeline(cls, pipeline_name):
+        """Returns the watermark store of a DAG pipeline.
+
+        # Arguments:
+            :param pipeline_name: the name of the DAG pipeline.
+            :type pipeline_name: str
+        """
+
+        cache_dir = c.FileStorage.get_cache_directory('watermarks')
+
+        return cls(os.path.join(cache_dir, pipeline_name + ".json"))
+
+    @classmethod
+    def requested(cls) -> bool:
+        """returns whether watermark-based fetching is turned on, by the
+        WATERMARKS_ENV_VARIABLE environment variable."""
+
+        return c.is_truthy(os.environ.get(WATERMARKS_ENV_VARIABLE, ""))
+
+    @staticmethod
+    def source_key(source_id) -> str:
+        """returns the watermark key of a news source."""
+        return "source:" + str(source_id)
+
+    @staticmethod
+    def keyword_key(keyword) -> str:
+        """returns the watermark key of a query keyword."""
+        return "keyword:" + str(keyword)
+
+    def read(self) -> dict:
+        """Returns the committed watermarks, keyed by source or keyword key;
+        empty if none were committed yet."""
+
+        if not os.path.isfile(self.path):
+            return {}
+
+        with open(self.path, "r") as inputfile:
+            return json.load(inputfile)
+
+    def filter_headlines(self, key, headlines):
+        """Returns a top-headlines json keeping only the articles published
+        at or after the committed watermark of a source or keyword, and the
+        new watermark: the latest publication time among its articles and the
+        committed watermark (None if there is neither).
+
+        # Arguments:
+            :param key: the watermark key of the source or keyword.
+            :type key: str
+            :param headlines: the top-headlines json of the source or
+                keyword.
+            :type headlines: dict
+        """
+
+        articles = headlines.get('articles') if isinstance(headlines,
+                                                           dict) else None
+        if not isinstance(articles, list):
+            return headlines, None
+
+        watermark = parse_published_at(self.read().get(key))
+        latest = watermark
+
+        newer = []
+        for article in articles:
+            published = parse_published_at(article.get('publishedAt'))
+            if published is None or watermark is None or \
+                    published >= watermark:
+                newer.append(article)
+            if published is not None and (latest is None or
+                                          published > latest):
+                latest = published
+
+        skipped = len(articles) - len(newer)
+        if skipped:
+            log.info("Skipped {} articles of {} published before {}"
+                     .format(skipped, key, watermark))
+
+        filtered = dict(headlines)
+        filtered['articles'] = newer
+
+        if latest is None:
+            return filtered, None
+
+        return filtered, latest.strftime(WATERMARK_FORMAT)
+
+    def commit(self, watermarks):
+        """Advances the committed watermarks of the given sources and
+        keywords; a watermark never moves back.
+
+        # Arguments:
+            :param watermarks: the new watermarks, keyed by source or
+                keyword key.
+            :type watermarks: dict
+        """
+
+        if not watermarks:
+            return
+
+        with open(self.path + ".lock", 'a') as lockfile:
+            if fcntl:
+                fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+            committed = self.read()
+            for key, value in watermarks.items():
+                current = parse_published_at(committed.get(key))
+                candidate = parse_published_at(value)
+                if candidate is not None and (current is None or
+                                              candidate > current):
+                    committed[key] = value
+
+            with open(self.path + ".tmp", 'w+') as outputfile:
+                json.dump(committed, outputfile, indent=4, sort_keys=True)
+            os.replace(self.path + ".tmp", self.path)
+
+        log.info("Committed {} watermarks to {}".format(len(watermarks),
+                                                        self.path))
+
+    def commit_manifest(self, directory):
+        """Commits the watermarks published alongside the headlines files in
+        a datastore folder's manifest.
+
+        # Arguments:
+            :param directory: path to the 'headlines' folder.
+            :type directory: str
+        """
+
+        try:
+            manifest = c.FileStorage.read_manifest(directory)
+        except FileNotFoundError:
+            return
+
+        watermarks = {}
+        for entry in manifest["files"]:
+            watermarks.update(entry.get("watermarks") or {})
+
+        self.commit(watermarks)
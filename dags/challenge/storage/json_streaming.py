@@ -0,0 +1,287 @@
+"""Tempus challenge  - Operations and Functions: Streamed JSON Responses
+
+Describes the code definitions used to write the json body of a News API
+response to the datastore as it is read, chunk by chunk, validating it on
+the way - rather than parsing it into Python objects and serializing it
+back out - and to read the articles of a stored json file back one at a
+time.
+"""
+
+
+import json
+import logging
+import re
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# number of bytes of a response body read and written at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# number of bytes at the start of a response body kept for reading its
+# top-level fields, e.g. the News API's 'status' and 'totalResults', which
+# come before its 'articles' or 'sources'.
+HEAD_SIZE = 4096
+
+# json tokens the structure of a document is checked with: complete
+# strings, brackets, and the opening quote of a string cut off at the end
+# of a chunk (matched last, so only when the string is incomplete).
+STRUCTURE_PATTERN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]|"')
+
+# a top-level field of a json object with a string, number, boolean or null
+# value, e.g. '"totalResults": 1234'
+FIELD_PATTERN = (r'"{}"\s*:\s*'
+                 r'("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|true|false|null)')
+
+# opening and closing brackets of json objects and arrays
+CLOSING_BRACKETS = {ord('}'): ord('{'), ord(']'): ord('[')}
+
+# whitespace between json tokens
+WHITESPACE_PATTERN = re.compile(r'[ \t\n\r]*')
+
+
+def is_streamable(response) -> bool:
+    """returns whether the body of a response can be streamed: it is a
+    requests.Response whose body is either already read into memory or
+    still to be read from its connection (requested with stream=True).
+
+    Response.iter_content() only replays a body held in memory once it is
+    marked as consumed, and reads the connection otherwise, so a response
+    built by hand with a body but no connection is not streamable. Neither
+    are stand-ins for responses, e.g. in tests."""
+
+    content = getattr(response, "_content", None)
+    if isinstance(content, bytes):
+        return getattr(response, "_content_consumed", False) is True
+    return content is False and getattr(response, "raw", None) is not None
+
+
+def peek_json_fields(head, names) -> dict:
+    """Returns the values of the top-level fields of a json object that are
+    found at the start of its document.
+
+    # Arguments:
+        :param head: the start of the json document.
+        :type head: bytes
+        :param names: the names of the fields to read.
+        :type names: list
+    """
+
+    text = head.decode("utf-8", errors="ignore")
+
+    fields = {}
+    for name in names:
+        match = re.search(FIELD_PATTERN.format(re.escape(name)), text)
+        if match:
+            fields[name] = json.loads(match.group(1))
+
+    return fields
+
+
+class JsonStreamValidator:
+    """Checks the structure of a json document fed to it chunk by chunk.
+
+    The document must hold a single object or array, with every bracket
+    matched and every string terminated. Scalar values are not checked, so
+    the validation stays cheap enough to run on the whole body of every
+    response. It also counts the records - the objects in the top-level
+    object's array, i.e. the 'articles' or 'sources' - and keeps the head
+    of the document for reading its top-level fields (see
+    peek_json_fields).
+    """
+
+    def __init__(self):
+        self.stack = bytearray()
+        self.carry = b""
+        self.started = False
+        self.finished = False
+        self.records = 0
+        self.head = b""
+
+    def feed(self, chunk):
+        """Checks the next chunk of the document.
+
+        # Arguments:
+            :param chunk: the next bytes of the document.
+            :type chunk: bytes
+
+        # Raises:
+            ValueError: if the document is not valid json.
+        """
+
+        if len(self.head) < HEAD_SIZE:
+            self.head += chunk[:HEAD_SIZE - len(self.head)]
+
+        buffer = self.carry + chunk
+        self.carry = b""
+
+        if not self.started:
+            stripped = buffer.lstrip()
+            if not stripped:
+                return
+            if stripped[:1] not in (b"{", b"["):
+                raise ValueError("Document is not a json object or array")
+            self.started = True
+
+        for match in STRUCTURE_PATTERN.finditer(buffer):
+            token = match.group()
+            if token == b'"':
+                # an incomplete string; check it again with the next chunk
+                self.carry = buffer[match.start():]
+                return
+            if self.finished:
+                raise ValueError("Unexpected data after the json document")
+            if token[0] == ord('"'):
+                continue
+
+            bracket = token[0]
+            if bracket in CLOSING_BRACKETS:
+                if not self.stack or \
+                        self.stack[-1] != CLOSING_BRACKETS[bracket]:
+                    raise ValueError("Unmatched '{}' in json document"
+                                     .format(chr(bracket)))
+                self.stack.pop()
+                self.finished = not self.stack
+            else:
+                if bracket == ord('{') and self.stack == b"{[":
+                    self.records += 1
+                self.stack.append(bracket)
+
+    def close(self):
+        """Checks that the document fed so far is complete.
+
+        # Raises:
+            ValueError: if the document is not valid json.
+        """
+
+        if self.carry or not self.finished:
+            raise ValueError("Incomplete json document")
+
+
+class JsonArrayReader:
+    """Iterates over the items of an array field of a json file's top-level
+    object - e.g. the 'articles' of a top-headlines json - parsing them one
+    at a time as the file is read.
+
+    Only the item being parsed and a chunk of the file are held in memory,
+    rather than the whole document, so files of any size are read with
+    bounded memory. The other top-level fields are parsed and skipped, and
+    nothing after the array is read. Nothing is yielded if the object has
+    no such field.
+
+    # Arguments:
+        :param json_file: path to the json file.
+        :type json_file: str
+        :param name: name of the array field.
+        :type name: str
+        :param chunk_size: number of characters read at a time.
+            Defaults to STREAM_CHUNK_SIZE.
+        :type chunk_size: int
+
+    # Raises:
+        ValueError: while iterating, if the file is not valid json.
+    """
+
+    def __init__(self, json_file, name, chunk_size=None):
+        if not chunk_size:
+            chunk_size = STREAM_CHUNK_SIZE
+
+        self.json_file = json_file
+        self.name = name
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.inputfile = None
+        self.buffer = ""
+        self.position = 0
+
+    def __iter__(self):
+        with open(self.json_file, "r", encoding="utf-8") as inputfile:
+            self.inputfile = inputfile
+            self.buffer = ""
+            self.position = 0
+
+            self.consume("{")
+            if self.next_char() == "}":
+                return
+
+            while True:
+                key = self.decode()
+                if not isinstance(key, str):
+                    raise ValueError("Expected a field name in json object")
+                self.consume(":")
+
+                if key == self.name:
+                    yield from self.array_items()
+                    return
+
+                # a field before the array, parsed and dropped
+                self.decode()
+                if self.consume(",}") == "}":
+                    return
+
+    def array_items(self):
+        """yields the items of the array starting at the current position."""
+
+        self.consume("[")
+        if self.next_char() == "]":
+            return
+
+        while True:
+            yield self.decode()
+            if self.consume(",]") == "]":
+                return
+
+    def read(self) -> bool:
+        """reads the next chunk of the file into the buffer, dropping what
+        was already parsed; returns False at the end of the file."""
+
+        chunk = self.inputfile.read(self.chunk_size)
+        if not chunk:
+            return False
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def next_char(self) -> str:
+        """returns the next character after any whitespace, reading more of
+        the file as needed; empty at the end of the file."""
+
+        while True:
+            match = WHITESPACE_PATTERN.match(self.buffer, self.position)
+            self.position = match.end()
+            if self.position < len(self.buffer) or not self.read():
+                return self.buffer[self.position:self.position + 1]
+
+    def consume(self, expected) -> str:
+        """moves past the next character, which must be one of those
+        expected, and returns it."""
+
+        char = self.next_char()
+        if not char or char not in expected:
+            raise ValueError("Expected one of '{}' in json document, found "
+                             "'{}'".format(expected, char))
+
+        self.position += 1
+        return char
+
+    def decode(self):
+        """parses and returns the json value at the current position."""
+
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer,
+                                                     self.position)
+            except ValueError:
+                # the value may be cut off at the end of the buffer
+                if not self.read():
+                    raise
+                continue
+
+            # a value ending with the buffer, e.g. a number, may go on in
+            # the next chunk of the file
+            if end < len(self.buffer) or not self.read():
+                self.position = end
+                return value
@@ -1,2 +1,5 @@
-"""directory imports for the TransformOperations class."""
+"""directory imports for the TransformOperations, ArticleDeduplicator and
+SeenArticleIndex classes."""
 from .transform_operations import *
+from .article_deduplication import *
+from .seen_article_index import *
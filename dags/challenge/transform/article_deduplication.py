@@ -0,0 +1,200 @@
+"""Tempus challenge  - Operations and Functions: Article De-duplication
+
+Describes the code definitions of the de-duplication of the news articles
+merged from the headlines of several sources, in the transformation task
+of the 'tempus_challenge_dag' pipeline.
+"""
+
+
+import hashlib
+import logging
+import os
+import re
+
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import challenge as c
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# environment variable turning the de-duplication of merged articles off,
+# e.g. TRANSFORM_DEDUPLICATE=0
+DEDUPLICATE_ENV_VARIABLE = "TRANSFORM_DEDUPLICATE"
+
+# environment variable also matching articles on a fingerprint of their
+# title, e.g. TRANSFORM_DEDUPLICATE_TITLES=1
+DEDUPLICATE_TITLES_ENV_VARIABLE = "TRANSFORM_DEDUPLICATE_TITLES"
+
+# query parameters that only track where a reader came from, and are left
+# out of a normalized url (any parameter starting with 'utm_' is too).
+TRACKING_PARAMS = ['fbclid', 'gclid', 'ocid', 'cmpid', 'ref', 'smid']
+
+# size, in bytes, of the hashes of the article keys kept in the index. 8
+# bytes make a collision between two different articles of one run
+# vanishingly unlikely, while keeping the index small.
+KEY_DIGEST_SIZE = 8
+
+# characters stripped from a title before fingerprinting it
+TITLE_PUNCTUATION = re.compile(r"[\W_]+", re.UNICODE)
+
+
+class ArticleDeduplicator:
+    """Hash index of the articles already merged into the headlines, used to
+    drop duplicates as each source's articles are merged in.
+
+    The same article is often published under several sources (news
+    aggregators, wire services). An article is a duplicate when its
+    normalized url (see normalize_url), or - if titles are used - the
+    fingerprint of its title (see title_fingerprint), was seen on an
+    earlier article. Only a short hash of each key is kept, so the index
+    stays small whatever the length of the urls and titles.
+
+    Articles with neither a url nor a title are always kept.
+
+    # Arguments:
+        :param use_titles: whether to also match articles on their title.
+        :type use_titles: bool
+    """
+
+    __slots__ = ('use_titles', 'seen', 'duplicates')
+
+    def __init__(self, use_titles=False):
+        self.use_titles = use_titles
+        self.seen = set()
+        self.duplicates = 0
+
+    @classmethod
+    def from_environment(cls):
+        """Returns a deduplicator configured from the environment variables,
+        or None if de-duplication is turned off."""
+
+        if not c.is_truthy(os.environ.get(DEDUPLICATE_ENV_VARIABLE, "1")):
+            return None
+
+        titles = os.environ.get(DEDUPLICATE_TITLES_ENV_VARIABLE, "")
+        return cls(use_titles=c.is_truthy(titles))
+
+    @staticmethod
+    def normalize_url(url):
+        """Returns an article url reduced to what identifies the article, or
+        None if there is no url.
+
+        The scheme, a leading 'www.', a trailing slash, the fragment and the
+        tracking query parameters are dropped, the host is lowercased and
+        the remaining query parameters sorted; e.g.
+        'https://www.Wired.com/story/?utm_source=x&b=1#top' normalizes to
+        'wired.com/story?b=1'.
+
+        # Arguments:
+            :param url: the url of the article.
+            :type url: str
+        """
+
+        if not url or not isinstance(url, str):
+            return None
+
+        parts = urlsplit(url.strip())
+        host = parts.netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        path = parts.path.rstrip("/")
+        query = sorted((name, value)
+                       for name, value in parse_qsl(parts.query,
+                                                    keep_blank_values=True)
+                       if not name.lower().startswith("utm_") and
+                       name.lower() not in TRACKING_PARAMS)
+
+        normalized = host + path
+        if query:
+            normalized += "?" + urlencode(query)
+
+        return normalized or None
+
+    @staticmethod
+    def title_fingerprint(title):
+        """Returns a fingerprint of an article title that ignores case,
+        punctuation and spacing, or None if there is no title.
+
+        # Arguments:
+            :param title: the title of the article.
+            :type title: str
+        """
+
+        if not title or not isinstance(title, str):
+            return None
+
+        words = TITLE_PUNCTUATION.sub(" ", title.casefold()).split()
+
+        return " ".join(words) or None
+
+    def article_keys(self, article) -> list:
+        """Returns the hashed keys identifying an article.
+
+        # Arguments:
+            :param article: the article record.
+            :type article: Article
+        """
+
+        keys = []
+
+        url = self.normalize_url(article.url)
+        if url:
+            keys.append(self.hash_key("url", url))
+
+        if self.use_titles:
+            title = self.title_fingerprint(article.title)
+            if title:
+                keys.append(self.hash_key("title", title))
+
+        return keys
+
+    @staticmethod
+    def hash_key(kind, value) -> bytes:
+        """Returns the short hash of an article key of the given kind."""
+
+        key = "{}:{}".format(kind, value).encode("utf-8")
+
+        return hashlib.blake2b(key, digest_size=KEY_DIGEST_SIZE).digest()
+
+    def is_duplicate(self, article) -> bool:
+        """Returns whether an article was seen before, and records it as
+        seen.
+
+        # Arguments:
+            :param article: the article record.
+            :type article: Article
+        """
+
+        keys = self.article_keys(article)
+        duplicate = any(key in self.seen for key in keys)
+        self.seen.update(keys)
+
+        if duplicate:
+            self.duplicates += 1
+
+        return duplicate
+
+    def filter_batch(self, news_data):
+        """Returns a batch of the articles of a batch not seen before,
+        recording them as seen.
+
+        # Arguments:
+            :param news_data: extracted news articles.
+            :type news_data: ArticleBatch
+        """
+
+        unique = [article for article in news_data
+                  if not self.is_duplicate(article)]
+
+        dropped = len(news_data) - len(unique)
+        if dropped:
+            log.info("Dropped {} duplicate articles".format(dropped))
+            c.MetricsEmitter.shared().increment(c.DUPLICATE_ARTICLES_DROPPED,
+                                                dropped)
+
+        return type(news_data)(unique)
+
+    def __len__(self):
+        return len(self.seen)
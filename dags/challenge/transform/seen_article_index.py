@@ -0,0 +1,304 @@
+"""Tempus challenge  - Operations and Functions: Seen Article Index
+
+Describes the code definitions of the persistent index of the news articles
+already delivered by earlier runs of the DAG pipelines, which lets the
+transformation task write out only the articles that are new (a delta).
+"""
+
+
+import contextlib
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+
+import challenge as c
+
+# ensures that function outputs and any errors encountered
+# are logged to the Airflow console
+log = logging.getLogger(__name__)
+
+# environment variable turning incremental (delta) output on for both
+# pipelines, e.g. TRANSFORM_INCREMENTAL=1
+INCREMENTAL_ENV_VARIABLE = "TRANSFORM_INCREMENTAL"
+
+# environment variable setting for how many days an article's delivery is
+# remembered, e.g. SEEN_ARTICLES_RETENTION_DAYS=30
+RETENTION_ENV_VARIABLE = "SEEN_ARTICLES_RETENTION_DAYS"
+
+# top headlines are rarely more than a few days old, so articles delivered
+# longer ago than this are forgotten, which keeps the index small.
+DEFAULT_RETENTION_DAYS = 90
+
+# number of keys looked up per query, below SQLite's limit on the number of
+# parameters of a statement (999 in older versions).
+LOOKUP_CHUNK_SIZE = 500
+
+# seconds a run waits for another run of the same pipeline to release the
+# index before failing.
+LOCK_TIMEOUT = 30
+
+# the index in use by the transformation running on each thread
+_active = threading.local()
+
+
+class SeenArticleIndex:
+    """SQLite index of the articles delivered by the runs of a pipeline.
+
+    Each article is stored under the short hashes of its keys (see
+    ArticleDeduplicator.article_keys) along with the date of the run that
+    first delivered it - about 30 bytes per article. An article delivered
+    by another run is left out of the output; one delivered by the same
+    run date is kept, so re-running a date writes out the same delta.
+
+    The articles a run delivers are only committed to the index when the
+    run's transformation succeeds.
+
+    The articles of each output of a pipeline delivering several - the
+    csv file of each keyword of 'tempus_bonus_challenge_dag' - are kept
+    apart under its scope (see seen_article_scope), so that an article
+    delivered in one keyword's csv is still delivered in another's.
+
+    # Arguments:
+        :param path: path to the SQLite file of the index.
+        :type path: str
+        :param run_date: execution date of the run, as 'YYYY-MM-DD'.
+        :type run_date: str
+        :param deduplicator: computes the keys of the articles. Defaults to
+            one configured from the environment.
+        :type deduplicator: ArticleDeduplicator
+        :param retention_days: number of days a delivery is remembered.
+            Defaults to DEFAULT_RETENTION_DAYS.
+        :type retention_days: int
+    """
+
+    def __init__(self,
+                 path,
+                 run_date,
+                 deduplicator=None,
+                 retention_days=None):
+        if deduplicator is None:
+            titles = os.environ.get(c.DEDUPLICATE_TITLES_ENV_VARIABLE, "")
+            deduplicator = c.ArticleDeduplicator(use_titles=c.is_truthy(
+                titles))
+        if retention_days is None:
+            retention_days = int(os.environ.get(RETENTION_ENV_VARIABLE,
+                                                DEFAULT_RETENTION_DAYS))
+
+        self.path = path
+        self.run_date = str(run_date)
+        self.deduplicator = deduplicator
+        self.retention_days = retention_days
+        self.connection = None
+        self.delivered = 0
+        self.scope = None
+
+    @classmethod
+    def for_pipeline(cls, pipeline_name, run_date):
+        """Returns the index of a pipeline, stored in the persistent
+        'seen_articles' cache directory.
+
+        # Arguments:
+            :param pipeline_name: the name of the DAG pipeline.
+            :type pipeline_name: str
+            :param run_date: execution date of the run, as 'YYYY-MM-DD'.
+            :type run_date: str
+        """
+
+        cache_dir = c.FileStorage.get_cache_directory('seen_articles')
+
+        return cls(os.path.join(cache_dir, pipeline_name + ".sqlite"),
+                   run_date)
+
+    def open(self):
+        """Opens the index, creating it if needed, and forgets the articles
+        delivered before the retention period."""
+
+        self.connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS seen_articles "
+                                "(key BLOB PRIMARY KEY, "
+                                "delivered_on TEXT NOT NULL) WITHOUT ROWID")
+
+        run_date = datetime.datetime.strptime(self.run_date, "%Y-%m-%d")
+        cutoff = run_date - datetime.timedelta(days=self.retention_days)
+        self.connection.execute("DELETE FROM seen_articles "
+                                "WHERE delivered_on < ?",
+                                (cutoff.strftime("%Y-%m-%d"),))
+
+    def close(self, commit=True):
+        """Closes the index, committing the articles recorded as delivered
+        by this run, or discarding them.
+
+        # Arguments:
+            :param commit: whether to commit the recorded articles.
+            :type commit: bool
+        """
+
+        if self.connection is None:
+            return
+
+        if commit:
+            self.connection.commit()
+        else:
+            self.connection.rollback()
+        self.connection.close()
+        self.connection = None
+
+    def delivered_keys(self, keys) -> set:
+        """Returns those of the keys delivered by other runs.
+
+        # Arguments:
+            :param keys: the hashed article keys to look up.
+            :type keys: list
+        """
+
+        found = set()
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            query = ("SELECT key FROM seen_articles "
+                     "WHERE delivered_on != ? AND key IN ({})"
+                     .format(",".join("?" * len(chunk))))
+            rows = self.connection.execute(query, [self.run_date] + chunk)
+            found.update(bytes(row[0]) for row in rows)
+
+        return found
+
+    def scoped_keys(self, keys) -> list:
+        """Returns the keys of an article as stored under the current
+        scope; unchanged when there is none.
+
+        # Arguments:
+            :param keys: the hashed article keys.
+            :type keys: list
+        """
+
+        if self.scope is None:
+            return keys
+
+        prefix = str(self.scope).encode("utf-8") + b"\x00"
+        return [prefix + key for key in keys]
+
+    def filter_batch(self, news_data):
+        """Returns a batch of the articles of a batch not delivered by
+        another run, recording them as delivered by this one.
+
+        # Arguments:
+            :param news_data: extracted news articles.
+            :type news_data: ArticleBatch
+        """
+
+        keyed = [(article,
+                  self.scoped_keys(self.deduplicator.article_keys(article)))
+                 for article in news_data]
+        delivered = self.delivered_keys([key for article, keys in keyed
+                                         for key in keys])
+
+        new_articles = []
+        new_keys = []
+        for article, keys in keyed:
+            if delivered.isdisjoint(keys):
+                new_articles.append(article)
+                new_keys.extend(keys)
+
+        self.connection.executemany("INSERT OR IGNORE INTO seen_articles "
+                                    "(key, delivered_on) VALUES (?, ?)",
+                                    [(key, self.run_date)
+                                     for key in new_keys])
+
+        dropped = len(keyed) - len(new_articles)
+        if dropped:
+            self.delivered += dropped
+            log.info("Left out {} articles delivered by earlier runs"
+                     .format(dropped))
+            c.MetricsEmitter.shared().increment(c.ARTICLES_ALREADY_DELIVERED,
+                                                dropped)
+
+        return type(news_data)(new_articles)
+
+
+def incremental_requested() -> bool:
+    """returns whether incremental output is turned on, by the
+    INCREMENTAL_ENV_VARIABLE environment variable."""
+
+    return c.is_truthy(os.environ.get(INCREMENTAL_ENV_VARIABLE, ""))
+
+
+@contextlib.contextmanager
+def seen_article_index(pipeline_name, run_date, enabled=True):
+    """Context manager opening a pipeline's seen article index for the
+    transformation of a run, which it wraps. The index is consulted by
+    filter_delivered_articles on the same thread, and the articles the run
+    delivers are committed to it if the block exits without an error.
+    Yields the index, or None when not enabled.
+
+    # Arguments:
+        :param pipeline_name: the name of the DAG pipeline.
+        :type pipeline_name: str
+        :param run_date: execution date of the run, as 'YYYY-MM-DD'.
+        :type run_date: str
+        :param enabled: whether to use the index at all.
+        :type enabled: bool
+    """
+
+    if not enabled:
+        yield None
+        return
+
+    index = SeenArticleIndex.for_pipeline(pipeline_name, run_date)
+    index.open()
+    _active.index = index
+
+    try:
+        yield index
+    except BaseException:
+        index.close(commit=False)
+        raise
+    else:
+        index.close(commit=True)
+    finally:
+        _active.index = None
+
+
+@contextlib.contextmanager
+def seen_article_scope(scope):
+    """Context manager putting the articles delivered within the block it
+    wraps under a scope of the seen article index open on this thread,
+    e.g. the keyword of the csv file being written. Articles are only left
+    out if they were delivered under the same scope. Does nothing if no
+    index is open.
+
+    # Arguments:
+        :param scope: name of the output the articles are delivered in.
+        :type scope: str
+    """
+
+    index = getattr(_active, "index", None)
+    if index is None:
+        yield
+        return
+
+    previous = index.scope
+    index.scope = scope
+
+    try:
+        yield
+    finally:
+        index.scope = previous
+
+
+def filter_delivered_articles(news_data):
+    """Returns a batch of extracted articles without those delivered by
+    other runs, if a seen article index is open on this thread (see
+    seen_article_index); otherwise returns the batch unchanged.
+
+    # Arguments:
+        :param news_data: extracted news articles.
+        :type news_data: ArticleBatch
+    """
+
+    index = getattr(_active, "index", None)
+    if index is None or not isinstance(news_data, c.ArticleBatch):
+        return news_data
+
+    return index.filter_batch(news_data)
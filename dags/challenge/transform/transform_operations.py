@@ -25,11 +25,33 @@ HOME_DIRECTORY = str(os.environ['HOME'])
 # transformed json new files
 merged_df = pd.DataFrame()
 
+# environment variable applying the typed schema (see apply_typed_schema) to
+# the merged headlines DataFrame on every run, e.g. TRANSFORM_TYPED_SCHEMA=1
+TYPED_SCHEMA_ENV_VARIABLE = "TRANSFORM_TYPED_SCHEMA"
+
+# environment variable reading the headline json files incrementally, a
+# batch of articles at a time, rather than loading each one whole, e.g.
+# TRANSFORM_STREAMING=1 (see transform_headlines_json_stream_to_csv)
+STREAMING_ENV_VARIABLE = "TRANSFORM_STREAMING"
+
+# dtype of the text columns of the typed schema: the dedicated string dtype
+# where the installed Pandas has one (0.24+), otherwise plain objects.
+TEXT_DTYPE = pd.StringDtype() if hasattr(pd, 'StringDtype') else object
+
+# options parsing the ISO 8601 publication dates of the News API. From
+# Pandas 2, to_datetime() otherwise infers one format from the first date,
+# and fails on the others - e.g. those with fractional seconds. Earlier
+# versions parse each date on its own.
+ISO_DATE_OPTIONS = {}
+if int(pd.__version__.split('.')[0]) >= 2:
+    ISO_DATE_OPTIONS = {'format': 'ISO8601'}
+
 
 class TransformOperations:
     """Handles functionality for flattening CSVs."""
 
     @classmethod
+    @c.instrumented("transform")
     def transform_headlines_to_csv(cls,
                                    pipeline_information=None,
                                    tf_json_func=None,
@@ -66,6 +88,23 @@ class TransformOperations:
         to the end transformed csv's. The keyword headline files are of form:
         `pipeline_execution_date`_`keyword`_`headlines`.csv
 
+        Profiling mode - see the PROFILE_ENV_VARIABLE and PROFILE_PARAM
+        settings - runs the transformation under cProfile, and saves its
+        profile as `pipeline_execution_date`_transform_profile.prof (with a
+        .txt summary) in the pipeline's 'csv' folder. The profile is not
+        published in the folder's manifest, so it is not uploaded.
+
+        Incremental mode - see the INCREMENTAL_ENV_VARIABLE setting - leaves
+        out of the csv files the articles delivered by earlier runs, as
+        recorded in the pipeline's SeenArticleIndex. The articles a run
+        writes out are recorded in the index only if its transformation
+        succeeds.
+
+        With watermark-based fetching - see the WATERMARKS_ENV_VARIABLE
+        setting - a successful transformation commits the watermarks of the
+        headlines it transformed, so the next run only fetches newer
+        articles.
+
         #  Arguments:
             :param pipeline_information: object that provide more information
                 about the current pipeline. Defaults to the NewsInfoDTO class.
@@ -108,21 +147,53 @@ class TransformOperations:
         # transformation operation status
         transform_status = None
 
+        # in profiling mode the transformation runs under cProfile, and its
+        # profile is saved in the 'csv' datastore next to the csv files.
+        profiling = c.profiling_requested(context)
+        profile_dir = None
+        if profiling:
+            profile_dir = pipeline_info.csv_directory
+        profile_name = exec_date + "_transform_profile"
+
+        # whether the active pipeline is one of the two we developed for.
+        valid_pipeline = pipeline_name in ("tempus_challenge_dag",
+                                           "tempus_bonus_challenge_dag")
+
+        # in incremental mode only the articles no earlier run delivered
+        # are written out, as recorded in the pipeline's seen article index.
+        incremental = valid_pipeline and c.incremental_requested()
+
         # perform context-specific transformations
-        if pipeline_name == "tempus_challenge_dag":
-            # transform all jsons in the 'headlines' directory
-            transform_status = tf_json_func(headline_dir, exec_date)
+        with c.profile_to_directory(profile_dir, profile_name, profiling), \
+                c.seen_article_index(pipeline_name,
+                                     exec_date,
+                                     incremental) as seen_index:
+            if pipeline_name == "tempus_challenge_dag":
+                # transform all jsons in the 'headlines' directory
+                transform_status = tf_json_func(headline_dir, exec_date)
+            elif pipeline_name == "tempus_bonus_challenge_dag":
+                # transform all jsons in the 'headlines' directory
+                transform_status = tf_key_json_func(headline_dir, exec_date)
+
+            # the articles of a failed transformation were not delivered
+            if seen_index and not transform_status:
+                seen_index.close(commit=False)
+
+        # the articles fetched for this run were delivered, so the next run
+        # fetches those published after them (see HeadlineWatermarks).
+        if valid_pipeline and transform_status and \
+                c.HeadlineWatermarks.requested():
+            watermarks = c.HeadlineWatermarks.for_pipeline(pipeline_name)
+            watermarks.commit_manifest(headline_dir)
+
+        if valid_pipeline:
             return transform_status
-        elif pipeline_name == "tempus_bonus_challenge_dag":
-            # transform all jsons in the 'headlines' directory
-            transform_status = tf_key_json_func(headline_dir, exec_date)
-            return transform_status
-        else:
-            # the active pipeline is not one of the two we developed for.
-            print("This pipeline {} is not valid".format(pipeline_name))
-            # log this issue in Airflow and return an error status
-            log.info("This pipeline {} is not valid".format(pipeline_name))
-            return False
+
+        # the active pipeline is not one of the two we developed for.
+        print("This pipeline {} is not valid".format(pipeline_name))
+        # log this issue in Airflow and return an error status
+        log.info("This pipeline {} is not valid".format(pipeline_name))
+        return False
 
     @classmethod
     def helper_execute_keyword_json_transformation(cls,
@@ -163,15 +234,14 @@ class TransformOperations:
             json_transfm_func = cls.transform_key_headlines_to_csv
 
         # transform individual jsons in the 'headlines' directory into
-        # individual csv files
-        files = []
-        filepath = []
+        # individual csv files. The json files are those the upstream tasks
+        # published in the directory's manifest.
+        try:
+            files = c.FileStorage.manifest_filenames(directory, '.json')
+        except FileNotFoundError:
+            raise FileNotFoundError("Directory is empty")
 
-        if os.listdir(directory):
-            for file in os.listdir(directory):
-                if file.endswith('.json'):
-                    files.append(file)
-                    filepath.append(os.path.join(directory, file))
+        filepath = [os.path.join(directory, file) for file in files]
 
         # check existence of json files before beginning transformation
         if not files:
@@ -180,7 +250,10 @@ class TransformOperations:
             for index, path in enumerate(filepath):
                 key = files[index].split("_")[1]
                 fname = str(timestamp) + "_" + key + "_top_headlines.csv"
-                stat, msg = json_transfm_func(path, fname, reader)
+                # in incremental mode, each keyword's csv leaves out only
+                # the articles earlier runs delivered in that keyword's csv
+                with c.seen_article_scope(key):
+                    stat, msg = json_transfm_func(path, fname, reader)
                 per_file_status.append(stat)
 
         # verify that ALL the files successfully were converted to csv
@@ -295,16 +368,14 @@ class TransformOperations:
         merged_dataframe = pd.DataFrame()
 
         # transform individual jsons in the 'headlines' directory into one
-        # single csv file
-        files = []
-
-        if not os.listdir(directory):
+        # single csv file. The json files are those the upstream task
+        # published in the directory's manifest.
+        try:
+            files = c.FileStorage.manifest_filenames(directory, '.json')
+        except FileNotFoundError:
             raise FileNotFoundError("Directory is empty")
 
-        if os.listdir(directory):
-            for file in os.listdir(directory):
-                if file.endswith('.json'):
-                    files.append(os.path.join(directory, file))
+        files = [os.path.join(directory, file) for file in files]
 
         # check existence of json files before beginning transformation
         if not files:
@@ -322,26 +393,57 @@ class TransformOperations:
         return status
 
     @classmethod
+    @c.instrumented("transform")
     def transform_jsons_to_dataframe_merger(cls,
                                             json_files,
                                             read_js_func=None,
                                             extract_func=None,
-                                            transform_func=None):
+                                            transform_func=None,
+                                            typed_schema=None,
+                                            deduplicator=None,
+                                            streaming=None):
         """transforms a set of json files into a DataFrames and merges all of
         them into one.
 
+        Articles already merged in from an earlier file - the same article
+        published under several sources - are dropped as each file is
+        merged, before they are put into a DataFrame (see
+        ArticleDeduplicator). Unless a `deduplicator` is given, one is
+        configured from the environment, which can turn de-duplication off.
+
+        The merged DataFrame is given the typed schema of the headlines
+        (see apply_typed_schema) when `typed_schema` is True, or, if it is
+        left as None, when the TYPED_SCHEMA_ENV_VARIABLE environment
+        variable is set.
+
+        In streaming mode - `streaming` is True, or, if it is left as None,
+        the STREAMING_ENV_VARIABLE environment variable is set - each json
+        file is read and merged a batch of articles at a time (see
+        ExtractOperations.extract_news_data_batches), in place of the
+        `read_js_func` and `extract_func` functions. A file found invalid
+        part-way through keeps the batches merged before the error.
+
         # Arguments:
             :param json_files: a list of json files to be processed.
             :type json_files: list
             :param extract_func: the function used to extract news data
-                from a dataframe.
+                from the json. A custom function is given the json as a
+                single-row DataFrame.
             :type extract_func: function
             :param transform_func: the function used to transform news
                 data into a dataframe.
             :type transform_func: function
             :param read_js_fnc: the function used to read-in and process the
-                json file. By Default is the Pandas read_json() function.
+                json file. By Default is the FileStorage
+                json_to_dataframe_reader() function.
             :type read_js_func: function
+            :param typed_schema: whether to apply the typed schema to the
+                merged DataFrame.
+            :type typed_schema: bool
+            :param deduplicator: the index of the articles merged so far.
+            :type deduplicator: ArticleDeduplicator
+            :param streaming: whether to read the json files incrementally.
+            :type streaming: bool
         """
 
         log.info("Running transform_jsons_to_dataframe_merger method")
@@ -349,12 +451,22 @@ class TransformOperations:
         # Function Aliases
         # use an alias since the length of the real function call when used
         # is more than PEP-8's 79 line-character limit.
+        # the news json is extracted from as it was read, unless a custom
+        # extract function, expecting it as a single-row DataFrame, is given
+        extract_from_dataframe = extract_func is not None
         if not extract_func:
-            extract_func = c.ExtractOperations.extract_news_data_from_dataframe
+            extract_func = c.ExtractOperations.extract_news_data
         if not transform_func:
             transform_func = cls.transform_data_to_dataframe
+        # the default reader counts the bytes of the files it reads itself
+        record_read = read_js_func is not None
         if not read_js_func:
-            read_js_func = pd.read_json
+            read_js_func = c.FileStorage.json_to_dataframe_reader
+        if deduplicator is None:
+            deduplicator = c.ArticleDeduplicator.from_environment()
+        if streaming is None:
+            streaming = cls.streaming_requested()
+        extract_batches = c.ExtractOperations.extract_news_data_batches
 
         # perform pairwise transformation of the json files into DataFrames
         # and their subsequent merging into a single DataFrame.
@@ -385,8 +497,33 @@ class TransformOperations:
             # perform json to DataFrame transformations by function-chaining
             log.info(json_files[index])
 
-            # read in the json file resulting in an intermediary DataFrame.
+            if streaming:
+                # merge the file's articles a batch at a time, numbering
+                # its rows as if it were merged whole.
+                rows = 0
+                try:
+                    c.record_file_read(json_files[index])
+                    for news_data in extract_batches(json_files[index]):
+                        current_file_df = cls.merge_news_data(news_data,
+                                                              transform_func,
+                                                              deduplicator)
+                        if current_file_df is None:
+                            continue
+                        current_file_df.index = pd.RangeIndex(
+                            rows, rows + len(current_file_df))
+                        rows += len(current_file_df)
+                        merged_df = pd.concat([merged_df, current_file_df])
+                        del current_file_df
+                except ValueError as err:
+                    log.info("Error Encountered: {}".format(str(err)))
+
+                gc.collect()
+                continue
+
+            # read in the json file
             try:
+                if record_read:
+                    c.record_file_read(json_files[index])
                 json_data = read_js_func(json_files[index])
 
             except ValueError as err:
@@ -396,8 +533,15 @@ class TransformOperations:
                 log.info("Error Encountered: {}".format(error_message))
 
             # extract news data from the json and transform it into a DataFrame
-            json_data = pd.DataFrame([json_data])
-            current_file_df = transform_func(extract_func(json_data))
+            if extract_from_dataframe:
+                json_data = pd.DataFrame([json_data])
+            news_data = extract_func(json_data)
+
+            current_file_df = cls.merge_news_data(news_data,
+                                                  transform_func,
+                                                  deduplicator)
+            if current_file_df is None:
+                continue
 
             # perform sequential mergers while freeing up memory
             # by clearing the previously transformed DataFrames
@@ -408,23 +552,200 @@ class TransformOperations:
             # free up memory manually
             gc.collect()
 
+        if typed_schema is None:
+            typed_schema = c.is_truthy(
+                os.environ.get(TYPED_SCHEMA_ENV_VARIABLE, ""))
+
+        if typed_schema:
+            merged_df = cls.apply_typed_schema(merged_df)
+
         # return a merged DataFrame of all the jsons
         return merged_df
 
     @classmethod
+    def merge_news_data(cls, news_data, transform_func, deduplicator=None):
+        """Returns the DataFrame of news data to merge, or None if none of
+        its articles are left to merge.
+
+        Articles merged in from earlier files are dropped, and, in
+        incremental mode, those earlier runs delivered (see
+        seen_article_index). Only batches of articles are filtered, not
+        whatever a custom extract function returns.
+
+        # Arguments:
+            :param news_data: the extracted news data.
+            :type news_data: ArticleBatch
+            :param transform_func: the function used to transform news
+                data into a dataframe.
+            :type transform_func: function
+            :param deduplicator: the index of the articles merged so far.
+            :type deduplicator: ArticleDeduplicator
+        """
+
+        if (deduplicator is not None and
+                isinstance(news_data, c.ArticleBatch)):
+            news_data = deduplicator.filter_batch(news_data)
+
+        news_data = c.filter_delivered_articles(news_data)
+        if isinstance(news_data, c.ArticleBatch) and not news_data:
+            return None
+
+        return transform_func(news_data)
+
+    @classmethod
+    def streaming_requested(cls) -> bool:
+        """returns whether the headline json files are read incrementally,
+        as set by the STREAMING_ENV_VARIABLE environment variable."""
+
+        return c.is_truthy(os.environ.get(STREAMING_ENV_VARIABLE, ""))
+
+    @classmethod
+    def transform_headlines_json_stream_to_csv(cls,
+                                               json_file,
+                                               csv_dir,
+                                               csv_filename=None,
+                                               transform_func=None,
+                                               batch_size=None):
+        """Transforms the contents of a news json file into a csv, reading
+        and writing its articles a batch at a time.
+
+        Used in streaming mode (see STREAMING_ENV_VARIABLE) in place of
+        reading the whole json file in, so that headline files of any size
+        are transformed with bounded memory: only a batch of articles, as
+        records and then as a DataFrame, is held at once (see
+        ExtractOperations.extract_news_data_batches). The batches are
+        appended to the csv with continuous row numbers, so it is the same
+        as the csv written from the whole file.
+
+        As for the other transformations, no csv file is created if the
+        json file has no articles, and True is returned with a status
+        message saying so.
+
+        # Arguments:
+            :param json_file: a json file containing top news headlines.
+            :type json_file: str
+            :param csv_dir: the 'csv' datastore folder to write the csv in.
+            :type csv_dir: str
+            :param csv_filename: the filename of the transformed csv.
+            :type csv_filename: str
+            :param transform_func: the function used to transform news
+                data into a dataframe.
+            :type transform_func: function
+            :param batch_size: the number of articles per batch.
+            :type batch_size: int
+
+        # Raises:
+            ValueError: if the json file is not valid json. No csv file is
+                left behind.
+        """
+
+        log.info("Running transform_headlines_json_stream_to_csv method")
+
+        if not transform_func:
+            transform_func = cls.transform_data_to_dataframe
+        if not csv_filename:
+            time = datetime.datetime.now().isoformat().split('T')[0]
+            csv_filename = str(time) + "_sample.csv"
+        csv_save_path = os.path.join(csv_dir, csv_filename)
+
+        # number of articles written to the csv so far
+        rows = 0
+
+        extract_batches = c.ExtractOperations.extract_news_data_batches
+        try:
+            c.record_file_read(str(json_file))
+            for news_data in extract_batches(str(json_file), batch_size):
+                # in incremental mode, leave out the articles earlier runs
+                # delivered
+                news_data = c.filter_delivered_articles(news_data)
+                if not news_data:
+                    continue
+
+                batch_df = transform_func(news_data)
+                batch_df.index = pd.RangeIndex(rows, rows + len(batch_df))
+                batch_df.to_csv(csv_save_path,
+                                mode='a' if rows else 'w',
+                                header=not rows)
+                rows += len(batch_df)
+                del batch_df
+        except ValueError as err:
+            # a partially written csv is not left behind for the upload
+            log.info("Error Encountered: {}".format(str(err)))
+            if rows and os.path.isfile(csv_save_path):
+                os.remove(csv_save_path)
+            raise ValueError
+
+        if not rows:
+            log.info("No News articles found, csv not created")
+            return True, "No News articles found, csv not created"
+
+        log.info("{} headlines csv saved in {}".format(csv_filename, csv_dir))
+        # publish the csv to the upload task
+        c.FileStorage.publish_manifest_entry(csv_dir, csv_filename, rows)
+
+        return True, "csv file successfully created"
+
+    @classmethod
+    def apply_typed_schema(cls, frame):
+        """Returns a headlines DataFrame with the dtypes of the typed schema
+        applied to its news columns:
+
+        - the news source id and name columns are categoricals. Merging the
+          DataFrames of several sources turns them back into objects, as
+          their categories differ, so they are re-categorized once merged.
+        - the publication date column holds UTC datetimes (see
+          parse_publication_dates).
+        - the other columns hold text, as TEXT_DTYPE. Pandas stores it as
+          pyarrow strings if its `mode.string_storage` option says so.
+
+        Each source value and date is then stored once or as a number,
+        rather than as a Python object per row, which shrinks the merged
+        DataFrame and speeds up sorting and grouping it. The csv written
+        from it is unchanged. Columns that are not news columns are left
+        as they are.
+
+        # Arguments:
+            :param frame: the headlines DataFrame.
+            :type frame: DataFrame
+        """
+
+        log.info("Running apply_typed_schema method")
+
+        dtypes = {}
+        for field, column in c.ARTICLE_CSV_COLUMNS.items():
+            if column not in frame.columns:
+                continue
+            if field in c.CATEGORICAL_FIELDS:
+                dtypes[column] = 'category'
+            elif field not in c.DATETIME_FIELDS:
+                dtypes[column] = TEXT_DTYPE
+
+        typed_frame = frame.astype(dtypes)
+
+        for field in c.DATETIME_FIELDS:
+            column = c.ARTICLE_CSV_COLUMNS[field]
+            if column in typed_frame.columns:
+                typed_frame[column] = cls.parse_publication_dates(
+                    typed_frame[column])
+
+        return typed_frame
+
+    @classmethod
+    @c.instrumented("transform")
     def transform_news_headlines_json_to_csv(cls,
                                              json_file,
                                              csv_filename=None,
                                              read_js_func=None,
                                              extract_func=None,
-                                             transform_func=None):
+                                             transform_func=None,
+                                             streaming=None):
         """Transforms the contents of a given news json file into a csv.
 
         The function specifically operates on jsons in the 'headlines'
         folder of the 'tempus_challenge_dag' pipeline.
 
-        Uses the Pandas library to parse, traverse and flatten the
-        json data into a csv file.
+        Reads the json file into a dictionary, and turns its articles
+        straight into the rows of the csv file.
 
         If there are no news articles in the parsed json file then no
         csv file is created for the new source. This absence of news
@@ -433,6 +754,11 @@ class TransformOperations:
         to the caller indicating that it completed in a valid state,
         and returning a status message to show this.
 
+        In streaming mode - `streaming` is True, or, if it is left as None,
+        the STREAMING_ENV_VARIABLE environment variable is set - the json
+        file is transformed a batch of articles at a time instead (see
+        transform_headlines_json_stream_to_csv).
+
         # Arguments:
             :param json_file: a json file containing top news headlines
                 based on a keyword.
@@ -440,14 +766,18 @@ class TransformOperations:
             :param csv_filename: the filename of the transformed csv.
             :type csv_filename: str
             :param extract_func: the function used to extract news data
-                from a dataframe.
+                from the json. A custom function is given the json as a
+                single-row DataFrame.
             :type extract_func: function
             :param transform_func: the function used to transform news
                 data into a dataframe.
             :type transform_func: function
             :param read_js_fnc: the function used to read-in and process the
-                json file. By Default is the Pandas read_json() function.
+                json file. By Default is the FileStorage
+                json_to_dataframe_reader() function.
             :type read_js_func: function
+            :param streaming: whether to read the json file incrementally.
+            :type streaming: bool
         """
 
         log.info("Running transform_news_headlines_json_to_csv method")
@@ -462,15 +792,31 @@ class TransformOperations:
         # Function Aliases
         # use an alias since the length of the real function call when used
         # is more than PEP-8's 79 line-character limit.
+        # the news json is extracted from as it was read, unless a custom
+        # extract function, expecting it as a single-row DataFrame, is given
+        extract_from_dataframe = extract_func is not None
         if not extract_func:
-            extract_func = c.ExtractOperations.extract_news_data_from_dataframe
+            extract_func = c.ExtractOperations.extract_news_data
         if not transform_func:
             transform_func = cls.transform_data_to_dataframe
+        # the default reader counts the bytes of the file it reads itself
+        record_read = read_js_func is not None
         if not read_js_func:
-            read_js_func = pd.read_json
-
-        # use Pandas to read in the json file
+            read_js_func = c.FileStorage.json_to_dataframe_reader
+        if streaming is None:
+            streaming = cls.streaming_requested()
+
+        if streaming:
+            csv_dir = c.FileStorage.get_csv_directory("tempus_challenge_dag")
+            return cls.transform_headlines_json_stream_to_csv(json_file,
+                                                              csv_dir,
+                                                              csv_filename,
+                                                              transform_func)
+
+        # read in the json file
         try:
+            if record_read:
+                c.record_file_read(json_file)
             keyword_data = read_js_func(json_file)
         except ValueError as err:
             # if any errors are encountered during reading then skip the
@@ -481,9 +827,13 @@ class TransformOperations:
             raise ValueError
 
         # extraction and intermediate-transformation of the news json
-        keyword_data = pd.DataFrame([keyword_data])
+        if extract_from_dataframe:
+            keyword_data = pd.DataFrame([keyword_data])
         extracted_data = extract_func(keyword_data)
 
+        # in incremental mode, leave out the articles earlier runs delivered
+        extracted_data = c.filter_delivered_articles(extracted_data)
+
         # if there are no headline articles then no csv file is
         # created for this news source. the function should not
         # continue processing, but rather log the absence of news
@@ -509,8 +859,12 @@ class TransformOperations:
 
         # ensure status of operation is communicated to caller function
         op_status = None
-        if os.listdir(csv_dir):
+        if os.path.isfile(csv_save_path):
             log.info("english news headlines csv saved in {}".format(csv_dir))
+            # publish the csv to the upload task
+            c.FileStorage.publish_manifest_entry(csv_dir,
+                                                 csv_filename,
+                                                 len(transformed_df))
             op_status = True
             status_msg = "csv file successfully created"
         else:
@@ -520,6 +874,7 @@ class TransformOperations:
         return op_status, status_msg
 
     @classmethod
+    @c.instrumented("transform")
     def transform_headlines_dataframe_to_csv(cls, frame, csv_filename):
         """Flattens a given dataframe into a csv file.
 
@@ -547,8 +902,12 @@ class TransformOperations:
 
         # ensure status of operation is communicated to caller function
         op_status = None
-        if os.listdir(csv_dir):
+        if os.path.isfile(csv_save_path):
             log.info("english news headlines csv saved in {}".format(csv_dir))
+            # publish the csv to the upload task
+            c.FileStorage.publish_manifest_entry(csv_dir,
+                                                 csv_filename,
+                                                 len(transformed_df))
             op_status = True
         else:
             op_status = False
@@ -556,19 +915,21 @@ class TransformOperations:
         return op_status
 
     @classmethod
+    @c.instrumented("transform")
     def transform_key_headlines_to_csv(cls,
                                        json_file,
                                        csv_filename=None,
                                        reader_func=None,
                                        extract_func=None,
-                                       transform_func=None):
+                                       transform_func=None,
+                                       streaming=None):
         """Converts the contents of a given news keyword json into a csv.
 
         The function specifically operates on jsons in the 'headlines'
         folder of the 'tempus_bonus_challenge_dag' pipeline.
 
-        Uses the Pandas library to parse, extract and flatten the
-        json data into a csv file.
+        Reads the json file into a dictionary, and turns its articles
+        straight into the rows of the csv file.
 
         If there are no news articles in the parsed json file then no
         csv file is created for the keyword. This absence of news
@@ -584,14 +945,21 @@ class TransformOperations:
             :param csv_filename: the filename of the transformed csv.
             :type csv_filename: str
             :param extract_func: the function used to extract news keyword
-                fields from a dataframe.
+                fields from the json. A custom function is given the json as
+                a single-row DataFrame.
             :type extract_func: function
             :param transform_func: the function used to transform news keyword
                 data into a dataframe.
             :type transform_func: function
             :param reader_func: the function used to read-in and process the
-                json file. By Default is the Pandas read_json() function.
+                json file. By Default is the FileStorage
+                json_to_dataframe_reader() function.
             :type reader_func: function
+            :param streaming: whether to read the json file incrementally,
+                a batch of articles at a time (see
+                transform_headlines_json_stream_to_csv). Defaults to the
+                STREAMING_ENV_VARIABLE environment variable.
+            :type streaming: bool
         """
 
         log.info("Running transform_key_headlines_to_csv method")
@@ -606,16 +974,34 @@ class TransformOperations:
         # Function Aliases
         # use an alias since the length of the real function call when used
         # is more than PEP-8's 79 line-character limit.
+        # the news json is extracted from as it was read, unless a custom
+        # extract function, expecting it as a single-row DataFrame, is given
+        extract_from_dataframe = extract_func is not None
         if not extract_func:
-            extract_func = c.ExtractOperations.extract_news_data_from_dataframe
+            extract_func = c.ExtractOperations.extract_news_data
         if not transform_func:
             transform_func = cls.transform_data_to_dataframe
 
-        # use Pandas to read in the json file
+        # read in the json file. The default reader counts the bytes of the
+        # file it reads itself.
+        record_read = reader_func is not None
         if not reader_func:
-            reader_func = pd.read_json
+            reader_func = c.FileStorage.json_to_dataframe_reader
+        if streaming is None:
+            streaming = cls.streaming_requested()
+
+        # read the keyword's possibly very large json file incrementally
+        if streaming:
+            csv_dir = c.FileStorage.get_csv_directory(
+                "tempus_bonus_challenge_dag")
+            return cls.transform_headlines_json_stream_to_csv(json_file,
+                                                              csv_dir,
+                                                              csv_filename,
+                                                              transform_func)
 
         try:
+            if record_read:
+                c.record_file_read(str(json_file))
             keyword_data = reader_func(str(json_file))
         except ValueError as err:
             # if any errors are encountered during reading then skip the
@@ -625,9 +1011,13 @@ class TransformOperations:
             raise ValueError
 
         # extraction and intermediate-transformation of the news json
-        keyword_data = pd.DataFrame([keyword_data])
+        if extract_from_dataframe:
+            keyword_data = pd.DataFrame([keyword_data])
         extracted_data = extract_func(keyword_data)
 
+        # in incremental mode, leave out the articles earlier runs delivered
+        extracted_data = c.filter_delivered_articles(extracted_data)
+
         # if there are no headline articles then no csv file is
         # created for this news keyword. the function should not
         # continue processing, but rather log the absence of news
@@ -655,6 +1045,10 @@ class TransformOperations:
 
         if os.path.isfile(csv_save_path):
             log.info("{} headlines csv saved in {}".format(query_key, csv_dir))
+            # publish the csv to the upload task
+            c.FileStorage.publish_manifest_entry(csv_dir,
+                                                 csv_filename,
+                                                 len(transformed_df))
             op_status = True
             status_msg = "csv file successfully created"
         else:
@@ -665,13 +1059,57 @@ class TransformOperations:
 
         return op_status, status_msg
 
+    @classmethod
+    def parse_publication_dates(cls, values):
+        """Returns the publication dates of a batch of articles parsed into
+        UTC datetimes.
+
+        Dates that cannot be parsed are kept as they were, rather than left
+        empty: the dates are then returned as a list of datetimes and the
+        original values, so the csv still holds every date given.
+
+        # Arguments:
+            :param values: the publication dates, as ISO 8601 strings.
+            :type values: list
+        """
+
+        original = pd.Series(list(values), dtype=object)
+        parsed = pd.Series(pd.to_datetime(original,
+                                          utc=True,
+                                          errors='coerce',
+                                          **ISO_DATE_OPTIONS))
+
+        unparsed = parsed.isnull() & original.notnull()
+        if not unparsed.any():
+            return pd.DatetimeIndex(parsed)
+
+        log.info("{} publication dates could not be parsed, and are kept "
+                 "as they are".format(int(unparsed.sum())))
+
+        return [value if failed else date
+                for value, date, failed in zip(original, parsed, unparsed)]
+
     @classmethod
     def transform_data_to_dataframe(cls, news_data):
-        """Converts a dictionary of news data into a Pandas Dataframe.
+        """Converts a batch of extracted news articles into a Pandas Dataframe.
+
+        The DataFrame is built from all its columns in a single constructor
+        call, each column named explicitly through the ARTICLE_CSV_COLUMNS
+        mapping and created with its final dtype, rather than assigning the
+        columns of an empty frame one at a time:
+
+        - the news source id and name columns are categoricals, as a batch
+          holds few distinct sources.
+        - the publication date column holds parsed, UTC datetimes (see
+          parse_publication_dates).
+        - the other columns hold the article text.
 
         # Arguments:
-            :param news_data: extracted news data information.
-            :type news_data: dict
+            :param news_data: extracted news articles.
+            :type news_data: ArticleBatch
+
+        # Raises:
+            ValueError: if the batch has no articles.
         """
 
         log.info("Running transform_data_to_dataframe method")
@@ -680,21 +1118,21 @@ class TransformOperations:
         if not news_data:
             raise ValueError("news data argument cannot be empty")
 
-        field_names = ['news_source_id',
-                       'news_source_name',
-                       'news_author',
-                       'news_title',
-                       'news_description',
-                       'news_url',
-                       'news_image_url',
-                       'news_publication_date',
-                       'news_content']
-
-        # craft the transformed dataframe
-        news_df = pd.DataFrame()
-
-        # populate the columns of the dataframe with news data
-        for index, field in enumerate(list(news_data.keys())):
-            news_df[field_names[index]] = news_data[field]
+        # values of each Article field, across the batch's records
+        field_values = zip(c.Article._fields, zip(*news_data.articles))
+
+        columns = {}
+        for field, values in field_values:
+            if field in c.CATEGORICAL_FIELDS:
+                values = pd.Categorical(values)
+            elif field in c.DATETIME_FIELDS:
+                values = cls.parse_publication_dates(values)
+            else:
+                values = list(values)
+            columns[c.ARTICLE_CSV_COLUMNS[field]] = values
+
+        # craft the transformed dataframe, one row per article
+        news_df = pd.DataFrame(columns,
+                               columns=c.ArticleBatch.csv_columns())
 
         return news_df
@@ -35,6 +35,9 @@ class UploadOperations:
     def upload_directory_check(cls, csv_dir):
         """performs file checks in a given csv directory.
 
+        The csv files are those the upstream transform task published in the
+        directory's manifest; the directory itself is not listed.
+
         # Arguments:
             :param csv_dir: path to the directory containing
                 all the csv headline files.
@@ -55,16 +58,15 @@ class UploadOperations:
         if not csv_dir:
             raise ValueError("CSV directory path cannot be left blank")
 
-        # check existence of csv files in the directory
-        if not os.listdir(csv_dir):
+        # check existence of csv files in the directory's manifest. No
+        # manifest means the transform task published no files at all.
+        try:
+            csv_files = c.FileStorage.manifest_filenames(csv_dir, '.csv')
+        except FileNotFoundError:
             status = True
             message = "Directory is empty"
             return status, message, csv_files
 
-        if os.listdir(csv_dir):
-            csv_files = [file for file in os.listdir(csv_dir)
-                         if file.endswith('.csv')]
-
         # a directory with non-csv files is valid
         if not csv_files:
             status = True
@@ -77,6 +79,7 @@ class UploadOperations:
             return status, message, csv_files
 
     @classmethod
+    @c.instrumented("upload")
     def upload_csv_to_s3(cls,
                          csv_directory=None,
                          bucket_name=None,
@@ -163,10 +166,16 @@ class UploadOperations:
                 ".format(bucket_name))
 
         # iterate through the files in the directory and upload them to s3
+        emitter = c.MetricsEmitter.shared()
         for file in files:
             file_path = os.path.join(pipeline_csv_dir, file)
             aws_service_client.upload_file(file_path, bucket_name, file)
 
+            file_size = os.path.getsize(file_path)
+            c.record_bytes_written(file_size)
+            emitter.increment(c.BYTES_UPLOADED, file_size)
+            emitter.increment(c.FILES_UPLOADED)
+
         # file upload successful if it reached this point without any errors
         status = True
         status_msg = "upload successful"
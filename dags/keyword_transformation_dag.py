@@ -19,15 +19,14 @@ from datetime import datetime, timedelta
 
 from airflow import DAG
 from airflow import settings
-from airflow.contrib.sensors.file_sensor import FileSensor
 from airflow.models import Connection
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.operators.http_operator import SimpleHttpOperator
 from airflow.operators.python_operator import PythonOperator
 
+import challenge as c
+
 from challenge.network.network_operations import NetworkOperations
-from challenge.transform.transform_operations import TransformOperations
-from challenge.upload.upload_operations import UploadOperations
 from challenge.storage.filestorage_operations import FileStorage
 
 
@@ -44,10 +43,6 @@ default_args = {
 }
 
 
-# path, relative to AIRFLOW_HOME, to the news folder which
-# stores data from the News API
-NEWS_DIR = "usr/local/airflow/tempdata/tempus_bonus_challenge_dag/headlines/"
-
 # MAINTAIN SECRECY OF API KEYS
 # https://12factor.net/config
 # https://docs.aws.amazon.com/general/latest/gr/aws-access-keys-best-practices.html
@@ -60,17 +55,16 @@ conn_news_api = Connection(conn_id="newsapi",
                            conn_type="HTTP",
                            host="https://newsapi.org")
 
-# Connection object for local filesystem access
-conn_filesystem = Connection(conn_id="filesys",
-                             conn_type="File (path)",
-                             extra=None)
-
 # Create connection object
 session = settings.Session()
 session.add(conn_news_api)
-session.add(conn_filesystem)
 session.commit()
 
+# (connect, read) timeouts, in seconds, of the keyword headlines requests,
+# so a hung News API connection fails the task (and is retried) rather than
+# blocking it.
+HTTP_TIMEOUT = (c.DEFAULT_CONNECT_TIMEOUT, c.DEFAULT_READ_TIMEOUT)
+
 
 # DAG Object
 dag = DAG('tempus_bonus_challenge_dag',
@@ -86,8 +80,33 @@ start_task = DummyOperator(task_id='start', dag=dag)
 # PEP8's 79 line-character limit
 storage_func_alias = FileStorage.create_storage
 headlines_func_alias = NetworkOperations.get_news_keyword_headlines
-flatten_csv_func_alias = TransformOperations.transform_headlines_to_csv
-upload_func_alias = UploadOperations.upload_csv_to_s3
+
+
+# the transform and upload operations depend on pandas and boto3, which are
+# slow to import. Resolving them through the lazily-loaded `challenge`
+# package inside these callables keeps those imports out of DAG parsing;
+# they are only paid for when the task itself runs.
+def flatten_csv_func_alias(**context):
+    """Runs TransformOperations.transform_headlines_to_csv"""
+    return c.TransformOperations.transform_headlines_to_csv(**context)
+
+
+def upload_func_alias(**context):
+    """Runs UploadOperations.upload_csv_to_s3"""
+    return c.UploadOperations.upload_csv_to_s3(**context)
+
+
+# the SimpleHttpOperator passes its response check no Airflow context, so
+# each keyword task's check exports the task's identity first, for its
+# metrics to be labelled with (and written to a file of) its own task.
+def headlines_check_alias(task_id):
+    """Returns the response check of a keyword headlines task, which runs
+    NetworkOperations.get_news_keyword_headlines"""
+    def response_check(response):
+        c.export_task_identity(dag.dag_id, task_id)
+        return headlines_func_alias(response)
+    return response_check
+
 
 # create a folder for storing retrieved data on the local filesystem
 datastore_creation_task = PythonOperator(task_id='create_storage_task',
@@ -101,9 +120,12 @@ datastore_creation_task = PythonOperator(task_id='create_storage_task',
 news_kw1_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    method='GET',
                                    data={'q': 'Tempus Labs',
+                                         'pageSize': c.HEADLINES_PAGE_SIZE,
                                          'apiKey': API_KEY},
-                                   response_check=headlines_func_alias,
+                                   response_check=headlines_check_alias(
+                                       'get_headlines_first_kw_task'),
                                    http_conn_id='newsapi',
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    task_id='get_headlines_first_kw_task',
                                    dag=dag,
                                    retry_delay=timedelta(minutes=3),
@@ -112,9 +134,12 @@ news_kw1_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
 news_kw2_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    method='GET',
                                    data={'q': 'Eric Lefkofsky',
+                                         'pageSize': c.HEADLINES_PAGE_SIZE,
                                          'apiKey': API_KEY},
-                                   response_check=headlines_func_alias,
+                                   response_check=headlines_check_alias(
+                                       'get_headlines_second_kw_task'),
                                    http_conn_id='newsapi',
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    task_id='get_headlines_second_kw_task',
                                    dag=dag,
                                    retry_delay=timedelta(minutes=3),
@@ -123,9 +148,12 @@ news_kw2_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
 news_kw3_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    method='GET',
                                    data={'q': 'Cancer',
+                                         'pageSize': c.HEADLINES_PAGE_SIZE,
                                          'apiKey': API_KEY},
-                                   response_check=headlines_func_alias,
+                                   response_check=headlines_check_alias(
+                                       'get_headlines_third_kw_task'),
                                    http_conn_id='newsapi',
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    task_id='get_headlines_third_kw_task',
                                    dag=dag,
                                    retry_delay=timedelta(minutes=3),
@@ -134,23 +162,17 @@ news_kw3_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
 news_kw4_task = SimpleHttpOperator(endpoint='/v2/top-headlines?',
                                    method='GET',
                                    data={'q': 'Immunotherapy',
+                                         'pageSize': c.HEADLINES_PAGE_SIZE,
                                          'apiKey': API_KEY},
-                                   response_check=headlines_func_alias,
+                                   response_check=headlines_check_alias(
+                                       'get_headlines_fourth_kw_task'),
                                    http_conn_id='newsapi',
+                                   extra_options={'timeout': HTTP_TIMEOUT},
                                    task_id='get_headlines_fourth_kw_task',
                                    dag=dag,
                                    retry_delay=timedelta(minutes=3),
                                    retry_exponential_backoff=True)
 
-# # detect existence of retrieved news data
-file_exists_sensor = FileSensor(filepath=NEWS_DIR,
-                                fs_conn_id="filesys",
-                                poke_interval=5,
-                                soft_fail=True,
-                                timeout=3600,
-                                task_id='file_sensor_task',
-                                dag=dag)
-
 # extract and transform the data, resulting in a flattened csv
 flatten_to_csv_task = PythonOperator(task_id='flatten_to_csv_kw_task',
                                      provide_context=True,
@@ -173,16 +195,18 @@ end_task = DummyOperator(task_id='end', dag=dag)
 # create folder that acts as 'staging area' to store retrieved
 # data before processing. In a production system this would be
 # a real database.
-start_task >> datastore_creation_task >> news_kw1_task >> file_exists_sensor
+start_task >> datastore_creation_task >> news_kw1_task >> flatten_to_csv_task
 
-# make news api calls with the four keywords and ensure the
-# data has been retrieved before beginning the ETL process.
-datastore_creation_task >> news_kw2_task >> file_exists_sensor
-datastore_creation_task >> news_kw3_task >> file_exists_sensor
-datastore_creation_task >> news_kw4_task >> file_exists_sensor
+# make news api calls with the four keywords. Each task only succeeds once
+# its headlines file has been written and published in the headlines
+# folder's manifest, so the ETL process begins as soon as all four have
+# succeeded, without polling the filesystem.
+datastore_creation_task >> news_kw2_task >> flatten_to_csv_task
+datastore_creation_task >> news_kw3_task >> flatten_to_csv_task
+datastore_creation_task >> news_kw4_task >> flatten_to_csv_task
 
 # all the news sources are retrieved, the top headlines
 # extracted, and the data transform by flattening into CSV.
 # Then perform a file transfer operation, uploading the CSV data
 # into S3 from local.
-file_exists_sensor >> flatten_to_csv_task >> upload_csv_task >> end_task
+flatten_to_csv_task >> upload_csv_task >> end_task
@@ -18,15 +18,13 @@ from datetime import datetime, timedelta
 
 from airflow import DAG
 from airflow import settings
-from airflow.contrib.sensors.file_sensor import FileSensor
 from airflow.models import Connection
 from airflow.operators.dummy_operator import DummyOperator
-from airflow.operators.http_operator import SimpleHttpOperator
 from airflow.operators.python_operator import PythonOperator
 
+import challenge as c
+
 from challenge.network.network_operations import NetworkOperations
-from challenge.transform.transform_operations import TransformOperations
-from challenge.upload.upload_operations import UploadOperations
 from challenge.storage.filestorage_operations import FileStorage
 
 
@@ -42,10 +40,6 @@ default_args = {
     'provide_context': True
 }
 
-# path, relative to AIRFLOW_HOME, to the news folder which
-# stores data from the News API
-NEWS_DIRECTORY = "usr/local/airflow/tempdata/tempus_challenge_dag/news/"
-
 # MAINTAIN SECRECY OF API KEYS
 # https://12factor.net/config
 # https://devops.stackexchange.com/questions/3902/passing-secrets-to-a-docker-container
@@ -60,15 +54,9 @@ conn_news_api = Connection(conn_id="newsapi",
                            conn_type="HTTP",
                            host="https://newsapi.org")
 
-# Connection object for local filesystem access
-conn_filesystem = Connection(conn_id="filesys",
-                             conn_type="File (path)",
-                             extra=None)
-
 # Create connection object
 session = settings.Session()
 session.add(conn_news_api)
-session.add(conn_filesystem)
 session.commit()
 
 
@@ -87,10 +75,23 @@ start_task = DummyOperator(task_id='start', dag=dag)
 # use an alias since the length of the real function call is more than
 # PEP-8's 79 line-character limit.
 storage_func_alias = FileStorage.create_storage
-news_func_alias = NetworkOperations.get_news
+news_func_alias = NetworkOperations.get_news_sources
 headlines_func_alias = NetworkOperations.get_news_headlines
-transform_func_alias = TransformOperations.transform_headlines_to_csv
-upload_func_alias = UploadOperations.upload_csv_to_s3
+
+
+# the transform and upload operations depend on pandas and boto3, which are
+# slow to import. Resolving them through the lazily-loaded `challenge`
+# package inside these callables keeps those imports out of DAG parsing;
+# they are only paid for when the task itself runs.
+def transform_func_alias(**context):
+    """Runs TransformOperations.transform_headlines_to_csv"""
+    return c.TransformOperations.transform_headlines_to_csv(**context)
+
+
+def upload_func_alias(**context):
+    """Runs UploadOperations.upload_csv_to_s3"""
+    return c.UploadOperations.upload_csv_to_s3(**context)
+
 
 # creates a folder for storing retrieved data on the local filesystem
 datastore_creation_task = PythonOperator(task_id='create_storage_task',
@@ -101,30 +102,21 @@ datastore_creation_task = PythonOperator(task_id='create_storage_task',
 
 # retrieve all english news sources
 # Using the News API, a http request is made to the News API's 'sources'
-# endpoint, with its 'language' parameter set to 'en'.
-get_news_task = SimpleHttpOperator(endpoint='/v2/sources?',
-                                   method='GET',
-                                   data={'language': 'en',
-                                         'apiKey': API_KEY},
-                                   response_check=news_func_alias,
-                                   http_conn_id='newsapi',
-                                   task_id='get_news_sources_task',
-                                   dag=dag,
-                                   depends_on_past=True,
-                                   retry_delay=timedelta(minutes=3),
-                                   retry_exponential_backoff=True)
-
-# detect existence of retrieved news data
-file_exists_sensor = FileSensor(filepath=NEWS_DIRECTORY,
-                                fs_conn_id="filesys",
-                                poke_interval=5,
-                                soft_fail=True,
-                                timeout=3600,
-                                task_id='file_sensor_task',
-                                dag=dag)
+# endpoint, with its 'language' parameter set to 'en'. The response is
+# served from an on-disk cache while fresh, and revalidated with a
+# conditional request (ETag / Last-Modified) once stale, to save API quota.
+get_news_task = PythonOperator(task_id='get_news_sources_task',
+                               provide_context=True,
+                               python_callable=news_func_alias,
+                               dag=dag,
+                               depends_on_past=True,
+                               retry_delay=timedelta(minutes=3),
+                               retry_exponential_backoff=True)
 
 # retrieve each sources headlines and perform subsequent
-# headline-extraction step
+# headline-extraction step. The news files to process are read straight
+# from the manifest the upstream task publishes in the news folder, once
+# it has finished writing them.
 headlines_task = PythonOperator(task_id='extract_headlines_task',
                                 provide_context=True,
                                 python_callable=headlines_func_alias,
@@ -153,12 +145,14 @@ end_task = DummyOperator(task_id='end', dag=dag)
 # create folder that acts as 'staging area' to store retrieved
 # data before processing. In a production system this would be
 # a real database.
-start_task >> datastore_creation_task >> get_news_task >> file_exists_sensor
+start_task >> datastore_creation_task >> get_news_task
 
-# ensure the data has been retrieved before beginning the ETL process.
+# the news data has been retrieved, and published in the news folder's
+# manifest, once get_news_task succeeds - so the ETL process can begin
+# straight away, without polling the filesystem for it.
 # all the news sources are retrieved, the top headlines extracted,
 # and the data transform by flattening into CSV.
-file_exists_sensor >> headlines_task >> flatten_csv_task
+get_news_task >> headlines_task >> flatten_csv_task
 
 # perform a file transfer operation, uploading the CSV data
 # into S3 from local.
@@ -0,0 +1,269 @@
+"""Tempus Data Engineer Challenge  - Test Helpers.
+
+Defines a local stand-in for the News API, serving the '/v2/sources' and
+'/v2/top-headlines' endpoints over HTTP/1.1 keep-alive connections, so the
+network code can be exercised - and benchmarked - against a real server
+without calling the News API itself.
+
+Latency, server errors and '429 Too Many Requests' responses can be
+injected, to measure how the fetching code copes with them, and the number
+of results a request can page through limited, like that of a News API
+developer plan.
+"""
+
+import collections
+import http.server
+import json
+import random
+import socketserver
+import threading
+import time
+import urllib.parse
+
+
+# default and largest number of articles per page of top-headlines, as
+# documented for the real News API.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def fake_sources(count=10) -> list:
+    """returns a list of dummy english news sources."""
+
+    return [{'id': 'source-{}'.format(index),
+             'name': 'Source {}'.format(index),
+             'description': 'Dummy news source {}'.format(index),
+             'url': 'https://example.com/source-{}'.format(index),
+             'category': 'general',
+             'language': 'en',
+             'country': 'us'}
+            for index in range(count)]
+
+
+# english news sources the stand-in server knows about by default
+FAKE_SOURCES = fake_sources()
+
+
+def fake_articles(source_id=None, keyword=None, count=3) -> list:
+    """returns a list of dummy top-headline articles of a news source, or
+    about a keyword."""
+
+    source_id = source_id or 'source-0'
+    title_subject = keyword or source_id
+
+    return [{'source': {'id': source_id, 'name': source_id.title()},
+             'author': 'Author {}'.format(index),
+             'title': '{} headline {}'.format(title_subject, index),
+             'description': 'Description {}'.format(index),
+             'url': 'https://example.com/{}/{}'.format(source_id, index),
+             'urlToImage': None,
+             'publishedAt': '2018-10-22T00:{:02d}:{:02d}Z'.format(
+                 (index // 60) % 60, index % 60),
+             'content': 'Content {}'.format(index)}
+            for index in range(count)]
+
+
+class FakeNewsAPIHandler(http.server.BaseHTTPRequestHandler):
+    """Handles News API requests made to the stand-in server."""
+
+    # keep connections open between requests, like the real News API
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections_opened += 1
+
+    def log_message(self, format, *args):
+        """keeps the test output quiet."""
+
+    def do_GET(self):
+        parts = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(parts.query))
+
+        with self.server.lock:
+            self.server.requests_seen.append((parts.path, params))
+            delay = self.server.latency
+            if self.server.latency_spread:
+                delay += self.server.random.uniform(
+                    0, self.server.latency_spread)
+            if self.server.slow_rate and \
+                    self.server.random.random() < self.server.slow_rate:
+                delay += self.server.slow_latency
+            delay += self.server.source_latencies.get(
+                params.get('sources'), 0.0)
+            roll = self.server.random.random()
+
+        if delay:
+            time.sleep(delay)
+
+        if parts.path in self.server.redirects:
+            location = self.server.redirects[parts.path]
+            if parts.query:
+                location += '?' + parts.query
+            self.send_json(301, {'status': 'error', 'code': 'moved'},
+                           {'Location': location})
+        elif not params.get('apiKey'):
+            self.send_json(401, {'status': 'error',
+                                 'code': 'apiKeyMissing'})
+        elif roll < self.server.throttle_rate:
+            self.send_json(429, {'status': 'error', 'code': 'rateLimited'},
+                           {'Retry-After': str(self.server.retry_after)})
+        elif roll < self.server.throttle_rate + self.server.error_rate:
+            self.send_json(500, {'status': 'error',
+                                 'code': 'unexpectedError'})
+        elif parts.path == '/v2/sources':
+            self.send_json(200, {'status': 'ok',
+                                 'sources': self.server.sources})
+        elif parts.path == '/v2/top-headlines':
+            self.send_headlines(params)
+        else:
+            self.send_json(404, {'status': 'error', 'code': 'notFound'})
+
+    def send_headlines(self, params):
+        """responds with one page of top-headlines of a source or keyword."""
+
+        try:
+            page = int(params.get('page', 1))
+            page_size = int(params.get('pageSize', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            page, page_size = 0, 0
+        if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+            self.send_json(400, {'status': 'error',
+                                 'code': 'parameterInvalid'})
+            return
+
+        articles = fake_articles(params.get('sources'),
+                                 params.get('q'),
+                                 self.server.articles_per_source)
+        start = (page - 1) * page_size
+        if self.server.max_results is not None and \
+                start + page_size > self.server.max_results:
+            self.send_json(426, {'status': 'error',
+                                 'code': 'maximumResultsReached'})
+            return
+
+        self.send_json(200, {'status': 'ok',
+                             'totalResults': len(articles),
+                             'articles': articles[start:start + page_size]})
+
+    def send_json(self, status_code, data, headers=None):
+        with self.server.lock:
+            self.server.status_counts[status_code] += 1
+
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeNewsAPIServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Stand-in News API server, listening on a free local port.
+
+    Use it as a context manager; the server runs on a background thread
+    while the context is open, and `url` is its base url.
+
+    # Arguments:
+        :param latency: number of seconds each request is delayed by.
+        :type latency: float
+        :param latency_spread: upper bound of a random number of seconds
+            added to each request's latency.
+        :type latency_spread: float
+        :param slow_rate: fraction of requests further delayed by
+            slow_latency, making a long latency tail.
+        :type slow_rate: float
+        :param slow_latency: number of seconds the slow requests are
+            further delayed by.
+        :type slow_latency: float
+        :param source_latencies: number of seconds the requests of some
+            sources are further delayed by, keyed by source id.
+        :type source_latencies: dict
+        :param error_rate: fraction of requests answered with a '500
+            Internal Server Error'.
+        :type error_rate: float
+        :param throttle_rate: fraction of requests answered with a '429
+            Too Many Requests'.
+        :type throttle_rate: float
+        :param retry_after: the Retry-After header, in seconds, sent with
+            each '429 Too Many Requests' response.
+        :type retry_after: float
+        :param source_count: number of english news sources served.
+        :type source_count: int
+        :param articles_per_source: number of top-headlines of each source
+            or keyword, split into pages by the 'page' and 'pageSize'
+            parameters.
+        :type articles_per_source: int
+        :param redirects: paths the server redirects, with a '301 Moved
+            Permanently', to the path they are mapped to.
+        :type redirects: dict
+        :param max_results: number of results a request can page through;
+            pages reaching past it are answered with a '426 Upgrade
+            Required'. Unlimited if not set.
+        :type max_results: int
+        :param seed: seed of the random injection of latency and errors.
+        :type seed: int
+    """
+
+    daemon_threads = True
+
+    # accept bursts of concurrent connections without dropping any; the
+    # default backlog of 5 makes extra clients wait out a SYN retry.
+    request_queue_size = 128
+
+    def __init__(self,
+                 latency=0.0,
+                 latency_spread=0.0,
+                 slow_rate=0.0,
+                 slow_latency=0.0,
+                 source_latencies=None,
+                 error_rate=0.0,
+                 throttle_rate=0.0,
+                 retry_after=1,
+                 source_count=10,
+                 articles_per_source=3,
+                 redirects=None,
+                 max_results=None,
+                 seed=0):
+        super().__init__(('127.0.0.1', 0), FakeNewsAPIHandler)
+        self.latency = latency
+        self.latency_spread = latency_spread
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.source_latencies = dict(source_latencies or {})
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.sources = fake_sources(source_count)
+        self.articles_per_source = articles_per_source
+        self.redirects = dict(redirects or {})
+        self.max_results = max_results
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.requests_seen = []
+        self.status_counts = collections.Counter()
+        self.connections_opened = 0
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def handle_error(self, request, client_address):
+        """ignores clients hanging up mid-request, as cancelled requests
+        do, rather than printing their tracebacks."""
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
@@ -0,0 +1,161 @@
+"""Tempus Data Engineer Challenge  - Benchmark Helpers.
+
+Defines a harness running the headline retrieval of the DAG pipelines end
+to end against the local stand-in News API server, and reporting how long
+it took and how many requests it needed - so changes to concurrency,
+connection pooling and retries can be measured.
+"""
+
+import importlib
+import os
+import time
+
+from airflow.models import DAG
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+
+# the two copies of the storage module: the one the tests import through
+# the 'dags' package, and the one the operations import as 'challenge'.
+STORAGE_MODULES = ['challenge.storage.filestorage_operations',
+                   'dags.challenge.storage.filestorage_operations']
+
+
+def isolate_home(monkeypatch, home):
+    """points the datastore folders of both copies of the storage module
+    at a temporary home directory."""
+
+    for name in STORAGE_MODULES:
+        module = importlib.import_module(name)
+        monkeypatch.setattr(module, 'HOME_DIRECTORY', str(home))
+
+
+def use_server(monkeypatch, server, rate=1000, max_concurrency=None):
+    """points the News API calls at the stand-in server, under a shared
+    rate limiter loose enough that it does not hide the server's speed."""
+
+    monkeypatch.setenv('NEWS_API_URL', server.url)
+    monkeypatch.setenv('NEWS_API_KEY', 'benchmark-key')
+
+    limiter = c.RateLimiter(rate=rate, burst=rate,
+                            max_concurrency=max_concurrency)
+    for name in ['challenge', 'dags.challenge']:
+        rate_limiter_class = importlib.import_module(name).RateLimiter
+        monkeypatch.setattr(rate_limiter_class, '_shared', limiter)
+
+
+def airflow_context(pipeline_name) -> dict:
+    """returns the parts of an airflow context the operations read."""
+
+    dag = MagicMock(spec=DAG)
+    dag.dag_id = pipeline_name
+
+    return {'dag': dag}
+
+
+def run_headlines_benchmark(server,
+                            pipeline_name="tempus_challenge_dag",
+                            sequential=False):
+    """runs NetworkOperations.get_news_headlines end to end against the
+    stand-in server, for all the news sources it serves - or, if
+    sequential, FileStorage.write_source_headlines_to_file alone, which
+    requests the sources one after another.
+
+    The datastore folders are created, and the news sources json published
+    in the news folder, as the upstream tasks would; the home directory and
+    News API url must already be set up (see isolate_home and use_server).
+
+    Returns a dictionary of measurements of the run.
+    """
+
+    news_dir = c.FileStorage.get_news_directory(pipeline_name)
+    headlines_dir = c.FileStorage.get_headlines_directory(pipeline_name)
+    os.makedirs(news_dir, exist_ok=True)
+    os.makedirs(headlines_dir, exist_ok=True)
+
+    c.FileStorage.write_json_to_file({'status': 'ok',
+                                      'sources': server.sources},
+                                     news_dir,
+                                     'english_news_sources')
+
+    requests_before = len(server.requests_seen)
+    connections_before = server.connections_opened
+
+    name = "get_news_headlines"
+    start = time.monotonic()
+    if sequential:
+        name = "write_source_headlines_to_file"
+        status = c.FileStorage.write_source_headlines_to_file(
+            [source['id'] for source in server.sources],
+            [source['name'] for source in server.sources],
+            headlines_dir,
+            os.environ['NEWS_API_KEY'])
+    else:
+        status = c.NetworkOperations.get_news_headlines(
+            **airflow_context(pipeline_name))
+    wall_time = time.monotonic() - start
+
+    written = c.FileStorage.manifest_filenames(headlines_dir, '.json')
+    failures = c.FileStorage.read_failure_ledger(headlines_dir)
+
+    return report(name,
+                  {'status': status,
+                   'sources': len(server.sources),
+                   'written': len(written),
+                   'failed': len(failures),
+                   'requests': len(server.requests_seen) - requests_before,
+                   'connections': (server.connections_opened -
+                                   connections_before),
+                   'wall_time': wall_time})
+
+
+def run_concurrent_benchmark(server, engine=None):
+    """retrieves the top-headlines of all the news sources the stand-in
+    server serves with NetworkOperations.get_headlines_concurrently.
+
+    Returns a dictionary of measurements of the run.
+    """
+
+    source_ids = [source['id'] for source in server.sources]
+    requests_before = len(server.requests_seen)
+    connections_before = server.connections_opened
+
+    start = time.monotonic()
+    results = c.NetworkOperations.get_headlines_concurrently(
+        source_ids=source_ids,
+        api_key='benchmark-key',
+        engine=engine)
+    wall_time = time.monotonic() - start
+
+    written = [response for response in results['sources'].values()
+               if getattr(response, 'status_code', None) == 200]
+
+    return report("get_headlines_concurrently",
+                  {'status': len(written) == len(source_ids),
+                   'sources': len(source_ids),
+                   'written': len(written),
+                   'failed': len(source_ids) - len(written),
+                   'requests': len(server.requests_seen) - requests_before,
+                   'connections': (server.connections_opened -
+                                   connections_before),
+                   'wall_time': wall_time})
+
+
+def report(name, measurements) -> dict:
+    """adds the throughput to a run's measurements and prints them, so they
+    show up in the output of `make benchmark`."""
+
+    wall_time = measurements['wall_time']
+    measurements['requests_per_second'] = None
+    if wall_time:
+        measurements['requests_per_second'] = (measurements['requests'] /
+                                               wall_time)
+
+    print("\n{}: {}".format(name, ", ".join(
+        "{}={}".format(key, round(value, 3)
+                       if isinstance(value, float) else value)
+        for key, value in measurements.items())))
+
+    return measurements
@@ -0,0 +1,519 @@
+"""Tempus Data Engineer Challenge  - Benchmark Helpers.
+
+Defines a harness running the extract, transform and upload stages of both
+DAG pipelines end to end, outside of Airflow, on synthetic news corpora of
+a configurable scale. Uploads go to a moto-mocked Amazon S3.
+
+Each stage's wall time, peak resident memory (RSS) and throughput are
+recorded in a machine-readable json report, which can be compared against
+a previous (baseline) report to catch performance regressions.
+"""
+
+import datetime
+import importlib
+import json
+import os
+import random
+import resource
+import string
+import threading
+import time
+
+import boto3
+import pandas as pd
+import requests
+
+from airflow.models import DAG
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+
+# scales of synthetic corpora the benchmarks can run at, selected with the
+# BENCHMARK_SCALES environment variable (a comma-separated list of names).
+CORPUS_SCALES = {
+    'small': {'sources': 20, 'articles': 20, 'content_length': 200},
+    'medium': {'sources': 100, 'articles': 50, 'content_length': 1000},
+    'large': {'sources': 400, 'articles': 100, 'content_length': 2000},
+}
+
+# keywords queried by the 'tempus_bonus_challenge_dag' pipeline
+PIPELINE_KEYWORDS = ['tempus', 'eric lefkofsky', 'cancer', 'immunotherapy']
+
+# how much slower than its baseline a stage may run before it counts as a
+# regression, overridable with the BENCHMARK_TOLERANCE environment variable.
+DEFAULT_TOLERANCE = 1.5
+
+# the copies of the modules whose globals the harness resets: the ones the
+# tests import through the 'dags' package, and the ones the operations
+# import as 'challenge'.
+PACKAGE_NAMES = ['challenge', 'dags.challenge']
+
+
+def selected_scales() -> list:
+    """returns the names of the corpus scales to benchmark."""
+
+    names = os.environ.get('BENCHMARK_SCALES', 'small')
+    return [name.strip() for name in names.split(',') if name.strip()]
+
+
+def synthetic_text(rng, length) -> str:
+    """returns a string of random words of about the given length."""
+
+    words = []
+    size = 0
+    while size < length:
+        word = ''.join(rng.choice(string.ascii_lowercase)
+                       for _ in range(rng.randint(2, 10)))
+        words.append(word)
+        size += len(word) + 1
+
+    return ' '.join(words)[:length]
+
+
+def synthetic_articles(rng, source_id, count, content_length) -> list:
+    """returns a list of synthetic top-headline articles of a source."""
+
+    published = datetime.datetime(2018, 10, 22)
+
+    return [{'source': {'id': source_id, 'name': source_id.title()},
+             'author': synthetic_text(rng, 20),
+             'title': synthetic_text(rng, 80),
+             'description': synthetic_text(rng, 200),
+             'url': 'https://example.com/{}/{}'.format(source_id, index),
+             'urlToImage': 'https://example.com/{}/{}.jpg'.format(source_id,
+                                                                  index),
+             'publishedAt': (published + datetime.timedelta(minutes=index))
+             .strftime('%Y-%m-%dT%H:%M:%SZ'),
+             'content': synthetic_text(rng, content_length)}
+            for index in range(count)]
+
+
+def synthetic_corpus(sources, articles, content_length, seed=0) -> dict:
+    """returns a synthetic news corpus: the sources json of the News API's
+    '/v2/sources' endpoint, and the top-headlines json of each source and
+    of each of the bonus pipeline's keywords."""
+
+    rng = random.Random(seed)
+    source_list = [{'id': 'source-{}'.format(index),
+                    'name': 'Source {}'.format(index),
+                    'language': 'en'}
+                   for index in range(sources)]
+
+    def headlines(source_id):
+        return {'status': 'ok',
+                'totalResults': articles,
+                'articles': synthetic_articles(rng, source_id, articles,
+                                               content_length)}
+
+    return {'sources': {'status': 'ok', 'sources': source_list},
+            'source_headlines': {source['id']: headlines(source['id'])
+                                 for source in source_list},
+            'keyword_headlines': {keyword: headlines(keyword)
+                                  for keyword in PIPELINE_KEYWORDS}}
+
+
+def json_response(data, url, params=None) -> requests.Response:
+    """returns a requests.Response object for a News API request, carrying
+    the given json data, as the http operators would hand it over."""
+
+    response = requests.Response()
+    response.status_code = requests.codes.ok
+    response.encoding = 'utf-8'
+    response._content = json.dumps(data).encode('utf-8')
+    response._content_consumed = True
+    response.request = requests.Request('GET', url, params=params).prepare()
+    response.url = response.request.url
+
+    return response
+
+
+def airflow_context(pipeline_name) -> dict:
+    """returns the parts of an airflow context the operations read."""
+
+    dag = MagicMock(spec=DAG)
+    dag.dag_id = pipeline_name
+
+    return {'dag': dag, 'execution_date': datetime.datetime(2018, 10, 22)}
+
+
+def isolate_environment(monkeypatch, home):
+    """points the datastores at a temporary home directory, gives boto3
+    dummy credentials for the mocked S3, and resets the DataFrame the
+    pipeline 1 transformation accumulates across calls."""
+
+    for name in PACKAGE_NAMES:
+        storage = importlib.import_module(name + '.storage.'
+                                          'filestorage_operations')
+        monkeypatch.setattr(storage, 'HOME_DIRECTORY', str(home))
+        transform = importlib.import_module(name + '.transform.'
+                                            'transform_operations')
+        monkeypatch.setattr(transform, 'merged_df',
+                            transform.pd.DataFrame())
+
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'benchmark')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+
+
+def current_rss() -> int:
+    """returns the resident memory of this process in bytes, or None where
+    /proc is unavailable."""
+
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return resident_pages * resource.getpagesize()
+
+
+class PeakRSSSampler:
+    """Context manager sampling the resident memory of this process on a
+    background thread, to find its peak while a stage runs.
+
+    Falls back to the process-lifetime peak from getrusage() where /proc is
+    unavailable (e.g. on macOS).
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        while True:
+            rss = current_rss()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+            if self.stopped.wait(self.interval):
+                break
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+        if not self.peak:
+            # ru_maxrss is in kilobytes on Linux, but bytes on macOS
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if os.uname().sysname != 'Darwin':
+                self.peak *= 1024
+
+
+def run_stage(name, records, func, *args, **kwargs) -> dict:
+    """runs one pipeline stage and returns its measurements."""
+
+    with PeakRSSSampler() as sampler:
+        start = time.monotonic()
+        result = func(*args, **kwargs)
+        wall_time = time.monotonic() - start
+
+    return {'stage': name,
+            'result': result,
+            'wall_time': wall_time,
+            'peak_rss_bytes': sampler.peak,
+            'records': records,
+            'records_per_second': records / wall_time if wall_time else None}
+
+
+def csv_records(csv_dir) -> int:
+    """returns the number of rows the transform stage published."""
+
+    return c.FileStorage.read_manifest(csv_dir)['total_records']
+
+
+def create_buckets():
+    """creates the s3 buckets of both pipelines in the mocked S3."""
+
+    s3 = boto3.resource('s3', region_name='us-east-1')
+    for pipeline_name in ['tempus_challenge_dag',
+                          'tempus_bonus_challenge_dag']:
+        bucket_name = c.NewsInfoDTO(pipeline_name).s3_bucket_name
+        s3.create_bucket(Bucket=bucket_name)
+
+
+def run_news_pipeline(corpus) -> list:
+    """runs the extract, transform and upload stages of the
+    'tempus_challenge_dag' pipeline on a synthetic corpus.
+
+    Extraction reads the source ids from the sources json and writes each
+    source's headlines json, as the extract_headlines_task does, but with
+    the headlines served from the corpus instead of the News API.
+    """
+
+    pipeline_name = 'tempus_challenge_dag'
+    info = c.NewsInfoDTO(pipeline_name)
+    for directory in [info.news_directory,
+                      info.headlines_directory,
+                      info.csv_directory]:
+        os.makedirs(directory, exist_ok=True)
+    c.FileStorage.write_json_to_file(corpus['sources'],
+                                     info.news_directory,
+                                     'english_news_sources')
+
+    url = c.NetworkOperations.news_api_url('/v2/top-headlines')
+    articles = sum(len(headlines['articles'])
+                   for headlines in corpus['source_headlines'].values())
+
+    def headline_func(source_id, api_key=None):
+        return json_response(corpus['source_headlines'][source_id], url,
+                             {'sources': source_id, 'apiKey': api_key})
+
+    def extract():
+        news_info = c.NewsInfoDTO(pipeline_name)
+        ids, names = c.ExtractOperations.extract_jsons_source_info(
+            news_info.news_files, news_info.news_directory)
+        return c.FileStorage.write_source_headlines_to_file(
+            ids, names, news_info.headlines_directory, 'benchmark-key',
+            headline_func=headline_func)
+
+    context = airflow_context(pipeline_name)
+
+    stages = [run_stage('extract', articles, extract)]
+    transform = c.TransformOperations.transform_headlines_to_csv
+    stages.append(run_stage('transform', articles, transform, **context))
+    stages.append(run_stage('upload', csv_records(info.csv_directory),
+                            c.UploadOperations.upload_csv_to_s3, **context))
+
+    return stages
+
+
+def reset_merged_frames():
+    """empties the DataFrame the pipeline 1 transformation accumulates
+    across calls, in both copies of the module."""
+
+    for name in PACKAGE_NAMES:
+        transform = importlib.import_module(name + '.transform.'
+                                            'transform_operations')
+        transform.merged_df = transform.pd.DataFrame()
+
+
+def run_schema_benchmark(corpus) -> list:
+    """merges the top-headlines of every source of a synthetic corpus into
+    one DataFrame, as the 'tempus_challenge_dag' transform stage does,
+    without and with the typed schema, then sorts it by source and
+    publication date and counts its articles per source.
+
+    Returns the measurements of each step for both schemas; the merge
+    steps also carry the memory used by the merged DataFrame.
+    """
+
+    merger = c.TransformOperations.transform_jsons_to_dataframe_merger
+    headlines = list(corpus['source_headlines'].values())
+    articles = sum(len(source['articles']) for source in headlines)
+
+    stages = []
+    for schema, typed in [('untyped', False), ('typed', True)]:
+        reset_merged_frames()
+        merge = run_stage('merge_' + schema, articles, merger, headlines,
+                          lambda headline: headline, typed_schema=typed)
+        frame = merge['result']
+        merge['frame_bytes'] = int(frame.memory_usage(deep=True).sum())
+        stages.append(merge)
+
+        sort_columns = ['news_source_name', 'news_publication_date']
+        stages.append(run_stage('sort_' + schema, articles,
+                                frame.sort_values, sort_columns))
+        stages.append(run_stage('group_' + schema, articles,
+                                lambda: frame.groupby('news_source_id',
+                                                      observed=True).size()))
+
+    reset_merged_frames()
+
+    return stages
+
+
+def keyword_file_headlines(corpus) -> dict:
+    """returns the top-headlines json of a keyword matching every article
+    of a synthetic corpus, as a keyword task writes it once all of its
+    pages are fetched."""
+
+    articles = [article
+                for headlines in corpus['source_headlines'].values()
+                for article in headlines['articles']]
+
+    return {'status': 'ok',
+            'totalResults': len(articles),
+            'articles': articles}
+
+
+def run_parse_benchmark(corpus) -> list:
+    """reads a keyword headlines file holding every article of a synthetic
+    corpus into its Article records three ways:
+
+    - parse_read_json: with Pandas' read_json(), the articles walked back
+      out of the DataFrame it infers.
+    - parse_dataframe: read as a dictionary, then wrapped in a single-row
+      DataFrame for extract_news_data_from_dataframe(), as the transforms
+      used to.
+    - parse_direct: read as a dictionary, with its articles turned straight
+      into records by extract_news_data(), as the transforms now do.
+
+    The file is then transformed into its csv by the keyword pipeline's
+    transformation, with its defaults.
+
+    Returns the measurements of each step.
+    """
+
+    pipeline_name = 'tempus_bonus_challenge_dag'
+    info = c.NewsInfoDTO(pipeline_name)
+    for directory in [info.headlines_directory, info.csv_directory]:
+        os.makedirs(directory, exist_ok=True)
+
+    headlines = keyword_file_headlines(corpus)
+    c.FileStorage.write_json_to_file(headlines,
+                                     info.headlines_directory,
+                                     'cancer_headlines',
+                                     '2018-10-22')
+    json_file = os.path.join(info.headlines_directory,
+                             '2018-10-22_cancer_headlines.json')
+    articles = len(headlines['articles'])
+    del headlines
+
+    extract = c.ExtractOperations
+    reader = c.FileStorage.json_to_dataframe_reader
+
+    def parse_read_json():
+        frame = pd.read_json(json_file)
+        return c.ArticleBatch.from_json_articles(frame['articles'].tolist())
+
+    def parse_dataframe():
+        return extract.extract_news_data_from_dataframe(
+            pd.DataFrame([reader(json_file)]))
+
+    def parse_direct():
+        return extract.extract_news_data(reader(json_file))
+
+    stages = [run_stage('parse_read_json', articles, parse_read_json),
+              run_stage('parse_dataframe', articles, parse_dataframe),
+              run_stage('parse_direct', articles, parse_direct)]
+
+    transform = c.TransformOperations.transform_key_headlines_to_csv
+    stages.append(run_stage('transform', articles, transform, json_file,
+                            '2018-10-22_cancer_top_headlines.csv'))
+
+    return stages
+
+
+def run_keyword_pipeline(corpus) -> list:
+    """runs the extract, transform and upload stages of the
+    'tempus_bonus_challenge_dag' pipeline on a synthetic corpus.
+
+    Extraction processes the keyword headlines responses as the
+    SimpleHttpOperators' response_check callbacks do, with the responses
+    served from the corpus instead of the News API.
+    """
+
+    pipeline_name = 'tempus_bonus_challenge_dag'
+    info = c.NewsInfoDTO(pipeline_name)
+    for directory in [info.news_directory,
+                      info.headlines_directory,
+                      info.csv_directory]:
+        os.makedirs(directory, exist_ok=True)
+
+    url = c.NetworkOperations.news_api_url('/v2/top-headlines')
+    responses = [json_response(headlines, url,
+                               {'q': keyword, 'apiKey': 'benchmark-key'})
+                 for keyword, headlines
+                 in corpus['keyword_headlines'].items()]
+    articles = sum(len(headlines['articles'])
+                   for headlines in corpus['keyword_headlines'].values())
+
+    def extract():
+        return all([c.NetworkOperations.get_news_keyword_headlines(response)
+                    for response in responses])
+
+    context = airflow_context(pipeline_name)
+
+    stages = [run_stage('extract', articles, extract)]
+    transform = c.TransformOperations.transform_headlines_to_csv
+    stages.append(run_stage('transform', articles, transform, **context))
+    stages.append(run_stage('upload', csv_records(info.csv_directory),
+                            c.UploadOperations.upload_csv_to_s3, **context))
+
+    return stages
+
+
+def report_path() -> str:
+    """returns the path the json report is written to, set with the
+    BENCHMARK_REPORT environment variable."""
+    return os.environ.get('BENCHMARK_REPORT', 'benchmark_report.json')
+
+
+def record_report(scale, pipeline_name, stages, path=None) -> dict:
+    """adds a benchmark run's stage measurements to the json report, and
+    prints them, so they show up in the output of `make benchmark`."""
+
+    path = path or report_path()
+
+    report = {'runs': {}}
+    if os.path.isfile(path):
+        with open(path, 'r') as report_file:
+            report = json.load(report_file)
+
+    run_key = '{}/{}'.format(pipeline_name, scale)
+    report['created_at'] = time.time()
+    report['runs'][run_key] = {
+        'scale': scale,
+        'corpus': CORPUS_SCALES[scale],
+        'stages': {stage['stage']: {key: value
+                                    for key, value in stage.items()
+                                    if key not in ('stage', 'result')}
+                   for stage in stages}}
+
+    with open(path + '.tmp', 'w') as report_file:
+        json.dump(report, report_file, indent=4, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+    for stage in stages:
+        print("\n{} {}: wall_time={:.3f}s peak_rss={:.1f}MB records={} "
+              "records_per_second={}".format(
+                  run_key, stage['stage'], stage['wall_time'],
+                  stage['peak_rss_bytes'] / 2 ** 20, stage['records'],
+                  round(stage['records_per_second'] or 0)))
+        if 'frame_bytes' in stage:
+            print("{} {}: frame_size={:.1f}MB".format(
+                run_key, stage['stage'], stage['frame_bytes'] / 2 ** 20))
+
+    return report['runs'][run_key]
+
+
+def regressions(run, baseline_run, tolerance=None) -> list:
+    """returns the stages of a run that took longer than `tolerance` times
+    their wall time in a baseline run of the same pipeline and scale."""
+
+    if tolerance is None:
+        tolerance = float(os.environ.get('BENCHMARK_TOLERANCE',
+                                         DEFAULT_TOLERANCE))
+
+    slow_stages = []
+    for name, stage in run['stages'].items():
+        baseline_stage = baseline_run['stages'].get(name)
+        if not baseline_stage:
+            continue
+        if stage['wall_time'] > baseline_stage['wall_time'] * tolerance:
+            slow_stages.append(name)
+
+    return slow_stages
+
+
+def baseline_run(pipeline_name, scale):
+    """returns a pipeline's run at a scale in the baseline report named by
+    the BENCHMARK_BASELINE environment variable, or None."""
+
+    path = os.environ.get('BENCHMARK_BASELINE')
+    if not path or not os.path.isfile(path):
+        return None
+
+    with open(path, 'r') as report_file:
+        report = json.load(report_file)
+
+    return report['runs'].get('{}/{}'.format(pipeline_name, scale))
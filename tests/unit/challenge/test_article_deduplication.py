@@ -0,0 +1,162 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the de-duplication of the news articles merged from
+the headlines of several sources.
+"""
+
+import importlib
+import pytest
+
+from dags import challenge as c
+
+
+def article(url, title="Headline", source_id="wired"):
+    """returns a dummy article record."""
+
+    return c.Article(source_id=source_id,
+                     source_name=source_id.title(),
+                     author=None,
+                     title=title,
+                     description=None,
+                     url=url,
+                     url_to_image=None,
+                     published_at="2018-10-11T23:33:03Z",
+                     content=None)
+
+
+def headlines_json(source_id, urls) -> dict:
+    """returns a dummy top-headlines json of a source, with an article per
+    url."""
+
+    return {'status': 'ok',
+            'totalResults': len(urls),
+            'articles': [{'source': {'id': source_id, 'name': source_id},
+                          'title': 'Headline {}'.format(index),
+                          'url': url,
+                          'publishedAt': '2018-10-11T23:33:03Z'}
+                         for index, url in enumerate(urls)]}
+
+
+@pytest.mark.deduplicationtests
+class TestArticleDeduplication:
+    """tests the de-duplication of merged news articles."""
+
+    def test_normalize_url_ignores_presentation_details(self):
+        """urls differing only in scheme, host case, 'www.', trailing slash,
+        fragment, tracking parameters or parameter order normalize
+        alike."""
+
+        # Arrange
+        urls = ["https://www.Wired.com/story/ai/?b=2&a=1",
+                "http://wired.com/story/ai?a=1&b=2&utm_source=twitter#top",
+                "https://WIRED.com/story/ai/?fbclid=xyz&a=1&b=2"]
+
+        # Act
+        result = {c.ArticleDeduplicator.normalize_url(url) for url in urls}
+
+        # Assert
+        assert result == {"wired.com/story/ai?a=1&b=2"}
+        assert c.ArticleDeduplicator.normalize_url(None) is None
+        assert (c.ArticleDeduplicator.normalize_url("https://wired.com/AI") !=
+                c.ArticleDeduplicator.normalize_url("https://wired.com/ai"))
+
+    def test_title_fingerprint_ignores_case_and_punctuation(self):
+        """titles differing only in case, punctuation and spacing share a
+        fingerprint."""
+
+        # Act
+        first = c.ArticleDeduplicator.title_fingerprint(
+            "Tempus Raises $200M -- Series F")
+        second = c.ArticleDeduplicator.title_fingerprint(
+            "tempus raises 200m: series  f")
+
+        # Assert
+        assert first == second == "tempus raises 200m series f"
+
+    def test_filter_batch_drops_articles_seen_before(self):
+        """articles whose url was seen in an earlier batch, or earlier in
+        the same batch, are dropped; articles without a url are kept."""
+
+        # Arrange
+        deduplicator = c.ArticleDeduplicator()
+        first = c.ArticleBatch([article("https://wired.com/a"),
+                                article("https://wired.com/b")])
+        second = c.ArticleBatch([article("http://www.wired.com/a/"),
+                                 article("https://wired.com/c"),
+                                 article("https://wired.com/c"),
+                                 article(None),
+                                 article(None)])
+
+        # Act
+        first_result = deduplicator.filter_batch(first)
+        second_result = deduplicator.filter_batch(second)
+
+        # Assert
+        assert len(first_result) == 2
+        assert [item.url for item in second_result] == [
+            "https://wired.com/c", None, None]
+        assert deduplicator.duplicates == 2
+
+    def test_titles_are_only_matched_when_asked_for(self, monkeypatch):
+        """articles with different urls but the same title are duplicates
+        only when titles are used."""
+
+        # Arrange
+        monkeypatch.delenv(c.DEDUPLICATE_ENV_VARIABLE, raising=False)
+        monkeypatch.setenv(c.DEDUPLICATE_TITLES_ENV_VARIABLE, "1")
+        batch = c.ArticleBatch([article("https://wired.com/a", "Big News"),
+                                article("https://bbc.co.uk/a", "BIG news!")])
+
+        # Act
+        by_url = c.ArticleDeduplicator().filter_batch(batch)
+        by_title = c.ArticleDeduplicator.from_environment().filter_batch(batch)
+
+        # Assert
+        assert len(by_url) == 2
+        assert len(by_title) == 1
+
+    def test_deduplication_can_be_turned_off(self, monkeypatch):
+        """the environment flag turns de-duplication off."""
+
+        # Arrange
+        monkeypatch.setenv(c.DEDUPLICATE_ENV_VARIABLE, "0")
+
+        # Act
+        result = c.ArticleDeduplicator.from_environment()
+
+        # Assert
+        assert result is None
+
+    def test_merger_drops_articles_shared_between_sources(self,
+                                                          monkeypatch):
+        """the merged DataFrame of several sources holds each article
+        once, and a source whose articles were all merged in already is
+        skipped."""
+
+        # Arrange
+        for name in ['challenge', 'dags.challenge']:
+            transform = importlib.import_module(name + '.transform.'
+                                                'transform_operations')
+            monkeypatch.setattr(transform, 'merged_df',
+                                transform.pd.DataFrame())
+        monkeypatch.delenv(c.DEDUPLICATE_ENV_VARIABLE, raising=False)
+        monkeypatch.delenv(c.DEDUPLICATE_TITLES_ENV_VARIABLE, raising=False)
+
+        headlines = [headlines_json('wired', ["https://wired.com/a",
+                                              "https://wired.com/b"]),
+                     headlines_json('google-news', ["https://wired.com/b/",
+                                                    "https://bbc.co.uk/c"]),
+                     headlines_json('reuters', ["https://wired.com/a"])]
+
+        merger = c.TransformOperations.transform_jsons_to_dataframe_merger
+
+        # Act
+        result = merger(headlines, lambda headline: headline)
+
+        # Assert
+        assert list(result['news_url']) == ["https://wired.com/a",
+                                            "https://wired.com/b",
+                                            "https://bbc.co.uk/c"]
+        assert list(result['news_source_id']) == ["wired",
+                                                  "wired",
+                                                  "google-news"]
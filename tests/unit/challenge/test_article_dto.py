@@ -0,0 +1,105 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the compact news article record 'Article' and its
+batch container 'ArticleBatch', which carry extracted articles from the
+extraction to the transformation of the headlines.
+"""
+
+import pandas as pd
+import pytest
+
+from dags import challenge as c
+
+
+def article_json(index) -> dict:
+    """returns a dummy article json object of a top-headlines response."""
+
+    return {'source': {'id': 'wired', 'name': 'Wired'},
+            'author': 'Author {}'.format(index),
+            'title': 'Headline {}'.format(index),
+            'description': 'Description {}'.format(index),
+            'url': 'https://example.com/{}'.format(index),
+            'urlToImage': None,
+            'publishedAt': '2018-10-11T23:33:03Z',
+            'content': 'Content {}'.format(index)}
+
+
+@pytest.mark.articletests
+class TestArticleDTO:
+    """tests the Article record and the ArticleBatch container."""
+
+    def test_article_from_json_maps_fields(self):
+        """an article json is mapped field by field onto the record, with
+        missing fields left as None."""
+
+        # Arrange
+        data = article_json(1)
+        del data['content']
+
+        # Act
+        result = c.Article.from_json(data)
+
+        # Assert
+        assert result.source_id == "wired"
+        assert result.source_name == "Wired"
+        assert result.title == "Headline 1"
+        assert result.url_to_image is None
+        assert result.published_at == "2018-10-11T23:33:03Z"
+        assert result.content is None
+
+    def test_batch_from_json_articles_honours_limit(self):
+        """a batch holds at most `limit` articles; an empty batch is
+        falsy."""
+
+        # Arrange
+        articles = [article_json(index) for index in range(5)]
+
+        # Act
+        result = c.ArticleBatch.from_json_articles(articles, limit=3)
+        empty = c.ArticleBatch.from_json_articles(None)
+
+        # Assert
+        assert len(result) == 3
+        assert [article.title for article in result] == ["Headline 0",
+                                                         "Headline 1",
+                                                         "Headline 2"]
+        assert not empty
+
+    def test_csv_columns_follow_explicit_mapping(self):
+        """each field's csv column comes from the explicit mapping, in
+        field order."""
+
+        # Act
+        result = c.ArticleBatch.csv_columns()
+
+        # Assert
+        assert result == ['news_source_id',
+                          'news_source_name',
+                          'news_author',
+                          'news_title',
+                          'news_description',
+                          'news_url',
+                          'news_image_url',
+                          'news_publication_date',
+                          'news_content']
+
+    def test_extracted_batch_transforms_to_dataframe(self):
+        """the batch extracted from a news dataframe is transformed into a
+        DataFrame with one row per article."""
+
+        # Arrange
+        articles = [article_json(index) for index in range(4)]
+        frame = pd.DataFrame([{'status': 'ok',
+                               'totalResults': len(articles),
+                               'articles': articles}])
+
+        # Act
+        batch = c.ExtractOperations.extract_news_data_from_dataframe(frame)
+        result = c.TransformOperations.transform_data_to_dataframe(batch)
+
+        # Assert
+        assert len(batch) == 4
+        assert len(result) == 4
+        assert list(result.columns) == c.ArticleBatch.csv_columns()
+        assert result['news_title'][3] == "Headline 3"
+        assert result['news_author'][0] == "Author 0"
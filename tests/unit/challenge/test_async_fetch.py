@@ -0,0 +1,240 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the asyncio fetch engine making concurrent remote
+calls to the News API in the DAGs, run against a local stand-in server.
+"""
+
+import os
+import pytest
+import requests
+import time
+
+from dags import challenge as c
+
+from fake_newsapi import FakeNewsAPIServer
+
+
+def fast_rate_limiter():
+    """returns a rate limiter loose enough not to slow the tests down."""
+    return c.RateLimiter(rate=1000, burst=1000, max_concurrency=50)
+
+
+@pytest.mark.asynctests
+class TestAsyncFetchEngine:
+    """tests concurrent retrieval of news data over pooled connections."""
+
+    def test_fetch_many_sync_returns_responses_in_order(self):
+        """every request's response is returned, in request order."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer() as server:
+            url = server.url + "/v2/top-headlines"
+            request_list = [(url, {'sources': 'source-{}'.format(index),
+                                   'apiKey': '543'})
+                            for index in range(5)]
+
+        # Act
+            result = engine.fetch_many_sync(request_list)
+
+        # Assert
+        assert [response.status_code for response in result] == [200] * 5
+        sources = [response.json()['articles'][0]['source']['id']
+                   for response in result]
+        assert sources == ['source-{}'.format(index) for index in range(5)]
+
+    def test_fetch_many_sync_reuses_pooled_connections(self):
+        """many requests are sent over no more connections than the
+        engine allows in flight at once."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(max_connections=4,
+                                    rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer() as server:
+            url = server.url + "/v2/top-headlines"
+            request_list = [(url, {'sources': 'source-1', 'apiKey': '543'})
+                            for _ in range(40)]
+
+        # Act
+            result = engine.fetch_many_sync(request_list)
+            connections_opened = server.connections_opened
+
+        # Assert
+        assert len(result) == 40
+        assert all(response.status_code == 200 for response in result)
+        assert connections_opened <= 4
+
+    def test_fetch_many_sync_runs_requests_concurrently(self):
+        """slow requests overlap rather than running one after another."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(max_connections=10,
+                                    rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer(latency=0.2) as server:
+            url = server.url + "/v2/top-headlines"
+            request_list = [(url, {'sources': 'source-1', 'apiKey': '543'})
+                            for _ in range(10)]
+
+        # Act
+            start = time.monotonic()
+            result = engine.fetch_many_sync(request_list)
+            elapsed = time.monotonic() - start
+
+        # Assert
+        assert all(response.status_code == 200 for response in result)
+        assert elapsed < 1.0
+
+    def test_fetch_many_sync_deadline_cancels_requests(self):
+        """requests still in flight when the deadline passes are cancelled
+        and reported as timeouts."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer(latency=1.0) as server:
+            url = server.url + "/v2/top-headlines"
+            request_list = [(url, {'sources': 'source-1', 'apiKey': '543'})
+                            for _ in range(3)]
+
+        # Act
+            start = time.monotonic()
+            result = engine.fetch_many_sync(request_list, deadline=0.2)
+            elapsed = time.monotonic() - start
+
+        # Assert
+        assert elapsed < 1.0
+        assert all(isinstance(error, requests.exceptions.Timeout)
+                   for error in result)
+        assert engine.session is None
+
+    def test_fetch_read_timeout_fails(self):
+        """a request the server does not answer in time fails with a read
+        timeout."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(read_timeout=0.1,
+                                    rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer(latency=0.5) as server:
+            url = server.url + "/v2/sources"
+
+        # Act
+            result = engine.fetch_many_sync([(url, {'apiKey': '543'})])
+
+        # Assert
+        assert isinstance(result[0], requests.exceptions.ReadTimeout)
+
+    def test_fetch_connection_refused_fails(self):
+        """a request to a server that is not listening fails with a
+        connection error."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+        with FakeNewsAPIServer() as server:
+            url = server.url + "/v2/sources"
+
+        # Act
+        result = engine.fetch_many_sync([(url, {'apiKey': '543'})])
+
+        # Assert
+        assert isinstance(result[0], requests.exceptions.ConnectionError)
+
+    def test_fetch_follows_redirects(self):
+        """a redirected request is answered by the page it is redirected
+        to, like a request made with requests.get()."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer(redirects={'/v1/sources':
+                                          '/v2/sources'}) as server:
+            url = server.url + "/v1/sources"
+
+        # Act
+            result = engine.fetch_many_sync([(url, {'apiKey': '543'})])
+
+        # Assert
+        assert result[0].status_code == requests.codes.ok
+        assert result[0].url.startswith(server.url + "/v2/sources")
+        assert result[0].json()['status'] == 'ok'
+
+    def test_fetch_goes_through_environment_proxy(self, monkeypatch):
+        """requests are sent through the proxy set in the environment."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+        for name in ['NO_PROXY', 'no_proxy']:
+            monkeypatch.delenv(name, raising=False)
+
+        with FakeNewsAPIServer() as proxy:
+            monkeypatch.setenv('HTTP_PROXY', proxy.url)
+            url = "http://newsapi.invalid/v2/sources"
+
+        # Act
+            result = engine.fetch_many_sync([(url, {'apiKey': '543'})])
+            paths = [path for path, _ in proxy.requests_seen]
+
+        # Assert
+        assert result[0].status_code == requests.codes.ok
+        assert paths == ['/v2/sources']
+
+    def test_fetch_returns_replayable_responses(self):
+        """the body of a response can be read again, and streamed to a
+        file, after the engine has returned it."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer() as server:
+            url = server.url + "/v2/sources"
+
+        # Act
+            result = engine.fetch_many_sync([(url, {'apiKey': '543'})])
+
+        # Assert
+        assert c.is_streamable(result[0]) is True
+        assert b''.join(result[0].iter_content(16)) == result[0].content
+
+    def test_get_headlines_concurrently_maps_sources_and_keywords(self,
+                                                                  tmpdir):
+        """the headlines of each source and keyword are mapped to them."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+        statistics = c.SourceStatistics(os.path.join(str(tmpdir),
+                                                     "sources.json"))
+
+        with FakeNewsAPIServer() as server:
+            url = server.url + "/v2/top-headlines"
+
+        # Act
+            result = c.NetworkOperations.get_headlines_concurrently(
+                source_ids=['source-1', 'source-2'],
+                keywords=['tempus'],
+                api_key='543',
+                url_endpoint=url,
+                engine=engine,
+                statistics=statistics)
+            requests_seen = sorted(params.get('sources', params.get('q'))
+                                   for _, params in server.requests_seen)
+
+        # Assert
+        assert sorted(result['sources']) == ['source-1', 'source-2']
+        assert result['sources']['source-2'].json()['status'] == 'ok'
+        tempus_articles = result['keywords']['tempus'].json()['articles']
+        assert tempus_articles[0]['title'].startswith('tempus')
+        assert requests_seen == ['source-1', 'source-2', 'tempus']
+
+    def test_get_headlines_concurrently_no_requests_fails(self):
+        """a call with no sources nor keywords fails."""
+
+        # Act
+        with pytest.raises(ValueError) as err:
+            c.NetworkOperations.get_headlines_concurrently(api_key='543')
+
+        # Assert
+        actual_message = str(err.value)
+        assert "No news sources or keywords" in actual_message
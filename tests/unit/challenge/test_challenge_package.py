@@ -0,0 +1,166 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the lazy loading of the challenge package, which
+keeps heavy third-party imports out of Airflow's DAG parsing.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import pytest
+
+from dags import challenge as c
+
+# ensures the measured import times show up in the test output
+log = logging.getLogger(__name__)
+
+
+# path to the 'dags' folder, which Airflow places on the PYTHONPATH and
+# from which the DAG files import the top-level `challenge` package.
+DAGS_DIRECTORY = os.path.dirname(os.path.dirname(c.__file__))
+
+# third-party libraries that only the transform, extract and upload
+# operations need, and which should therefore not be imported when a DAG
+# file is parsed.
+HEAVY_MODULES = ['pandas', 'numpy', 'boto3', 'botocore']
+
+
+def import_time_report(statement) -> dict:
+    """runs a python import statement in a fresh interpreter with
+    `-X importtime` and returns every module the statement imported, mapped
+    to its cumulative import time in microseconds.
+
+    `-X importtime` is only honoured from Python 3.7, on older interpreters
+    the modules are still reported (from sys.modules) but with no timing.
+    """
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([DAGS_DIRECTORY,
+                                         env.get('PYTHONPATH', '')])
+
+    script = "{}; import sys; print('\\n'.join(sys.modules))".format(statement)
+    process = subprocess.run([sys.executable, '-X', 'importtime',
+                              '-c', script],
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             universal_newlines=True,
+                             env=env,
+                             check=True)
+
+    report = {name: None for name in process.stdout.split()}
+
+    # each line is of the form 'import time: self | cumulative | name'
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line.split(':', 1)[1].split('|')
+        if not fields[1].strip().isdigit():
+            continue
+        report[fields[2].strip()] = int(fields[1])
+
+    # log the measurement, so that it shows up in the pytest output
+    import_time = report.get('challenge')
+    log.info("import time of {}: {}us".format(statement, import_time))
+
+    return report
+
+
+@pytest.mark.packagetests
+class TestChallengePackage:
+    """tests the lazy loading of the operations in the challenge package."""
+
+    def test_import_challenge_does_not_load_heavy_modules(self):
+        """importing the challenge package imports none of pandas, numpy
+        or boto3."""
+
+        # Act
+        report = import_time_report("import challenge")
+
+        # Assert
+        loaded = [name for name in report
+                  if name.split('.')[0] in HEAVY_MODULES]
+        assert 'challenge' in report
+        assert not loaded
+
+    def test_operations_access_loads_heavy_modules(self):
+        """accessing the transform operations on the package is what
+        imports pandas; the import-time report picks this up."""
+
+        # Act
+        report = import_time_report("import challenge; "
+                                    "challenge.TransformOperations")
+
+        # Assert
+        assert 'pandas' in report
+        assert 'challenge.transform.transform_operations' in report
+
+    def test_dag_parse_imports_do_not_load_heavy_modules(self):
+        """importing the operations the DAG files reference at parse time
+        imports none of pandas, numpy or boto3."""
+
+        # Arrange
+        statement = ("import challenge; "
+                     "from challenge.network.network_operations "
+                     "import NetworkOperations; "
+                     "from challenge.storage.filestorage_operations "
+                     "import FileStorage")
+
+        # Act
+        report = import_time_report(statement)
+
+        # Assert
+        loaded = [name for name in report
+                  if name.split('.')[0] in HEAVY_MODULES]
+        assert not loaded
+
+    def test_hedging_flag_does_not_load_transform(self):
+        """reading the request hedging flag, as the headlines task does,
+        imports neither the transform sub-package nor pandas."""
+
+        # Arrange
+        statement = ("import challenge; "
+                     "challenge.RequestHedger.requested()")
+
+        # Act
+        report = import_time_report(statement)
+
+        # Assert
+        assert 'challenge.transform' not in report
+        assert 'pandas' not in report
+
+    def test_watermarks_flag_does_not_load_transform(self):
+        """reading the headline watermarks flag, as the network and storage
+        tasks do, imports neither the transform sub-package nor pandas."""
+
+        # Arrange
+        statement = ("import challenge; "
+                     "challenge.HeadlineWatermarks.requested()")
+
+        # Act
+        report = import_time_report(statement)
+
+        # Assert
+        assert 'challenge.transform' not in report
+        assert 'pandas' not in report
+
+    def test_lazy_attribute_resolves_operations_class(self):
+        """accessing an operations class on the package imports it."""
+
+        # Act
+        result = c.TransformOperations
+
+        # Assert
+        assert result.__name__ == "TransformOperations"
+        assert "TransformOperations" in dir(c)
+
+    def test_unknown_attribute_fails(self):
+        """accessing a name the package does not expose raises an error."""
+
+        # Act
+        with pytest.raises(AttributeError) as err:
+            c.NoSuchOperations
+
+        # Assert
+        actual_message = str(err.value)
+        assert "has no attribute NoSuchOperations" in actual_message
@@ -280,6 +280,31 @@ class TestExtractOperations:
             empty_dict = False
         assert empty_dict is False
 
+    def test_extract_news_data_matches_dataframe_extraction(self):
+        """extraction straight from the news json gives the same articles
+        as extraction from its single-row dataframe, up to its
+        'totalResults'."""
+
+        # Arrange
+        json_data = {"status": "ok",
+                     "totalResults": 2,
+                     "articles": [{"source": {"id": "wired",
+                                              "name": "Wired"},
+                                   "title": "Headline {}".format(index),
+                                   "url": "https://wired.com/{}".format(
+                                       index)}
+                                  for index in range(3)]}
+
+        # Act
+        result = c.ExtractOperations.extract_news_data(json_data)
+        frame_result = c.ExtractOperations.extract_news_data_from_dataframe(
+            pd.DataFrame([json_data]))
+
+        # Assert
+        assert len(result) == 2
+        assert result.articles == frame_result.articles
+        assert result.articles[1].title == "Headline 1"
+
     def test_extract_news_data_from_dataframe_no_articles_fails(self):
         """extraction of information from news dataframe fails
         if there are no news articles.
@@ -509,3 +534,27 @@ class TestExtractOperations:
         # Assert
         actual_message = str(err.value)
         assert "Query param not found in URL" in actual_message
+
+    def test_extract_news_data_batches_reads_articles_in_batches(self,
+                                                                 tmpdir):
+        """the articles of a json file are extracted in batches of the
+        given size, up to its 'totalResults'."""
+
+        # Arrange
+        articles = [{"source": {"id": "wired", "name": "Wired"},
+                     "title": "Headline {}".format(index)}
+                    for index in range(7)]
+        json_file = os.path.join(str(tmpdir), "wired_headlines.json")
+        with open(json_file, "w") as outputfile:
+            json.dump({"status": "ok",
+                       "totalResults": 5,
+                       "articles": articles}, outputfile)
+
+        # Act
+        batches = list(c.ExtractOperations.extract_news_data_batches(
+            json_file, batch_size=2))
+
+        # Assert
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[2].articles[0].title == "Headline 4"
+        assert batches[0].articles[0].source_id == "wired"
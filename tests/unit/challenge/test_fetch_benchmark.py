@@ -0,0 +1,178 @@
+"""Tempus Data Engineer Challenge  - Benchmarks.
+
+Defines benchmarks of the headline retrieval of the DAG pipelines, run end
+to end against the local stand-in News API server with injected latency,
+server errors and rate limiting. Run them with `make benchmark`.
+"""
+
+import pytest
+
+from dags import challenge as c
+
+from fake_newsapi import FakeNewsAPIServer
+
+import newsapi_benchmark as bench
+
+
+@pytest.mark.benchmarktests
+class TestFetchBenchmark:
+    """measures the throughput of News API headline retrieval."""
+
+    def test_benchmark_headlines_baseline(self, monkeypatch, tmpdir):
+        """retrieves the headlines of every source from a fast, reliable
+        server."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+
+        with FakeNewsAPIServer(source_count=50) as server:
+            bench.use_server(monkeypatch, server)
+
+        # Act
+            result = bench.run_headlines_benchmark(server)
+
+        # Assert
+        assert result['status'] is True
+        assert result['written'] == 50
+        assert result['requests'] == 50
+
+    def test_benchmark_headlines_with_latency(self, monkeypatch, tmpdir):
+        """retrieves the headlines of every source from a server taking
+        20ms to answer each request."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+
+        with FakeNewsAPIServer(latency=0.02, source_count=30) as server:
+            bench.use_server(monkeypatch, server)
+
+        # Act
+            result = bench.run_headlines_benchmark(server)
+
+        # Assert
+        assert result['written'] == 30
+
+    def test_benchmark_paged_headlines_with_latency(self,
+                                                    monkeypatch,
+                                                    tmpdir):
+        """retrieves the headlines of sources with five pages of articles
+        each from a server taking 20ms to answer each request; the pages
+        after the first are requested concurrently."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+
+        with FakeNewsAPIServer(latency=0.02,
+                               source_count=10,
+                               articles_per_source=450) as server:
+            bench.use_server(monkeypatch, server)
+
+        # Act
+            result = bench.run_headlines_benchmark(server)
+
+        # Assert
+        assert result['written'] == 10
+        assert result['requests'] == 50
+
+    def test_benchmark_headlines_with_failures(self, monkeypatch, tmpdir):
+        """retrieves the headlines of every source from a server failing
+        or rate limiting some of the requests; retries recover them."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+
+        with FakeNewsAPIServer(error_rate=0.1,
+                               throttle_rate=0.05,
+                               retry_after=0.05,
+                               source_count=30,
+                               seed=7) as server:
+            bench.use_server(monkeypatch, server)
+
+        # Act
+            result = bench.run_headlines_benchmark(server)
+            status_counts = dict(server.status_counts)
+
+        # Assert
+        assert result['written'] + result['failed'] == 30
+        assert result['requests'] > 30
+        assert status_counts.get(500) or status_counts.get(429)
+
+    def test_benchmark_concurrent_headlines_with_latency(self,
+                                                         monkeypatch,
+                                                         tmpdir):
+        """retrieves the same headlines as the sequential latency
+        benchmark, one after another and then concurrently; the concurrent
+        fetch finishes several times faster."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+
+        with FakeNewsAPIServer(latency=0.02, source_count=30) as server:
+            bench.use_server(monkeypatch, server)
+            sequential = bench.run_headlines_benchmark(server,
+                                                       sequential=True)
+            engine = c.AsyncFetchEngine(max_connections=10)
+
+        # Act
+            result = bench.run_concurrent_benchmark(server, engine)
+
+        # Assert
+        assert result['written'] == 30
+        assert result['connections'] <= 10
+        assert result['wall_time'] < sequential['wall_time'] / 2
+
+    def test_benchmark_hedged_headlines_with_slow_tail(self,
+                                                       monkeypatch,
+                                                       tmpdir):
+        """retrieves the headlines of every source from a server answering
+        one request in ten half a second late, without and then with
+        hedging; the first run's latencies set the hedging delay of the
+        second, whose slow requests are answered by their duplicates."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+        monkeypatch.setenv(c.HEDGE_PERCENTILE_ENV_VARIABLE, "75")
+
+        with FakeNewsAPIServer(latency=0.02,
+                               slow_rate=0.1,
+                               slow_latency=0.5,
+                               source_count=30,
+                               seed=3) as server:
+            bench.use_server(monkeypatch, server)
+            monkeypatch.setenv(c.HEDGING_ENV_VARIABLE, "1")
+            unhedged = bench.run_headlines_benchmark(server)
+
+        # Act
+            result = bench.run_headlines_benchmark(server)
+
+        # Assert
+        assert unhedged['written'] == result['written'] == 30
+        assert result['requests'] > 30
+        assert result['wall_time'] < unhedged['wall_time']
+
+    def test_benchmark_scheduled_concurrent_headlines(self,
+                                                      monkeypatch,
+                                                      tmpdir):
+        """retrieves the headlines of sources concurrently over four
+        connections, where the last two listed sources take 0.4s to answer
+        and the others 50ms; the second run starts the slow ones first,
+        from the statistics of the first, and finishes sooner."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+
+        with FakeNewsAPIServer(latency=0.05,
+                               source_count=20,
+                               source_latencies={'source-18': 0.35,
+                                                 'source-19': 0.35}) as server:
+            bench.use_server(monkeypatch, server)
+            unscheduled = bench.run_concurrent_benchmark(
+                server, c.AsyncFetchEngine(max_connections=4))
+
+        # Act
+            result = bench.run_concurrent_benchmark(
+                server, c.AsyncFetchEngine(max_connections=4))
+
+        # Assert
+        assert unscheduled['written'] == result['written'] == 20
+        assert result['wall_time'] < unscheduled['wall_time']
@@ -0,0 +1,181 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the timeouts and the run-level deadline of the
+remote calls made to the News API.
+"""
+
+import json
+import os
+import pytest
+import requests
+import time
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+# the copy of the package the operations import, which holds the deadline
+# in force that they read.
+import challenge as operations_package
+
+from fake_newsapi import FakeNewsAPIServer
+
+
+class FakeClock:
+    """clock whose time only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fast_rate_limiter(timeout=None):
+    """returns a rate limiter loose enough not to slow the tests down."""
+    return c.RateLimiter(rate=1000, burst=1000, max_concurrency=50,
+                         timeout=timeout)
+
+
+@pytest.mark.deadlinetests
+class TestFetchDeadline:
+    """tests the timeouts and the run-level deadline of News API calls."""
+
+    def test_timeout_is_cut_down_to_time_left(self):
+        """a call's timeouts never go past the deadline, and no time is
+        given once it has passed."""
+
+        # Arrange
+        clock = FakeClock()
+        deadline = c.FetchDeadline(10, clock=clock)
+
+        # Act
+        clock.now = 4
+        early = deadline.timeout((3.05, 30))
+        clock.now = 8
+        late = deadline.timeout((3.05, 30))
+        unbounded = deadline.timeout(None)
+        clock.now = 10
+
+        # Assert
+        assert early == (3.05, 6)
+        assert late == (2, 2)
+        assert unbounded == 2
+        assert deadline.expired()
+        with pytest.raises(c.DeadlineExceeded):
+            deadline.timeout((3.05, 30))
+
+    def test_rate_limiter_gives_every_call_a_timeout(self):
+        """calls are made with the limiter's timeouts, cut down to the time
+        left under a deadline; none is made once it has passed."""
+
+        # Arrange
+        clock = FakeClock()
+        limiter = fast_rate_limiter(timeout=(5, 20))
+        http_method = MagicMock(return_value=MagicMock(status_code=200))
+        deadline = operations_package.FetchDeadline(12, clock=clock)
+
+        # Act
+        limiter.call(http_method, "https://newsapi.org/v2")
+        plain_timeout = http_method.call_args[1]['timeout']
+
+        with operations_package.fetch_deadline(deadline):
+            clock.now = 4
+            limiter.call(http_method, "https://newsapi.org/v2")
+            deadline_timeout = http_method.call_args[1]['timeout']
+
+            clock.now = 12
+            with pytest.raises(operations_package.DeadlineExceeded):
+                limiter.call(http_method, "https://newsapi.org/v2")
+
+        # Assert
+        assert plain_timeout == (5, 20)
+        assert deadline_timeout == (5, 8)
+        assert http_method.call_count == 2
+        assert operations_package.active_deadline() is None
+
+    def test_hung_request_fails_with_read_timeout(self):
+        """a request the server does not answer in time fails with a read
+        timeout rather than blocking."""
+
+        # Arrange
+        limiter = fast_rate_limiter(timeout=(1, 0.2))
+
+        with FakeNewsAPIServer(latency=2.0) as server:
+            url = server.url + "/v2/top-headlines"
+
+        # Act
+            start = time.monotonic()
+            with pytest.raises(requests.exceptions.ReadTimeout):
+                limiter.call(requests.get, url, params={'q': 'cancer',
+                                                        'apiKey': '543'})
+            elapsed = time.monotonic() - start
+
+        # Assert
+        assert elapsed < 1.0
+
+    def test_fetch_engine_cancels_requests_at_run_deadline(self):
+        """the requests still in flight when the run deadline passes are
+        cancelled, and fail with a timeout."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+        deadline = operations_package.FetchDeadline(0.3)
+
+        with FakeNewsAPIServer(latency=2.0) as server:
+            url = server.url + "/v2/top-headlines"
+            request_list = [(url, {'sources': 'source-{}'.format(index),
+                                   'apiKey': '543'})
+                            for index in range(3)]
+
+        # Act
+            start = time.monotonic()
+            with operations_package.fetch_deadline(deadline):
+                results = engine.fetch_many_sync(request_list)
+            elapsed = time.monotonic() - start
+
+        # Assert
+        assert all(isinstance(result, requests.exceptions.Timeout)
+                   for result in results)
+        assert elapsed < 1.5
+
+    def test_sources_past_the_deadline_are_left_out(self, tmpdir):
+        """once the run deadline has passed the remaining sources are not
+        requested; the headlines fetched in time are written, and the
+        others recorded in a failure ledger flagged as cut short."""
+
+        # Arrange
+        clock = FakeClock()
+        requested = []
+
+        def headline_func(source_id, api_key=None):
+            requested.append(source_id)
+            clock.now += 4
+            response = MagicMock()
+            response.status_code = requests.codes.ok
+            response.json.return_value = {'status': 'ok',
+                                          'totalResults': 0,
+                                          'articles': []}
+            return response
+
+        source_ids = ['source-{}'.format(index) for index in range(5)]
+        deadline = operations_package.FetchDeadline(10, clock=clock)
+
+        # Act
+        with operations_package.fetch_deadline(deadline):
+            result = c.FileStorage.write_source_headlines_to_file(
+                source_ids, source_ids, str(tmpdir), "key",
+                headline_func=headline_func)
+
+        with open(os.path.join(str(tmpdir),
+                               c.FAILURE_LEDGER_FILENAME)) as ledger:
+            ledger_data = json.load(ledger)
+
+        # Assert
+        assert result is True
+        assert requested == ['source-0', 'source-1', 'source-2']
+        assert ledger_data['deadline_exceeded'] is True
+        assert [fail['source_id'] for fail in ledger_data['failures']] == [
+            'source-3', 'source-4']
+        assert all(fail['attempts'] == 0
+                   for fail in ledger_data['failures'])
@@ -5,9 +5,11 @@ file storage task performs in the DAGs.
 """
 
 import datetime
+import hashlib
 import json
 import os
 import pytest
+import requests
 
 from unittest.mock import MagicMock
 from unittest.mock import patch
@@ -400,6 +402,156 @@ class TestFileStorageOperations:
         assert result is True
         assert file_is_present is True
 
+    def test_write_json_to_file_publishes_manifest_entry(self):
+        """a successful write of json data records the file in the
+        directory's manifest."""
+
+        # Arrange
+        json_data = {'articles': [{'title': 'one'}, {'title': 'two'}]}
+        datastore_folder_path = "/data/"
+        date = "2018-10-22"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(datastore_folder_path)
+
+            # Act
+            c.FileStorage.write_json_to_file(json_data,
+                                             datastore_folder_path,
+                                             filename="test",
+                                             create_date=date)
+            manifest = c.FileStorage.read_manifest(datastore_folder_path)
+            file_path = os.path.join(datastore_folder_path,
+                                     "2018-10-22_test.json")
+            with open(file_path, "rb") as written_file:
+                contents = written_file.read()
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        # the entry records the name, size, checksum and article count of
+        # the written file.
+        entry = manifest["files"][0]
+        assert len(manifest["files"]) == 1
+        assert entry["name"] == "2018-10-22_test.json"
+        assert entry["size"] == len(contents)
+        assert entry["sha256"] == hashlib.sha256(contents).hexdigest()
+        assert entry["records"] == 2
+
+    def test_publish_manifest_entry_records_file_once(self):
+        """publishing the same file twice lists it once in the manifest, with
+        the stage totals counting it once."""
+
+        # Arrange
+        datastore_folder_path = "/data/"
+        first_path = os.path.join(datastore_folder_path, "first.csv")
+        second_path = os.path.join(datastore_folder_path, "second.csv")
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory with two files to test
+            # the method
+            patcher.fs.create_file(first_path, contents='1,a\n2,b\n')
+            patcher.fs.create_file(second_path, contents='3,c\n')
+
+            # Act
+            c.FileStorage.publish_manifest_entry(datastore_folder_path,
+                                                 "first.csv", 2)
+            c.FileStorage.publish_manifest_entry(datastore_folder_path,
+                                                 "second.csv", 1)
+            c.FileStorage.publish_manifest_entry(datastore_folder_path,
+                                                 "first.csv", 2)
+            names = c.FileStorage.manifest_filenames(datastore_folder_path)
+            manifest = c.FileStorage.read_manifest(datastore_folder_path)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert names == ["second.csv", "first.csv"]
+        assert manifest["total_records"] == 3
+        assert manifest["total_bytes"] == 12
+
+    def test_manifest_filenames_filters_by_extension(self):
+        """only the published files with the given extension are returned."""
+
+        # Arrange
+        datastore_folder_path = "/data/"
+        json_path = os.path.join(datastore_folder_path, "news.json")
+        text_path = os.path.join(datastore_folder_path, "notes.txt")
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory with two files to test
+            # the method
+            patcher.fs.create_file(json_path, contents='{}')
+            patcher.fs.create_file(text_path, contents='notes')
+            c.FileStorage.publish_manifest_entry(datastore_folder_path,
+                                                 "news.json")
+            c.FileStorage.publish_manifest_entry(datastore_folder_path,
+                                                 "notes.txt")
+
+            # Act
+            names = c.FileStorage.manifest_filenames(datastore_folder_path,
+                                                     '.json')
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert names == ["news.json"]
+
+    def test_manifest_stats_reports_stage_throughput(self):
+        """the stage throughput is derived from the manifest totals and the
+        time between its first and last entries."""
+
+        # Arrange
+        manifest = {"started_at": 100.0,
+                    "updated_at": 104.0,
+                    "files": [{"name": "a.json"}, {"name": "b.json"}],
+                    "total_bytes": 2000,
+                    "total_records": 40}
+
+        # Act
+        stats = c.FileStorage.manifest_stats(manifest)
+
+        # Assert
+        assert stats["files"] == 2
+        assert stats["bytes_per_second"] == 500
+        assert stats["records_per_second"] == 10
+
+    def test_read_manifest_fails_when_nothing_published(self):
+        """reading the manifest of a folder no task has written to fails."""
+
+        # Arrange
+        datastore_folder_path = "/data/"
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(datastore_folder_path)
+
+            # Act
+            with pytest.raises(FileNotFoundError) as err:
+                c.FileStorage.read_manifest(datastore_folder_path)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        actual_message = str(err.value)
+        assert "No manifest in" in actual_message
+
     def test_write_source_headlines_to_file_no_argument_fails(self):
         """writes of news source headlines to a directory fails with missing
         parameter.
@@ -422,6 +574,108 @@ class TestFileStorageOperations:
         actual_message = str(err.value)
         assert "is blank" in actual_message
 
+    def test_write_source_headlines_to_file_records_failures(self):
+        """sources that still fail after their retries are skipped and
+        recorded in the failure ledger, while the others are written."""
+
+        # Arrange
+        ids = ['abc-news-au', 'bbc-news']
+        names = ['ABCNews', 'BBCNews']
+        hd_dir = '/tempdata/headlines'
+        good_response = MagicMock()
+        good_response.status_code = 200
+        good_response.json.return_value = {"status": "ok", "articles": []}
+        bad_response = MagicMock()
+        bad_response.status_code = 500
+
+        def headline_func(source_id, api_key=None):
+            if source_id == 'bbc-news':
+                return bad_response
+            return good_response
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+        # Act
+            result = c.FileStorage.write_source_headlines_to_file(
+                ids, names, hd_dir, "key", headline_func=headline_func,
+                max_attempts=2, sleep=lambda seconds: None)
+            failures = c.FileStorage.read_failure_ledger(hd_dir)
+            written = c.FileStorage.manifest_filenames(hd_dir, '.json')
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert len(written) == 1
+        assert written[0].endswith("abc-news-au_headlines.json")
+        assert failures[0]['source_id'] == 'bbc-news'
+        assert failures[0]['source_name'] == 'BBCNews'
+        assert failures[0]['attempts'] == 2
+        assert failures[0]['status_code'] == 500
+
+    def test_write_source_headlines_to_file_records_partial_sources(self,
+                                                                    tmpdir):
+        """a source whose paging stopped at a failing page has the articles
+        fetched written, and is recorded as partial in the ledger."""
+
+        # Arrange
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response._content = b'{"status": "ok", "articles": [{}]}'
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.partial_error = "HTTP status 426 on page 2 of 3"
+
+        def headline_func(source_id, api_key=None):
+            return response
+
+        # Act
+        result = c.FileStorage.write_source_headlines_to_file(
+            ['wired'], ['Wired'], str(tmpdir), "key",
+            headline_func=headline_func)
+        written = c.FileStorage.manifest_filenames(str(tmpdir), '.json')
+        failures = c.FileStorage.read_failure_ledger(str(tmpdir))
+
+        # Assert
+        assert result is True
+        assert written[0].endswith("wired_headlines.json")
+        assert failures[0]['source_id'] == 'wired'
+        assert failures[0]['partial'] is True
+        assert failures[0]['error'] == "HTTP status 426 on page 2 of 3"
+
+    def test_write_failure_ledger_removed_when_nothing_fails(self):
+        """a stale failure ledger is removed by a run with no failures."""
+
+        # Arrange
+        hd_dir = '/tempdata/headlines'
+        failures = [{'source_id': 'bbc-news', 'error': 'HTTP status 500'}]
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(hd_dir)
+
+        # Act
+            c.FileStorage.write_failure_ledger(hd_dir, failures)
+            recorded = c.FileStorage.read_failure_ledger(hd_dir)
+            c.FileStorage.write_failure_ledger(hd_dir, [])
+            result = c.FileStorage.read_failure_ledger(hd_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert recorded == failures
+        assert result == []
+
     def test_write_json_to_file_fails_with_wrong_directory_path(self):
         """write of json data to a file to a non-existent directory
         fails correctly.
@@ -0,0 +1,175 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the watermarks - latest article publication times -
+of the news sources and keywords, used to fetch only newer articles.
+"""
+
+import datetime
+import importlib
+import json
+import os
+import pytest
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+
+def headlines_json(*published) -> dict:
+    """returns a dummy top-headlines json with an article per publication
+    time."""
+
+    return {'status': 'ok',
+            'totalResults': len(published),
+            'articles': [{'title': 'Headline {}'.format(index),
+                          'publishedAt': value}
+                         for index, value in enumerate(published)]}
+
+
+def use_home_directory(monkeypatch, home):
+    """points the datastores of both copies of the package at a temporary
+    home directory."""
+
+    for name in ['challenge', 'dags.challenge']:
+        storage = importlib.import_module(name + '.storage.'
+                                          'filestorage_operations')
+        monkeypatch.setattr(storage, 'HOME_DIRECTORY', str(home))
+
+
+@pytest.mark.watermarktests
+class TestHeadlineWatermarks:
+    """tests the watermarks of the news sources and keywords."""
+
+    def test_parse_published_at_normalizes_to_utc(self):
+        """publishedAt timestamps are parsed into UTC datetimes, whatever
+        their offset or precision; others are not parsed."""
+
+        # Arrange
+        expected = datetime.datetime(2018, 10, 11, 23, 33, 3)
+
+        # Act
+        results = [c.parse_published_at(value)
+                   for value in ["2018-10-11T23:33:03Z",
+                                 "2018-10-11T23:33:03.250Z",
+                                 "2018-10-12T01:33:03+02:00",
+                                 "2018-10-11T18:33:03-0500"]]
+
+        # Assert
+        assert results == [expected] * 4
+        assert c.parse_published_at("yesterday") is None
+        assert c.parse_published_at(None) is None
+
+    def test_filter_headlines_keeps_articles_after_watermark(self, tmpdir):
+        """only the articles published at or after the committed watermark,
+        or without a publication time, are kept; the new watermark is the
+        latest publication time seen."""
+
+        # Arrange
+        store = c.HeadlineWatermarks(os.path.join(str(tmpdir), "marks.json"))
+        key = store.source_key("wired")
+        store.commit({key: "2018-10-11T12:00:00Z"})
+        headlines = headlines_json("2018-10-11T11:00:00Z",
+                                   "2018-10-11T12:00:00Z",
+                                   "2018-10-11T13:00:00Z",
+                                   None)
+
+        # Act
+        result, watermark = store.filter_headlines(key, headlines)
+        first_result, first_watermark = store.filter_headlines(
+            store.source_key("bbc-news"), headlines)
+
+        # Assert
+        assert [article['title'] for article in result['articles']] == [
+            "Headline 1", "Headline 2", "Headline 3"]
+        assert watermark == "2018-10-11T13:00:00Z"
+        assert len(first_result['articles']) == 4
+        assert first_watermark == "2018-10-11T13:00:00Z"
+        assert len(headlines['articles']) == 4
+
+    def test_committed_watermarks_never_move_back(self, tmpdir):
+        """committing an older watermark leaves the newer one in place."""
+
+        # Arrange
+        store = c.HeadlineWatermarks(os.path.join(str(tmpdir), "marks.json"))
+
+        # Act
+        store.commit({"source:wired": "2018-10-11T12:00:00Z"})
+        store.commit({"source:wired": "2018-10-10T12:00:00Z",
+                      "keyword:cancer": "2018-10-09T12:00:00Z"})
+
+        # Assert
+        assert store.read() == {"keyword:cancer": "2018-10-09T12:00:00Z",
+                                "source:wired": "2018-10-11T12:00:00Z"}
+
+    def test_source_watermarks_are_committed_after_transform(self,
+                                                             monkeypatch,
+                                                             tmpdir):
+        """the new watermarks of the fetched sources are published in the
+        headlines manifest, and only committed by a successful transform;
+        the next fetch then keeps only newer articles."""
+
+        # Arrange
+        use_home_directory(monkeypatch, tmpdir)
+        monkeypatch.setenv(c.WATERMARKS_ENV_VARIABLE, "1")
+        pipeline_name = "tempus_challenge_dag"
+        headlines_dir = os.path.join(str(tmpdir), "headlines")
+        os.makedirs(headlines_dir)
+
+        responses = {}
+
+        def headline_func(source_id, api_key=None):
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = responses[source_id]
+            return response
+
+        def pipeline_information(name):
+            info = MagicMock()
+            info.headlines_directory = headlines_dir
+            info.csv_directory = str(tmpdir)
+            return info
+
+        dag = MagicMock()
+        dag.dag_id = pipeline_name
+        context = {'dag': dag,
+                   'execution_date': datetime.datetime(2018, 10, 22)}
+
+        def fetch():
+            watermarks = c.HeadlineWatermarks.for_pipeline(pipeline_name)
+            c.FileStorage.write_source_headlines_to_file(
+                ['wired'], ['Wired'], headlines_dir, "key",
+                headline_func=headline_func, watermarks=watermarks)
+            filename = c.FileStorage.manifest_filenames(headlines_dir,
+                                                        '.json')[0]
+            with open(os.path.join(headlines_dir, filename)) as inputfile:
+                return [article['publishedAt']
+                        for article in json.load(inputfile)['articles']]
+
+        def transform(status):
+            return c.TransformOperations.transform_headlines_to_csv(
+                pipeline_information=pipeline_information,
+                tf_json_func=lambda directory, timestamp: status,
+                **context)
+
+        # Act
+        responses['wired'] = headlines_json("2018-10-21T10:00:00Z",
+                                            "2018-10-21T11:00:00Z")
+        first_fetch = fetch()
+        transform(False)
+        retried_fetch = fetch()
+        transform(True)
+
+        responses['wired'] = headlines_json("2018-10-21T11:00:00Z",
+                                            "2018-10-22T09:00:00Z")
+        next_fetch = fetch()
+
+        manifest = c.FileStorage.read_manifest(headlines_dir)
+
+        # Assert
+        assert first_fetch == ["2018-10-21T10:00:00Z",
+                               "2018-10-21T11:00:00Z"]
+        assert retried_fetch == first_fetch
+        assert next_fetch == ["2018-10-21T11:00:00Z",
+                              "2018-10-22T09:00:00Z"]
+        assert manifest['files'][0]['watermarks'] == {
+            "source:wired": "2018-10-22T09:00:00Z"}
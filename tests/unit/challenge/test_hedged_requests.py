@@ -0,0 +1,151 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the hedging of slow News API calls, and for the
+latency history the hedging delay is learned from.
+"""
+
+import os
+import pytest
+import requests
+import threading
+import time
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+# the copy of the package the operations import, which holds the hedger in
+# force that the rate limiter reads.
+import challenge as operations_package
+
+
+class SlowFirstCall:
+    """remote call whose first copy answers late, or fails late, and whose
+    later copies answer straight away."""
+
+    def __init__(self, delay, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, url, timeout=None):
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+
+        response = MagicMock(status_code=requests.codes.ok)
+        response.copy = "first" if first else "duplicate"
+        if first:
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+        return response
+
+
+@pytest.mark.hedgingtests
+class TestHedgedRequests:
+    """tests the hedging of slow News API calls."""
+
+    def test_latency_history_keeps_most_recent_latencies(self, tmpdir):
+        """the history keeps the most recent latencies between runs, and
+        gives no percentile until it has enough of them."""
+
+        # Arrange
+        history = c.LatencyHistory(os.path.join(str(tmpdir), "calls.json"),
+                                   size=30)
+
+        # Act
+        history.record([0.01] * 10)
+        too_few = history.percentile(95)
+        history.record([0.1 * index for index in range(1, 26)])
+        latencies = history.read()
+
+        # Assert
+        assert too_few is None
+        assert len(latencies) == 30
+        assert latencies[:5] == [0.01] * 5
+        assert history.percentile(0) == pytest.approx(0.01)
+        assert history.percentile(50) == pytest.approx(1.0)
+        assert history.percentile(100) == pytest.approx(2.5)
+
+    def test_slow_call_is_answered_by_its_duplicate(self):
+        """a call not answered within the delay is duplicated, and the
+        duplicate's response is returned as soon as it arrives."""
+
+        # Arrange
+        hedger = c.RequestHedger(delay=0.05)
+        http_method = SlowFirstCall(delay=1.0)
+
+        # Act
+        start = time.monotonic()
+        result = hedger.call(http_method, ("https://newsapi.org/v2",), {})
+        elapsed = time.monotonic() - start
+        hedger.close()
+
+        # Assert
+        assert result.copy == "duplicate"
+        assert elapsed < 0.5
+        assert http_method.calls == 2
+        assert hedger.hedged == 1
+        assert hedger.hedges_won == 1
+
+    def test_failed_first_copy_does_not_fail_the_call(self):
+        """a first copy failing after the call was hedged leaves the
+        duplicate to answer it."""
+
+        # Arrange
+        hedger = c.RequestHedger(delay=0.05)
+        http_method = SlowFirstCall(delay=0.2,
+                                    error=requests.exceptions.ReadTimeout())
+
+        # Act
+        result = hedger.call(http_method, ("https://newsapi.org/v2",), {})
+        hedger.close()
+
+        # Assert
+        assert result.copy == "duplicate"
+
+    def test_call_is_not_hedged_without_a_spare_token(self):
+        """a slow call is not duplicated when the rate limit has no token
+        to spare."""
+
+        # Arrange
+        hedger = c.RequestHedger(delay=0.05)
+        http_method = SlowFirstCall(delay=0.2)
+        bucket = MagicMock()
+        bucket.try_acquire.return_value = 0.5
+
+        # Act
+        result = hedger.call(http_method, ("https://newsapi.org/v2",), {},
+                             bucket)
+        hedger.close()
+
+        # Assert
+        assert result.copy == "first"
+        assert http_method.calls == 1
+        assert hedger.hedged == 0
+
+    def test_rate_limited_calls_are_hedged_and_recorded(self, tmpdir):
+        """while hedging is in force, calls under the rate limiter are
+        hedged on the delay learned from the history, and their latencies
+        added to it."""
+
+        # Arrange
+        history = operations_package.LatencyHistory(
+            os.path.join(str(tmpdir), "calls.json"))
+        history.record([0.05] * 20)
+        limiter = c.RateLimiter(rate=1000, burst=1000)
+        http_method = SlowFirstCall(delay=1.0)
+
+        hedging = operations_package.request_hedging
+
+        # Act
+        with hedging(history=history, enabled=True) as hedger:
+            result = limiter.call(http_method, "https://newsapi.org/v2")
+
+        # Assert
+        assert result.copy == "duplicate"
+        assert hedger.delay == pytest.approx(0.05)
+        assert len(history.read()) == 21
+        assert operations_package.active_hedger() is None
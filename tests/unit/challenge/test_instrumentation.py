@@ -0,0 +1,257 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the per-stage timing and memory instrumentation of
+the operations run in the DAG tasks.
+"""
+
+import io
+import json
+import logging
+import os
+import pandas as pd
+import pytest
+import requests
+import sys
+
+from unittest.mock import MagicMock
+
+from pyfakefs.fake_filesystem_unittest import Patcher
+
+from dags import challenge as c
+
+# the operations are instrumented by the top-level `challenge` package they
+# import, rather than through the 'dags' package the tests import.
+import challenge as operations_package
+
+
+@pytest.mark.instrumentationtests
+class TestInstrumentation:
+    """tests the measurements recorded for instrumented operation calls."""
+
+    def test_measure_stage_records_call(self):
+        """a measured call records its duration, bytes, rows and memory."""
+
+        # Act
+        with c.measure_stage("storage", "write_files") as measurement:
+            c.record_bytes_read(100)
+            c.record_bytes_written(40)
+            c.record_bytes_written(2)
+            c.record_rows(3)
+
+        record = measurement.as_record()
+
+        # Assert
+        assert record['stage'] == "storage"
+        assert record['operation'] == "write_files"
+        assert record['status'] == "success"
+        assert record['duration_seconds'] >= 0
+        assert record['bytes_read'] == 100
+        assert record['bytes_written'] == 42
+        assert record['rows'] == 3
+        assert record['peak_rss_bytes'] > 0
+        assert record['peak_rss_growth_bytes'] >= 0
+        assert 'breakdown' not in record
+
+    def test_nested_calls_count_towards_outer_call(self):
+        """bytes and rows of nested calls are included in the outer call's
+        totals, and the nested calls are summed up in its breakdown."""
+
+        # Act
+        with c.measure_stage("network", "get_news_headlines") as outer:
+            c.record_bytes_read(10)
+            for _ in range(3):
+                with c.measure_stage("storage", "write_json_to_file"):
+                    c.record_bytes_written(5)
+                    c.record_rows(2)
+
+        record = outer.as_record()
+        writes = record['breakdown']['storage.write_json_to_file']
+
+        # Assert
+        assert record['bytes_read'] == 10
+        assert record['bytes_written'] == 15
+        assert record['rows'] == 6
+        assert writes['calls'] == 3
+        assert writes['failed_calls'] == 0
+        assert writes['bytes_written'] == 15
+        assert writes['rows'] == 6
+
+    def test_failed_call_is_recorded_and_reraised(self):
+        """an error raised by a measured call is recorded, and not
+        swallowed."""
+
+        # Act
+        with pytest.raises(ValueError):
+            with c.measure_stage("extract", "parse") as measurement:
+                raise ValueError("bad json")
+
+        # Assert
+        assert measurement.status == "failed"
+        assert measurement.error == "ValueError: bad json"
+
+    def test_outermost_call_logs_structured_record(self, caplog):
+        """the outermost call is logged as a json record, which is also
+        attached to the log record."""
+
+        # Arrange
+        caplog.set_level(logging.INFO)
+
+        # Act
+        with c.measure_stage("upload", "upload_csv_to_s3"):
+            c.record_bytes_written(7)
+
+        records = [record for record in caplog.records
+                   if hasattr(record, 'stage_metrics')]
+        message = records[-1].getMessage()
+
+        # Assert
+        assert len(records) == 1
+        assert message.startswith(c.STAGE_METRICS_LOG_PREFIX)
+        logged = json.loads(message[len(c.STAGE_METRICS_LOG_PREFIX):])
+        assert logged == records[-1].stage_metrics
+        assert logged['bytes_written'] == 7
+
+    def test_instrumented_operation_pushes_metrics_to_xcom(self):
+        """the outermost instrumented call pushes its record to XCom through
+        the task instance of its Airflow context."""
+
+        # Arrange
+        class Operations:
+            @classmethod
+            @c.instrumented("transform")
+            def outer(cls, **context):
+                cls.inner(**context)
+                return True
+
+            @classmethod
+            @c.instrumented("storage")
+            def inner(cls, **context):
+                c.record_rows(4)
+
+        task_instance = MagicMock()
+
+        # Act
+        result = Operations.outer(ti=task_instance)
+
+        # Assert
+        assert result is True
+        assert Operations.outer.__name__ == "outer"
+        task_instance.xcom_push.assert_called_once()
+        pushed = task_instance.xcom_push.call_args[1]
+        assert pushed['key'] == c.STAGE_METRICS_XCOM_KEY
+        assert pushed['value']['operation'] == "outer"
+        assert pushed['value']['rows'] == 4
+        assert pushed['value']['breakdown']['storage.inner']['calls'] == 1
+
+    def test_xcom_push_failure_does_not_fail_operation(self):
+        """a task instance failing to push the metrics does not fail the
+        instrumented operation."""
+
+        # Arrange
+        task_instance = MagicMock()
+        task_instance.xcom_push.side_effect = RuntimeError("no database")
+
+        @c.instrumented("network")
+        def operation(**context):
+            return "done"
+
+        # Act
+        result = operation(ti=task_instance)
+
+        # Assert
+        assert result == "done"
+
+    def test_write_json_to_file_records_bytes_and_rows(self):
+        """writing a news json counts the file's size and articles towards
+        the instrumented calls in progress."""
+
+        # Arrange
+        data = {'status': 'ok', 'articles': [{'title': 'a'}, {'title': 'b'}]}
+        directory = os.path.join('tempdata', 'headlines')
+
+        with Patcher() as patcher:
+            patcher.fs.create_dir(directory)
+
+            # Act
+            with operations_package.measure_stage("network",
+                                                  "get_headlines") as outer:
+                c.FileStorage.write_json_to_file(data, directory, "test")
+
+            written = c.FileStorage.read_manifest(directory)['total_bytes']
+
+        record = outer.as_record()
+
+        # Assert
+        assert record['bytes_written'] == written
+        assert record['rows'] == 2
+        assert record['breakdown']['storage.write_json_to_file']['calls'] == 1
+
+    def test_transform_counts_each_file_read_once(self, tmpdir,
+                                                  monkeypatch):
+        """a headlines file read by a transform is counted once towards the
+        bytes read, though its reader is instrumented too."""
+
+        # Arrange
+        data = {'status': 'ok', 'totalResults': 1,
+                'articles': [{'source': {'id': 'wired', 'name': 'Wired'},
+                              'author': 'a',
+                              'title': 'Tempus solves Cancer',
+                              'description': 'd',
+                              'url': 'https://example.com/1',
+                              'urlToImage': None,
+                              'publishedAt': '2018-10-11T23:33:03Z',
+                              'content': 'c'}]}
+        json_file = os.path.join(str(tmpdir), "cancer_headlines.json")
+        with open(json_file, "w") as outputfile:
+            json.dump(data, outputfile)
+
+        # the merger accumulates its DataFrame in a module global, which
+        # has to be emptied before the merge.
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+        monkeypatch.setattr(sys.modules[tf_func.__module__], 'merged_df',
+                            pd.DataFrame())
+
+        # Act
+        with operations_package.measure_stage("transform",
+                                              "merge_files") as outer:
+            tf_func([json_file], streaming=False)
+
+        record = outer.as_record()
+
+        # Assert
+        assert record['bytes_read'] == os.path.getsize(json_file)
+
+    def test_streamed_response_is_counted_while_written(self, tmpdir):
+        """the body of a response requested with stream=True is counted as
+        it is streamed to its file, without being read into memory first,
+        and a body already read is counted once."""
+
+        # Arrange
+        body = b'{"status": "ok", "sources": [{"id": "wired"}]}'
+        streamed = requests.Response()
+        streamed.status_code = requests.codes.ok
+        streamed.raw = io.BytesIO(body)
+        loaded = requests.Response()
+        loaded.status_code = requests.codes.ok
+        loaded._content = body
+        loaded._content_consumed = True
+
+        # Act
+        with operations_package.measure_stage("network", "get_news") as outer:
+            c.NetworkOperations.get_news(streamed,
+                                         news_dir=str(tmpdir),
+                                         filename="streamed",
+                                         gb_var="tempus_challenge_dag")
+        streamed_record = outer.as_record()
+
+        with operations_package.measure_stage("network", "get_news") as outer:
+            c.NetworkOperations.get_news(loaded,
+                                         news_dir=str(tmpdir),
+                                         filename="loaded",
+                                         gb_var="tempus_challenge_dag")
+        loaded_record = outer.as_record()
+
+        # Assert
+        assert streamed._content is False
+        assert streamed_record['bytes_read'] == len(body)
+        assert loaded_record['bytes_read'] == len(body)
@@ -0,0 +1,236 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the streaming of News API response bodies to the
+datastore, the validation of the json streamed, and the incremental reading
+of stored json files.
+"""
+
+import json
+import os
+import pytest
+import requests
+
+from dags import challenge as c
+
+
+def make_response(body, url="https://newsapi.org/v2/top-headlines"):
+    """returns a requests.Response whose body has already been read, like
+    those the SimpleHttpOperator hands to its response_check."""
+
+    response = requests.Response()
+    response.status_code = requests.codes.ok
+    response.url = url
+    response._content = body
+    response._content_consumed = True
+    return response
+
+
+def validate(body, chunk_size):
+    """feeds a json document to a validator in chunks of a given size, and
+    returns the validator."""
+
+    validator = c.JsonStreamValidator()
+    for start in range(0, len(body), chunk_size):
+        validator.feed(body[start:start + chunk_size])
+    validator.close()
+    return validator
+
+
+@pytest.mark.streamingtests
+class TestJsonStreaming:
+    """tests the streaming of json to and from the datastore."""
+
+    def test_validator_accepts_json_split_anywhere(self):
+        """a valid document is accepted and its records counted wherever
+        the chunks split it, even inside strings and escapes."""
+
+        # Arrange
+        data = {"status": "ok",
+                "totalResults": 3,
+                "articles": [{"title": 'a "quoted" [title] {x}',
+                              "source": {"id": "wired"}},
+                             {"title": "back\\slash"},
+                             {"title": None, "tags": ["]", "}"]}]}
+        body = json.dumps(data).encode("utf-8")
+
+        # Act
+        results = [validate(body, size).records for size in (1, 2, 7, 4096)]
+
+        # Assert
+        assert results == [3, 3, 3, 3]
+
+    def test_validator_rejects_invalid_json(self):
+        """truncated, mismatched, trailing or non-container documents are
+        rejected."""
+
+        # Arrange
+        bodies = [b'{"articles": [{"title": "a"}]',
+                  b'{"articles": [{"title": "a"}}]}',
+                  b'{"title": "unterminated}',
+                  b'{"status": "ok"} {"status": "ok"}',
+                  b'"just a string"',
+                  b'']
+
+        # Act
+        rejected = []
+        for body in bodies:
+            try:
+                validate(body, 5)
+            except ValueError:
+                rejected.append(body)
+
+        # Assert
+        assert rejected == bodies
+
+    def test_peek_json_fields_reads_top_level_fields(self):
+        """the fields found at the head of a document are returned with
+        their json values."""
+
+        # Arrange
+        head = b'{"status": "ok", "totalResults": 1234, "articles": [{"ti'
+
+        # Act
+        result = c.peek_json_fields(head, ["status", "totalResults", "code"])
+
+        # Assert
+        assert result == {"status": "ok", "totalResults": 1234}
+
+    def test_write_response_to_file_streams_the_body(self, tmpdir):
+        """the body of a response is written to the file as it is, and the
+        file published in the manifest with its record count."""
+
+        # Arrange
+        body = json.dumps({"status": "ok",
+                           "sources": [{"id": "wired"}, {"id": "bbc"}]},
+                          indent=2).encode("utf-8")
+        response = make_response(body)
+
+        # Act
+        result = c.FileStorage.write_response_to_file(response,
+                                                      str(tmpdir),
+                                                      "news",
+                                                      "2018-10-01")
+        manifest = c.FileStorage.read_manifest(str(tmpdir))
+
+        # Assert
+        assert result is True
+        with open(os.path.join(str(tmpdir), "2018-10-01_news.json"),
+                  "rb") as inputfile:
+            assert inputfile.read() == body
+        assert manifest["files"][0]["records"] == 2
+
+    def test_write_response_to_file_rejects_invalid_json(self, tmpdir):
+        """an invalid body fails the write and leaves no file behind."""
+
+        # Arrange
+        response = make_response(b'{"status": "ok", "sources": [')
+
+        # Act
+        with pytest.raises(ValueError) as err:
+            c.FileStorage.write_response_to_file(response,
+                                                 str(tmpdir),
+                                                 "news")
+
+        # Assert
+        assert "Data is not Valid JSON" in str(err.value)
+        assert os.listdir(str(tmpdir)) == []
+
+    def test_source_headlines_are_streamed_to_file(self, tmpdir):
+        """the headlines of each source are written to the headlines
+        directory as they were received."""
+
+        # Arrange
+        body = b'{"status": "ok", "totalResults": 1, "articles": [{}]}'
+
+        def headline_func(source_id, api_key=None):
+            return make_response(body)
+
+        # Act
+        c.FileStorage.write_source_headlines_to_file(
+            ['wired'], ['Wired'], str(tmpdir), "key",
+            headline_func=headline_func)
+        files = c.FileStorage.manifest_filenames(str(tmpdir), ".json")
+
+        # Assert
+        assert len(files) == 1
+        with open(os.path.join(str(tmpdir), files[0]), "rb") as inputfile:
+            assert inputfile.read() == body
+
+    def test_unconsumed_response_is_not_streamable(self):
+        """a response holding a body it was not marked as having read, and
+        no connection to read it from, is not streamed."""
+
+        # Arrange
+        response = make_response(b'{"status": "ok", "sources": []}')
+        response._content_consumed = False
+
+        # Act
+        result = c.is_streamable(response)
+
+        # Assert
+        assert result is False
+
+    def test_single_page_is_not_parsed(self):
+        """the only page of a keyword's headlines is returned as it is,
+        without parsing its body."""
+
+        # Arrange
+        body = (b'{"status": "ok", "totalResults": 2, "articles": '
+                b'[{"title": "a"}, {"title": "b"}]}')
+        response = make_response(body)
+        response.json = None
+
+        # Act
+        result = c.NetworkOperations.get_remaining_headline_pages(
+            response,
+            url_endpoint="https://newsapi.org/v2/top-headlines",
+            params={'q': 'tempus'})
+
+        # Assert
+        assert result is response
+
+    def test_array_reader_yields_items_across_chunks(self, tmpdir):
+        """the items of the array field are yielded one at a time, however
+        the chunks of the file split them, after skipping the fields
+        before it."""
+
+        # Arrange
+        articles = [{"title": "caf\u00e9 {}".format(index), "rank": index}
+                    for index in range(5)]
+        json_file = os.path.join(str(tmpdir), "headlines.json")
+        with open(json_file, "w", encoding="utf-8") as outputfile:
+            json.dump({"status": "ok",
+                       "totalResults": 123456,
+                       "meta": {"articles": [1, 2]},
+                       "articles": articles}, outputfile,
+                      indent=2, ensure_ascii=False)
+
+        # Act
+        results = [list(c.JsonArrayReader(json_file, "articles", size))
+                   for size in (1, 3, 1000)]
+
+        # Assert
+        assert results == [articles, articles, articles]
+
+    def test_array_reader_handles_missing_and_invalid_arrays(self, tmpdir):
+        """a missing field yields nothing, while an invalid document raises
+        a ValueError once the reader reaches the error."""
+
+        # Arrange
+        missing_file = os.path.join(str(tmpdir), "missing.json")
+        with open(missing_file, "w") as outputfile:
+            outputfile.write('{"status": "error", "code": 429}')
+        invalid_file = os.path.join(str(tmpdir), "invalid.json")
+        with open(invalid_file, "w") as outputfile:
+            outputfile.write('{"articles": [{"title": "a"}, {"title": ')
+
+        # Act
+        missing = list(c.JsonArrayReader(missing_file, "articles", 4))
+        items = iter(c.JsonArrayReader(invalid_file, "articles", 4))
+        first = next(items)
+
+        # Assert
+        assert missing == []
+        assert first == {"title": "a"}
+        with pytest.raises(ValueError):
+            next(items)
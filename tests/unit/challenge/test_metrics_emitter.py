@@ -0,0 +1,275 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the export of the pipeline metrics as StatsD
+datagrams, checked against a local UDP listener, and as Prometheus
+textfile-collector files.
+"""
+
+import importlib
+import os
+import pytest
+import requests
+import socket
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+
+class UDPListener:
+    """local UDP socket standing in for a StatsD daemon."""
+
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(2)
+        self.port = self.socket.getsockname()[1]
+
+    def receive(self, count) -> list:
+        """returns the next `count` datagrams received, decoded."""
+
+        return [self.socket.recv(65536).decode('utf-8')
+                for _ in range(count)]
+
+    def close(self):
+        self.socket.close()
+
+
+@pytest.fixture
+def listener():
+    udp_listener = UDPListener()
+    yield udp_listener
+    udp_listener.close()
+
+
+def use_emitter(monkeypatch, emitter):
+    """makes an emitter the one shared by the operations, in both copies of
+    the challenge package."""
+
+    for name in ['challenge', 'dags.challenge']:
+        emitter_class = importlib.import_module(name).MetricsEmitter
+        monkeypatch.setattr(emitter_class, '_shared', emitter)
+
+
+def make_response(status_code):
+    """returns a requests.Response object with the given status."""
+
+    response = requests.Response()
+    response.status_code = status_code
+
+    return response
+
+
+@pytest.mark.metricstests
+class TestMetricsEmitter:
+    """tests the export of the pipeline metrics."""
+
+    def test_statsd_emitter_sends_counters_and_timers(self, listener):
+        """counters and durations are sent as StatsD datagrams, with their
+        labels folded into the metric name."""
+
+        # Arrange
+        emitter = c.StatsdEmitter('127.0.0.1', listener.port, prefix='test')
+
+        # Act
+        emitter.increment(c.ARTICLES_EXTRACTED, 12)
+        emitter.observe(c.NEWS_API_REQUEST_DURATION, 0.25)
+        emitter.increment(c.NEWS_API_REQUESTS, labels={'status': 200})
+        datagrams = listener.receive(3)
+
+        # Assert
+        assert datagrams == ["test.articles_extracted:12|c",
+                             "test.news_api_request_duration:250.000|ms",
+                             "test.news_api_requests.status_200:1|c"]
+
+    def test_rate_limited_calls_are_counted_and_timed(self,
+                                                      monkeypatch,
+                                                      listener):
+        """each News API call made through the rate limiter, retries
+        included, is counted by status and timed."""
+
+        # Arrange
+        use_emitter(monkeypatch,
+                    c.StatsdEmitter('127.0.0.1', listener.port,
+                                    prefix='test'))
+        http_method = MagicMock(side_effect=[make_response(429),
+                                             make_response(200)])
+        limiter = c.RateLimiter(rate=100, burst=100, sleep=lambda _: None)
+
+        # Act
+        response = limiter.call(http_method, "http://localhost/v2/sources")
+        datagrams = listener.receive(4)
+
+        # Assert
+        assert response.status_code == 200
+        assert "test.news_api_requests.status_429:1|c" in datagrams
+        assert "test.news_api_requests.status_200:1|c" in datagrams
+        timers = [datagram for datagram in datagrams
+                  if datagram.endswith("|ms")]
+        assert len(timers) == 2
+
+    def test_failed_calls_are_counted_as_errors(self, monkeypatch, listener):
+        """a News API call raising a network error is counted with an
+        'error' status."""
+
+        # Arrange
+        use_emitter(monkeypatch,
+                    c.StatsdEmitter('127.0.0.1', listener.port,
+                                    prefix='test'))
+        http_method = MagicMock(side_effect=requests.ConnectionError())
+        limiter = c.RateLimiter(rate=100, burst=100)
+
+        # Act
+        with pytest.raises(requests.ConnectionError):
+            limiter.call(http_method, "http://localhost/v2/sources")
+        datagrams = listener.receive(2)
+
+        # Assert
+        assert "test.news_api_requests.status_error:1|c" in datagrams
+
+    def test_prometheus_emitter_writes_textfile(self, tmpdir):
+        """counters and latency histograms are written in the Prometheus
+        text format."""
+
+        # Arrange
+        emitter = c.PrometheusTextfileEmitter(str(tmpdir), prefix='test',
+                                              buckets=(0.1, 1.0))
+
+        # Act
+        emitter.increment(c.NEWS_API_REQUESTS, labels={'status': 200})
+        emitter.increment(c.NEWS_API_REQUESTS, labels={'status': 200})
+        emitter.increment(c.BYTES_UPLOADED, 2048)
+        emitter.observe(c.NEWS_API_REQUEST_DURATION, 0.05)
+        emitter.observe(c.NEWS_API_REQUEST_DURATION, 0.5)
+        emitter.flush("upload_csv_to_s3")
+
+        with open(os.path.join(str(tmpdir),
+                               "test_upload_csv_to_s3.prom")) as textfile:
+            lines = textfile.read().splitlines()
+
+        # Assert
+        assert "# TYPE test_news_api_requests_total counter" in lines
+        assert 'test_news_api_requests_total{status="200"} 2' in lines
+        assert "test_bytes_uploaded_total 2048" in lines
+        assert ("# TYPE test_news_api_request_duration_seconds histogram"
+                in lines)
+        assert ('test_news_api_request_duration_seconds_bucket{le="0.1"} 1'
+                in lines)
+        assert ('test_news_api_request_duration_seconds_bucket{le="1.0"} 2'
+                in lines)
+        assert ('test_news_api_request_duration_seconds_bucket{le="+Inf"} 2'
+                in lines)
+        assert "test_news_api_request_duration_seconds_count 2" in lines
+        assert not [name for name in os.listdir(str(tmpdir))
+                    if name.endswith(".tmp")]
+
+    def test_finished_task_flushes_textfile(self, monkeypatch, tmpdir):
+        """the outermost instrumented operation of a task writes out the
+        metrics gathered during it."""
+
+        # Arrange
+        monkeypatch.setenv(c.TASK_DAG_ID_VARIABLE, '')
+        monkeypatch.setenv(c.TASK_ID_VARIABLE, '')
+        emitter = c.PrometheusTextfileEmitter(str(tmpdir), prefix='test')
+        use_emitter(monkeypatch, emitter)
+
+        @c.instrumented("extract")
+        def operation():
+            c.MetricsEmitter.shared().increment(c.ARTICLES_EXTRACTED, 5)
+
+        # Act
+        operation()
+
+        with open(os.path.join(str(tmpdir), "test_operation.prom")) as file:
+            lines = file.read().splitlines()
+
+        # Assert
+        assert "test_articles_extracted_total 5" in lines
+
+    def test_tasks_write_their_own_labelled_textfile(self,
+                                                     monkeypatch,
+                                                     tmpdir):
+        """tasks running the same operation write their metrics to files of
+        their own, labelled with their dag_id and task_id."""
+
+        # Arrange
+        monkeypatch.setenv(c.TASK_DAG_ID_VARIABLE, '')
+        monkeypatch.setenv(c.TASK_ID_VARIABLE, '')
+        use_emitter(monkeypatch,
+                    c.PrometheusTextfileEmitter(str(tmpdir), prefix='test'))
+
+        @c.instrumented("upload")
+        def operation(**context):
+            c.MetricsEmitter.shared().increment(c.FILES_UPLOADED)
+
+        news_dag = MagicMock(dag_id='tempus_challenge_dag')
+        news_task = MagicMock(task_id='upload_news_task')
+        keyword_dag = MagicMock(dag_id='tempus_bonus_challenge_dag')
+        keyword_task = MagicMock(task_id='upload_keyword_task')
+
+        # Act
+        operation(dag=news_dag, task=news_task)
+        use_emitter(monkeypatch,
+                    c.PrometheusTextfileEmitter(str(tmpdir), prefix='test'))
+        operation(dag=keyword_dag, task=keyword_task)
+
+        with open(os.path.join(
+                str(tmpdir),
+                "test_tempus_challenge_dag_upload_news_task.prom")) as file:
+            news_lines = file.read().splitlines()
+        with open(os.path.join(
+                str(tmpdir),
+                "test_tempus_bonus_challenge_dag_upload_keyword_task.prom")
+        ) as file:
+            keyword_lines = file.read().splitlines()
+
+        # Assert
+        assert not os.path.exists(os.path.join(str(tmpdir),
+                                               "test_operation.prom"))
+        assert ('test_files_uploaded_total{dag_id="tempus_challenge_dag",'
+                'task_id="upload_news_task"} 1') in news_lines
+        assert ('test_files_uploaded_total{'
+                'dag_id="tempus_bonus_challenge_dag",'
+                'task_id="upload_keyword_task"} 1') in keyword_lines
+
+    def test_task_identity_is_read_from_environment(self, monkeypatch):
+        """operations run without an Airflow context are labelled with the
+        task identity exported to the environment."""
+
+        # Arrange
+        monkeypatch.setenv(c.TASK_DAG_ID_VARIABLE, '')
+        monkeypatch.setenv(c.TASK_ID_VARIABLE, '')
+
+        # Act
+        unknown = c.task_labels({})
+        c.export_task_identity('tempus_bonus_challenge_dag',
+                               'get_headlines_first_kw_task')
+        exported = c.task_labels({})
+
+        # Assert
+        assert unknown == {}
+        assert exported == {'dag_id': 'tempus_bonus_challenge_dag',
+                            'task_id': 'get_headlines_first_kw_task'}
+
+    def test_emitter_is_configured_from_environment(self,
+                                                    monkeypatch,
+                                                    tmpdir):
+        """the metrics export is only enabled by its environment
+        variables."""
+
+        # Arrange
+        monkeypatch.delenv('METRICS_STATSD_HOST', raising=False)
+        monkeypatch.delenv('METRICS_TEXTFILE_DIRECTORY', raising=False)
+
+        # Act
+        disabled = c.MetricsEmitter.from_environment()
+        monkeypatch.setenv('METRICS_STATSD_HOST', '127.0.0.1')
+        statsd_only = c.MetricsEmitter.from_environment()
+        monkeypatch.setenv('METRICS_TEXTFILE_DIRECTORY', str(tmpdir))
+        both = c.MetricsEmitter.from_environment()
+
+        # Assert
+        assert type(disabled) is c.MetricsEmitter
+        assert isinstance(statsd_only, c.StatsdEmitter)
+        assert isinstance(both, c.MultiEmitter)
+        assert len(both.emitters) == 2
@@ -7,6 +7,7 @@ task to call remote News APIs methods performs in the DAGs.
 import datetime
 import pytest
 import requests
+import time
 
 from airflow.models import DAG
 
@@ -16,6 +17,13 @@ from pyfakefs.fake_filesystem_unittest import Patcher
 
 from dags import challenge as c
 
+from fake_newsapi import FakeNewsAPIServer
+
+
+def fast_rate_limiter():
+    """returns a rate limiter loose enough not to slow the tests down."""
+    return c.RateLimiter(rate=1000, burst=1000, max_concurrency=50)
+
 
 @pytest.mark.networktests
 class TestNetworkOperations:
@@ -158,7 +166,9 @@ class TestNetworkOperations:
                                                  key)
 
         # Assert
-        request_method.assert_called_with(http_call_with_key)
+        request_method.assert_called_with(http_call_with_key,
+                                          timeout=(c.DEFAULT_CONNECT_TIMEOUT,
+                                                   c.DEFAULT_READ_TIMEOUT))
 
     @patch('requests.get', autospect=True)
     def test_get_source_headlines_returns_successfully(self, request_method):
@@ -168,7 +178,7 @@ class TestNetworkOperations:
         # craft the kind of expected http response when the method is called
         response_obj = MagicMock(spec=requests.Response)
         response_obj.status_code = requests.codes.ok
-        request_method.side_effect = lambda url: response_obj
+        request_method.side_effect = lambda url, timeout: response_obj
 
         # setup a dummy URL resembling the http call to get top-headlines
         base_url = "https://newsapi.org/v2"
@@ -250,7 +260,7 @@ class TestNetworkOperations:
         # craft the kind of expected http response when the method is called
         response_obj = MagicMock(spec=requests.Response)
         response_obj.status_code = requests.codes.bad
-        request_method.side_effect = lambda url: response_obj
+        request_method.side_effect = lambda url, timeout: response_obj
 
         # setup a dummy URL resembling the http call to get top-headlines
         base_url = "https://newsapi.org/v2"
@@ -312,3 +322,180 @@ class TestNetworkOperations:
         # Assert
         actual_message = str(err.value)
         assert "No News API Key found" in actual_message
+
+    def test_get_source_headlines_with_retry_recovers_flaky_source(self):
+        """a source whose first call fails is retried once and succeeds."""
+
+        # Arrange
+        bad_response = MagicMock(spec=requests.Response)
+        bad_response.status_code = requests.codes.service_unavailable
+        good_response = MagicMock(spec=requests.Response)
+        good_response.status_code = requests.codes.ok
+        headline_func = MagicMock(side_effect=[bad_response, good_response])
+        sleep = MagicMock()
+
+        # Act
+        result = c.NetworkOperations.get_source_headlines_with_retry(
+            "abc-news", "news api key", headline_func=headline_func,
+            sleep=sleep)
+
+        # Assert
+        assert result['response'] is good_response
+        assert result['attempts'] == 2
+        assert result['error'] is None
+        assert sleep.call_count == 1
+        assert 0 <= sleep.call_args[0][0] <= c.SOURCE_BACKOFF_BASE
+
+    def test_get_source_headlines_with_retry_retries_network_errors(self):
+        """a source whose calls keep raising is given up on after the
+        maximum number of attempts."""
+
+        # Arrange
+        error = requests.exceptions.ConnectionError("connection reset")
+        headline_func = MagicMock(side_effect=error)
+        sleep = MagicMock()
+
+        # Act
+        result = c.NetworkOperations.get_source_headlines_with_retry(
+            "abc-news", "news api key", headline_func=headline_func,
+            max_attempts=3, sleep=sleep)
+
+        # Assert
+        assert result['response'] is None
+        assert result['attempts'] == 3
+        assert "ConnectionError" in result['error']
+        assert headline_func.call_count == 3
+        assert sleep.call_count == 2
+
+    def test_get_source_headlines_with_retry_skips_permanent_errors(self):
+        """a source failing with a non-retryable status is not retried."""
+
+        # Arrange
+        bad_response = MagicMock(spec=requests.Response)
+        bad_response.status_code = requests.codes.unauthorized
+        headline_func = MagicMock(return_value=bad_response)
+        sleep = MagicMock()
+
+        # Act
+        result = c.NetworkOperations.get_source_headlines_with_retry(
+            "abc-news", "news api key", headline_func=headline_func,
+            sleep=sleep)
+
+        # Assert
+        assert result['attempts'] == 1
+        assert result['error'] == "HTTP status 401"
+        assert not sleep.called
+
+    def test_get_paged_source_headlines_retrieves_every_page(self):
+        """a source with more headlines than fit on a page has all of them
+        retrieved, in order, one request per page."""
+
+        # Arrange
+        limiter = fast_rate_limiter()
+        engine = c.AsyncFetchEngine(rate_limiter=limiter)
+
+        with FakeNewsAPIServer(articles_per_source=250) as server:
+            url = server.url + "/v2/top-headlines"
+
+        # Act
+            result = c.NetworkOperations.get_paged_source_headlines(
+                "source-3", api_key="543", url_endpoint=url,
+                rate_limiter=limiter, engine=engine, page_size=100)
+            pages = sorted(int(params.get('page', 1))
+                           for path, params in server.requests_seen)
+
+        # Assert
+        data = result.json()
+        assert result.status_code == requests.codes.ok
+        assert data['totalResults'] == 250
+        assert [article['title'] for article in data['articles']] == [
+            "source-3 headline {}".format(index) for index in range(250)]
+        assert pages == [1, 2, 3]
+
+    def test_get_remaining_headline_pages_fetches_concurrently(self):
+        """the pages after the first are requested concurrently rather
+        than one after another."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer(latency=0.2, articles_per_source=500) as server:
+            url = server.url + "/v2/top-headlines"
+            params = {'q': 'cancer', 'pageSize': 50, 'apiKey': '543'}
+            first_page = requests.get(url, params=params)
+
+        # Act
+            start = time.monotonic()
+            result = c.NetworkOperations.get_remaining_headline_pages(
+                first_page, engine=engine)
+            elapsed = time.monotonic() - start
+
+        # Assert
+        assert len(result.json()['articles']) == 500
+        # nine pages of 0.2 seconds each take 1.8 seconds one at a time
+        assert elapsed < 1.0
+
+    def test_get_remaining_headline_pages_honours_max_results(self):
+        """no more pages are requested than needed for `max_results`
+        articles, and a single page is returned as-is."""
+
+        # Arrange
+        engine = c.AsyncFetchEngine(rate_limiter=fast_rate_limiter())
+
+        with FakeNewsAPIServer(articles_per_source=95) as server:
+            url = server.url + "/v2/top-headlines"
+            params = {'sources': 'source-1', 'apiKey': '543'}
+            first_page = requests.get(url, params=params)
+
+        # Act
+            capped = c.NetworkOperations.get_remaining_headline_pages(
+                first_page, engine=engine, max_results=50)
+            single = c.NetworkOperations.get_remaining_headline_pages(
+                first_page, engine=engine, max_results=10)
+
+        # Assert
+        assert len(capped.json()['articles']) == 50
+        assert len(server.requests_seen) == 3
+        assert single is first_page
+
+    def test_get_paged_source_headlines_keeps_pages_before_a_failure(self):
+        """a source paged past the results its plan allows keeps the
+        articles of the pages before the failing one, flagged as partial."""
+
+        # Arrange
+        limiter = fast_rate_limiter()
+        engine = c.AsyncFetchEngine(rate_limiter=limiter)
+
+        with FakeNewsAPIServer(articles_per_source=250,
+                               max_results=100) as server:
+            url = server.url + "/v2/top-headlines"
+
+        # Act
+            result = c.NetworkOperations.get_paged_source_headlines(
+                "source-3", api_key="543", url_endpoint=url,
+                rate_limiter=limiter, engine=engine, page_size=100)
+
+        # Assert
+        assert result.status_code == requests.codes.ok
+        assert len(result.json()['articles']) == 100
+        assert result.partial_error.startswith("HTTP status 426 on page")
+
+    def test_get_news_keyword_headlines_fails_on_a_failed_page(self,
+                                                               tmpdir):
+        """a keyword whose later page fails writes nothing and fails the
+        task, rather than storing the page's error as its headlines."""
+
+        # Arrange
+        with FakeNewsAPIServer(articles_per_source=150,
+                               max_results=100) as server:
+            url = server.url + "/v2/top-headlines"
+            params = {'q': 'cancer', 'pageSize': 100, 'apiKey': '543'}
+            first_page = requests.get(url, params=params)
+
+        # Act
+            result = c.NetworkOperations.get_news_keyword_headlines(
+                first_page, headlines_dir=str(tmpdir))
+
+        # Assert
+        assert result is False
+        assert tmpdir.listdir() == []
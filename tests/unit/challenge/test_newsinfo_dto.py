@@ -65,6 +65,41 @@ class TestNewsInfoDTO:
         # Assert
         assert not files
 
+    def test_load_news_files_reads_manifest(self, home_directory_res):
+        """function returns the json files listed in the news directory's
+        manifest, ignoring files that were never published to it.
+        """
+
+        # Arrange
+        pipeline_name = "tempus_challenge_dag"
+
+        news_path = os.path.join(home_directory_res,
+                                 'tempdata',
+                                 pipeline_name,
+                                 'news')
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory holding a published news
+            # file and a partially written, unpublished, one.
+            patcher.fs.create_dir(news_path)
+            patcher.fs.create_file(os.path.join(news_path, 'partial.json'))
+            c.FileStorage.write_json_to_file({"sources": []},
+                                             news_path,
+                                             filename="sources",
+                                             create_date="2018-10-22")
+
+        # Act
+            news_obj = c.NewsInfoDTO(pipeline_name, news_path)
+            files = news_obj.news_files
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert files == ["2018-10-22_sources.json"]
+
     def test_newsinfodto_wrong_pipeline_name_fails(self):
         """creation of a new instance with a wrong pipeline name fails."""
 
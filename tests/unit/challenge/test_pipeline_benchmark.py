@@ -0,0 +1,155 @@
+"""Tempus Data Engineer Challenge  - Benchmarks.
+
+Defines end to end benchmarks of the extract, transform and upload stages
+of both DAG pipelines, run outside of Airflow on synthetic news corpora,
+with uploads going to a moto-mocked Amazon S3. Run them with
+`make benchmark`; the corpus scales are picked with BENCHMARK_SCALES, and
+the stage measurements written to the json report named by
+BENCHMARK_REPORT. Stages slower than in the report named by
+BENCHMARK_BASELINE fail the benchmark.
+"""
+
+import pytest
+
+from moto import mock_s3
+
+import pipeline_benchmark as bench
+
+
+@pytest.mark.benchmarktests
+class TestPipelineBenchmark:
+    """measures the per-stage wall time, peak memory and throughput of
+    both pipelines."""
+
+    @pytest.mark.parametrize('scale', bench.selected_scales())
+    def test_benchmark_news_pipeline(self, scale, monkeypatch, tmpdir):
+        """runs the 'tempus_challenge_dag' pipeline stages on a synthetic
+        corpus and records their measurements."""
+
+        # Arrange
+        bench.isolate_environment(monkeypatch, tmpdir)
+        corpus = bench.synthetic_corpus(**bench.CORPUS_SCALES[scale])
+        pipeline_name = 'tempus_challenge_dag'
+
+        with mock_s3():
+            bench.create_buckets()
+
+        # Act
+            stages = bench.run_news_pipeline(corpus)
+
+        run = bench.record_report(scale, pipeline_name, stages)
+        baseline = bench.baseline_run(pipeline_name, scale)
+
+        # Assert
+        extract, transform, upload = stages
+        scale_info = bench.CORPUS_SCALES[scale]
+        assert extract['result'] is True
+        assert transform['result'] is True
+        assert upload['result'][0] is True
+        assert upload['records'] == (scale_info['sources'] *
+                                     scale_info['articles'])
+        if baseline:
+            assert not bench.regressions(run, baseline)
+
+    @pytest.mark.parametrize('scale', bench.selected_scales())
+    def test_benchmark_keyword_pipeline(self, scale, monkeypatch, tmpdir):
+        """runs the 'tempus_bonus_challenge_dag' pipeline stages on a
+        synthetic corpus and records their measurements."""
+
+        # Arrange
+        bench.isolate_environment(monkeypatch, tmpdir)
+        corpus = bench.synthetic_corpus(**bench.CORPUS_SCALES[scale])
+        pipeline_name = 'tempus_bonus_challenge_dag'
+
+        with mock_s3():
+            bench.create_buckets()
+
+        # Act
+            stages = bench.run_keyword_pipeline(corpus)
+
+        run = bench.record_report(scale, pipeline_name, stages)
+        baseline = bench.baseline_run(pipeline_name, scale)
+
+        # Assert
+        extract, transform, upload = stages
+        scale_info = bench.CORPUS_SCALES[scale]
+        assert extract['result'] is True
+        assert transform['result'] is True
+        assert upload['result'][0] is True
+        assert upload['records'] == (len(bench.PIPELINE_KEYWORDS) *
+                                     scale_info['articles'])
+        if baseline:
+            assert not bench.regressions(run, baseline)
+
+    @pytest.mark.parametrize('scale', bench.selected_scales())
+    def test_benchmark_typed_schema(self, scale, monkeypatch, tmpdir):
+        """merges a synthetic corpus into the headlines DataFrame without
+        and with the typed schema, and records the DataFrame's memory and
+        the time taken to sort and group it."""
+
+        # Arrange
+        bench.isolate_environment(monkeypatch, tmpdir)
+        corpus = bench.synthetic_corpus(**bench.CORPUS_SCALES[scale])
+        pipeline_name = 'headlines_schema'
+
+        # Act
+        stages = bench.run_schema_benchmark(corpus)
+
+        run = bench.record_report(scale, pipeline_name, stages)
+        baseline = bench.baseline_run(pipeline_name, scale)
+
+        # Assert
+        merges = {stage['stage']: stage for stage in stages
+                  if stage['stage'].startswith('merge_')}
+        untyped = merges['merge_untyped']
+        typed = merges['merge_typed']
+        assert typed['frame_bytes'] < untyped['frame_bytes']
+        assert len(typed['result']) == len(untyped['result'])
+        if baseline:
+            assert not bench.regressions(run, baseline)
+
+    @pytest.mark.parametrize('scale', bench.selected_scales())
+    def test_benchmark_keyword_file_parsing(self, scale, monkeypatch,
+                                            tmpdir):
+        """reads a keyword headlines file holding every article of a
+        synthetic corpus with read_json, through a DataFrame, and straight
+        into records, and records the time each takes."""
+
+        # Arrange
+        bench.isolate_environment(monkeypatch, tmpdir)
+        corpus = bench.synthetic_corpus(**bench.CORPUS_SCALES[scale])
+        pipeline_name = 'keyword_file_parsing'
+
+        # Act
+        stages = bench.run_parse_benchmark(corpus)
+
+        run = bench.record_report(scale, pipeline_name, stages)
+        baseline = bench.baseline_run(pipeline_name, scale)
+
+        # Assert
+        results = {stage['stage']: stage['result'] for stage in stages}
+        direct = results['parse_direct']
+        assert len(direct) == len(corpus['source_headlines']) * \
+            bench.CORPUS_SCALES[scale]['articles']
+        assert results['parse_dataframe'].articles == direct.articles
+        assert results['parse_read_json'].articles == direct.articles
+        assert results['transform'][0] is True
+        if baseline:
+            assert not bench.regressions(run, baseline)
+
+    def test_regressions_flags_slower_stages(self):
+        """stages slower than their baseline by more than the tolerance
+        are reported as regressions."""
+
+        # Arrange
+        baseline = {'stages': {'extract': {'wall_time': 1.0},
+                               'transform': {'wall_time': 2.0}}}
+        run = {'stages': {'extract': {'wall_time': 1.2},
+                          'transform': {'wall_time': 3.5},
+                          'upload': {'wall_time': 9.0}}}
+
+        # Act
+        result = bench.regressions(run, baseline, tolerance=1.5)
+
+        # Assert
+        assert result == ['transform']
@@ -0,0 +1,136 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the opt-in profiling mode of the transform task.
+"""
+
+import datetime
+import os
+import pstats
+import pytest
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+
+def fake_pipeline_information(headlines_dir, csv_dir):
+    """returns a stand-in for the NewsInfoDTO class, pointing a pipeline at
+    the given directories."""
+
+    def pipeline_information(pipeline_name):
+        info = MagicMock()
+        info.headlines_directory = headlines_dir
+        info.csv_directory = csv_dir
+        return info
+
+    return pipeline_information
+
+
+def transform_context(pipeline_name, **extra) -> dict:
+    """returns the parts of an airflow context the transform task reads."""
+
+    dag = MagicMock()
+    dag.dag_id = pipeline_name
+    context = {'dag': dag,
+               'execution_date': datetime.datetime(2018, 10, 22)}
+    context.update(extra)
+
+    return context
+
+
+@pytest.mark.profilingtests
+class TestProfiling:
+    """tests the profiling of the transform task."""
+
+    def test_profiling_is_off_by_default(self, monkeypatch):
+        """no profiling is done unless it is asked for."""
+
+        # Arrange
+        monkeypatch.delenv(c.PROFILE_ENV_VARIABLE, raising=False)
+
+        # Act
+        result = c.profiling_requested({'params': {}})
+
+        # Assert
+        assert result is False
+
+    def test_profiling_requested_by_environment(self, monkeypatch):
+        """the environment flag turns profiling on."""
+
+        # Arrange
+        monkeypatch.setenv(c.PROFILE_ENV_VARIABLE, "1")
+
+        # Act
+        result = c.profiling_requested({})
+
+        # Assert
+        assert result is True
+
+    def test_profiling_requested_by_param_or_run_conf(self, monkeypatch):
+        """the DAG param, or the configuration of a triggered run, turns
+        profiling on for that run."""
+
+        # Arrange
+        monkeypatch.delenv(c.PROFILE_ENV_VARIABLE, raising=False)
+        dag_run = MagicMock()
+        dag_run.conf = {c.PROFILE_PARAM: True}
+
+        # Act
+        by_param = c.profiling_requested({'params': {c.PROFILE_PARAM: True}})
+        by_conf = c.profiling_requested({'dag_run': dag_run})
+
+        # Assert
+        assert by_param is True
+        assert by_conf is True
+
+    def test_transform_saves_profile_next_to_csvs(self, monkeypatch, tmpdir):
+        """a profiled transform run saves a loadable profile, and its
+        summary, in the pipeline's csv folder."""
+
+        # Arrange
+        monkeypatch.delenv(c.PROFILE_ENV_VARIABLE, raising=False)
+        csv_dir = str(tmpdir)
+        information = fake_pipeline_information("headlines", csv_dir)
+        context = transform_context("tempus_challenge_dag",
+                                    params={c.PROFILE_PARAM: True})
+
+        def transformation(directory, timestamp):
+            return sorted(str(index) for index in range(1000)) is not None
+
+        # Act
+        result = c.TransformOperations.transform_headlines_to_csv(
+            pipeline_information=information,
+            tf_json_func=transformation,
+            **context)
+
+        profile_path = os.path.join(csv_dir,
+                                    "2018-10-22_transform_profile.prof")
+        summary_path = os.path.join(csv_dir,
+                                    "2018-10-22_transform_profile.txt")
+        stats = pstats.Stats(profile_path)
+
+        # Assert
+        assert result is True
+        assert stats.total_calls > 0
+        assert any(function[2] == "transformation"
+                   for function in stats.stats)
+        assert os.path.isfile(summary_path)
+
+    def test_transform_is_not_profiled_when_off(self, monkeypatch, tmpdir):
+        """an unprofiled transform run saves no profile."""
+
+        # Arrange
+        monkeypatch.delenv(c.PROFILE_ENV_VARIABLE, raising=False)
+        csv_dir = str(tmpdir)
+        information = fake_pipeline_information("headlines", csv_dir)
+        context = transform_context("tempus_bonus_challenge_dag")
+
+        # Act
+        result = c.TransformOperations.transform_headlines_to_csv(
+            pipeline_information=information,
+            tf_key_json_func=lambda directory, timestamp: True,
+            **context)
+
+        # Assert
+        assert result is True
+        assert os.listdir(csv_dir) == []
@@ -0,0 +1,210 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the client-side rate limiting of the remote calls
+made to the News API in the DAGs.
+"""
+
+import email.utils
+import pytest
+import requests
+import time
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+
+class FakeClock:
+    """clock whose time only moves forward when it is slept on, so the
+    rate limiter can be tested without actually waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_response(status_code, headers=None):
+    """returns a requests.Response object with the given status and
+    headers, as if returned by a remote call to the News API."""
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+
+    return response
+
+
+@pytest.mark.ratelimittests
+class TestRateLimiter:
+    """tests the throttling of the remote calls made to the News API."""
+
+    def test_token_bucket_allows_burst_then_waits(self):
+        """the bucket hands out a burst of tokens at once, and then one
+        token every 1/rate seconds."""
+
+        # Arrange
+        clock = FakeClock()
+        bucket = c.TokenBucket(rate=2, capacity=3,
+                               clock=clock.time, sleep=clock.sleep)
+
+        # Act
+        burst_waits = [bucket.acquire() for _ in range(3)]
+        next_wait = bucket.acquire()
+
+        # Assert
+        assert burst_waits == [0.0, 0.0, 0.0]
+        assert next_wait == pytest.approx(0.5)
+        assert clock.now == pytest.approx(0.5)
+
+    def test_token_bucket_pause_delays_tokens(self):
+        """no tokens are handed out while the bucket is paused."""
+
+        # Arrange
+        clock = FakeClock()
+        bucket = c.TokenBucket(rate=10, capacity=10,
+                               clock=clock.time, sleep=clock.sleep)
+
+        # Act
+        bucket.pause(4)
+        bucket.acquire()
+
+        # Assert
+        assert clock.now >= 4
+
+    def test_token_bucket_invalid_rate_fails(self):
+        """a bucket cannot be created with a non-positive rate."""
+
+        # Act
+        with pytest.raises(ValueError) as err:
+            c.TokenBucket(rate=0, capacity=1)
+
+        # Assert
+        actual_message = str(err.value)
+        assert "Rate limit must be positive" in actual_message
+
+    def test_adaptive_concurrency_halves_then_grows(self):
+        """the concurrency limit halves on throttling and grows back by one
+        after a window of successes."""
+
+        # Arrange
+        concurrency = c.AdaptiveConcurrency(maximum=8)
+
+        # Act
+        concurrency.record_throttled()
+        lowered_limit = concurrency.limit
+        for _ in range(lowered_limit):
+            concurrency.record_success()
+
+        # Assert
+        assert lowered_limit == 4
+        assert concurrency.limit == 5
+
+    def test_adaptive_concurrency_stays_within_bounds(self):
+        """the concurrency limit never drops below its minimum."""
+
+        # Arrange
+        concurrency = c.AdaptiveConcurrency(maximum=4, minimum=2)
+
+        # Act
+        for _ in range(5):
+            concurrency.record_throttled()
+
+        # Assert
+        assert concurrency.limit == 2
+
+    def test_retry_after_seconds_parses_both_formats(self):
+        """the Retry-After header is read as either seconds or a date."""
+
+        # Arrange
+        retry_date = email.utils.formatdate(time.time() + 60, usegmt=True)
+        seconds_response = make_response(429, {'Retry-After': '7'})
+        date_response = make_response(429, {'Retry-After': retry_date})
+        missing_response = make_response(429)
+
+        # Act
+        seconds_result = c.RateLimiter.retry_after_seconds(seconds_response)
+        date_result = c.RateLimiter.retry_after_seconds(date_response)
+        missing_result = c.RateLimiter.retry_after_seconds(missing_response)
+
+        # Assert
+        assert seconds_result == 7
+        assert 55 <= date_result <= 60
+        assert missing_result == c.DEFAULT_RETRY_AFTER
+
+    def test_call_retries_throttled_request_after_retry_after(self):
+        """a throttled call waits as long as Retry-After says and is retried
+        until it succeeds."""
+
+        # Arrange
+        clock = FakeClock()
+        limiter = c.RateLimiter(rate=100, burst=10, max_concurrency=4,
+                                clock=clock.time, sleep=clock.sleep)
+        http_method = MagicMock(side_effect=[
+            make_response(requests.codes.too_many_requests,
+                          {'Retry-After': '3'}),
+            make_response(requests.codes.ok)])
+
+        # Act
+        result = limiter.call(http_method, "https://newsapi.org/v2")
+
+        # Assert
+        assert result.status_code == requests.codes.ok
+        assert http_method.call_count == 2
+        assert clock.now >= 3
+        assert limiter.concurrency.limit == 2
+
+    def test_call_gives_up_after_max_retries(self):
+        """a call still throttled after the maximum number of retries
+        returns its '429 Too Many Requests' response."""
+
+        # Arrange
+        clock = FakeClock()
+        limiter = c.RateLimiter(rate=100, burst=10, max_retries=2,
+                                clock=clock.time, sleep=clock.sleep)
+        http_method = MagicMock(return_value=make_response(
+                                requests.codes.too_many_requests,
+                                {'Retry-After': '1'}))
+
+        # Act
+        result = limiter.call(http_method, "https://newsapi.org/v2")
+
+        # Assert
+        assert result.status_code == requests.codes.too_many_requests
+        assert http_method.call_count == 3
+
+    def test_get_source_headlines_uses_rate_limiter(self):
+        """the call retrieving a source's top-headlines is made under the
+        given rate limiter."""
+
+        # Arrange
+        response_obj = make_response(requests.codes.ok)
+        request_method = MagicMock(return_value=response_obj)
+        limiter = MagicMock()
+        limiter.call.side_effect = lambda func, *args: func(*args)
+
+        # Act
+        result = c.NetworkOperations.get_source_headlines(
+            "abc-news",
+            http_method=request_method,
+            api_key="news api key",
+            rate_limiter=limiter)
+
+        # Assert
+        assert result is response_obj
+        assert limiter.call.call_count == 1
+
+    def test_shared_returns_one_limiter_per_process(self):
+        """every caller gets the same shared rate limiter."""
+
+        # Act
+        result = c.RateLimiter.shared()
+
+        # Assert
+        assert result is c.RateLimiter.shared()
@@ -0,0 +1,311 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the on-disk cache of News API responses used by
+the task retrieving the english news sources in the DAGs.
+"""
+
+import datetime
+import json
+import os
+import pytest
+import requests
+import time
+
+from airflow.models import DAG
+
+from unittest.mock import MagicMock
+from pyfakefs.fake_filesystem_unittest import Patcher
+
+from dags import challenge as c
+
+
+# dummy News API sources endpoint and query parameters
+SOURCES_URL = "https://newsapi.org/v2/sources"
+SOURCES_PARAMS = {'language': 'en', 'apiKey': '543'}
+
+
+def make_response(status_code, data=None, headers=None):
+    """returns a requests.Response object with the given status, json body
+    and headers, as if returned by a remote call to the News API."""
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = SOURCES_URL + "?language=en&apiKey=543"
+    response.encoding = "utf-8"
+    response.headers['Content-Type'] = "application/json"
+    response.headers.update(headers or {})
+    response.from_cache = False
+    if data is not None:
+        response._content = json.dumps(data).encode("utf-8")
+    else:
+        response._content = b""
+
+    return response
+
+
+@pytest.mark.cachetests
+class TestResponseCache:
+    """tests the caching and revalidation of News API responses."""
+
+    @pytest.fixture(scope='class')
+    def airflow_context(self) -> dict:
+        """returns an airflow context object for tempus_challenge_dag.
+
+        Mimics parts of the airflow context returned during execution
+        of the tempus_challenge_dag.
+
+        https://airflow.apache.org/code.html#default-variables
+        """
+
+        dag = MagicMock(spec=DAG)
+        dag.dag_id = "tempus_challenge_dag"
+
+        return {
+            'ds': datetime.datetime.now().isoformat().split('T')[0],
+            'dag': dag
+        }
+
+    def test_get_uncached_response_calls_api_and_stores_it(self):
+        """a response not yet in the cache is fetched and then stored."""
+
+        # Arrange
+        data = {"status": "ok", "sources": [{"id": "abc-news"}]}
+        http_method = MagicMock(return_value=make_response(
+                                requests.codes.ok, data, {'ETag': '"v1"'}))
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            cache_dir = os.path.join("tempdata", "cache", "http")
+            patcher.fs.create_dir(cache_dir)
+            cache = c.ResponseCache(cache_dir=cache_dir,
+                                    http_method=http_method)
+
+        # Act
+            result = cache.get(SOURCES_URL, SOURCES_PARAMS)
+            stored_files = sorted(os.listdir(cache_dir))
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert http_method.call_count == 1
+        assert result.from_cache is False
+        assert result.json() == data
+        assert [os.path.splitext(name)[1] for name in stored_files] == \
+            ['.body', '.json']
+
+    def test_get_fresh_cached_response_skips_api_call(self):
+        """a cached response younger than the ttl is served from disk
+        without calling the News API."""
+
+        # Arrange
+        data = {"status": "ok", "sources": [{"id": "abc-news"}]}
+        http_method = MagicMock(return_value=make_response(
+                                requests.codes.ok, data))
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            cache_dir = os.path.join("tempdata", "cache", "http")
+            patcher.fs.create_dir(cache_dir)
+            cache = c.ResponseCache(cache_dir=cache_dir,
+                                    http_method=http_method)
+            cache.get(SOURCES_URL, SOURCES_PARAMS)
+
+        # Act
+            result = cache.get(SOURCES_URL, SOURCES_PARAMS)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert http_method.call_count == 1
+        assert result.from_cache is True
+        assert result.status_code == requests.codes.ok
+        assert result.json() == data
+
+    def test_cached_response_is_streamed_to_file(self, tmpdir):
+        """a response served from the cache can be streamed to a file like
+        one received from the News API."""
+
+        # Arrange
+        data = {"status": "ok", "sources": [{"id": "abc-news"}]}
+        http_method = MagicMock(return_value=make_response(
+                                requests.codes.ok, data))
+        cache_dir = os.path.join(str(tmpdir), "cache")
+        news_dir = os.path.join(str(tmpdir), "news")
+        os.makedirs(cache_dir)
+        os.makedirs(news_dir)
+        cache = c.ResponseCache(cache_dir=cache_dir, http_method=http_method)
+        cache.get(SOURCES_URL, SOURCES_PARAMS)
+        cached = cache.get(SOURCES_URL, SOURCES_PARAMS)
+
+        # Act
+        result = c.FileStorage.write_response_to_file(cached, news_dir,
+                                                      "sources")
+        filename = c.FileStorage.manifest_filenames(news_dir, ".json")[0]
+
+        # Assert
+        assert cached.from_cache is True
+        assert c.is_streamable(cached) is True
+        assert result is True
+        with open(os.path.join(news_dir, filename)) as inputfile:
+            assert json.load(inputfile) == data
+
+    def test_get_stale_cached_response_revalidates_it(self):
+        """a cached response older than the ttl is revalidated with its
+        ETag and Last-Modified headers, and served from disk on a
+        '304 Not Modified' reply."""
+
+        # Arrange
+        data = {"status": "ok", "sources": [{"id": "abc-news"}]}
+        modified = "Mon, 22 Oct 2018 00:00:00 GMT"
+        headers = {'ETag': '"v1"', 'Last-Modified': modified}
+        http_method = MagicMock(side_effect=[
+            make_response(requests.codes.ok, data, headers),
+            make_response(requests.codes.not_modified)])
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            cache_dir = os.path.join("tempdata", "cache", "http")
+            patcher.fs.create_dir(cache_dir)
+            cache = c.ResponseCache(cache_dir=cache_dir,
+                                    ttl=0,
+                                    http_method=http_method)
+            cache.get(SOURCES_URL, SOURCES_PARAMS)
+
+        # Act
+            before = time.time()
+            result = cache.get(SOURCES_URL, SOURCES_PARAMS)
+            key = cache.cache_key(SOURCES_URL, SOURCES_PARAMS)
+            metadata = cache.load_metadata(key)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        sent_headers = http_method.call_args[1]['headers']
+        assert sent_headers == {'If-None-Match': '"v1"',
+                                'If-Modified-Since': modified}
+        assert result.from_cache is True
+        assert result.json() == data
+        assert metadata['stored_at'] >= before
+
+    def test_get_error_response_is_not_cached(self):
+        """a response with an error status is returned but not stored."""
+
+        # Arrange
+        data = {"status": "error", "code": "rateLimited"}
+        http_method = MagicMock(return_value=make_response(
+                                requests.codes.too_many_requests, data))
+        # hand the throttled response straight back rather than retrying
+        rate_limiter = c.RateLimiter(max_retries=0)
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            cache_dir = os.path.join("tempdata", "cache", "http")
+            patcher.fs.create_dir(cache_dir)
+            cache = c.ResponseCache(cache_dir=cache_dir,
+                                    http_method=http_method,
+                                    rate_limiter=rate_limiter)
+
+        # Act
+            result = cache.get(SOURCES_URL, SOURCES_PARAMS)
+            stored_files = os.listdir(cache_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result.status_code == requests.codes.too_many_requests
+        assert result.from_cache is False
+        assert not stored_files
+
+    def test_cache_key_ignores_api_key(self):
+        """responses are cached under the same key whichever api key
+        is used to request them."""
+
+        # Arrange
+        cache = c.ResponseCache(cache_dir="cache", http_method=MagicMock())
+        other_params = {'language': 'en', 'apiKey': '678'}
+
+        # Act
+        result = cache.cache_key(SOURCES_URL, SOURCES_PARAMS)
+        other_result = cache.cache_key(SOURCES_URL, other_params)
+        french_result = cache.cache_key(SOURCES_URL, {'language': 'fr'})
+
+        # Assert
+        assert result == other_result
+        assert result != french_result
+        assert '543' not in result
+
+    def test_get_news_sources_stores_cached_response(self, airflow_context):
+        """the sources task stores the response served by the cache in the
+        pipeline's news directory."""
+
+        # Arrange
+        data = {"status": "ok", "sources": [{"id": "abc-news"}]}
+        response_cache = MagicMock()
+        response_cache.get.return_value = make_response(requests.codes.ok,
+                                                        data)
+        news_path = c.FileStorage.get_news_directory("tempus_challenge_dag")
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(news_path)
+            os.environ["NEWS_API_KEY"] = "543"
+
+        # Act
+            result = c.NetworkOperations.get_news_sources(
+                response_cache=response_cache,
+                **airflow_context)
+            news_files = c.FileStorage.manifest_filenames(news_path, '.json')
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert len(news_files) == 1
+        assert news_files[0].endswith("english_news_sources.json")
+
+    def test_get_news_sources_error_response_fails(self, airflow_context):
+        """the sources task fails when the News API returns an error."""
+
+        # Arrange
+        data = {"status": "error", "code": "apiKeyInvalid"}
+        response_cache = MagicMock()
+        response_cache.get.return_value = make_response(
+                                          requests.codes.unauthorized, data)
+        news_path = c.FileStorage.get_news_directory("tempus_challenge_dag")
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem directory to test the method
+            patcher.fs.create_dir(news_path)
+            os.environ["NEWS_API_KEY"] = "543"
+
+        # Act
+            with pytest.raises(ValueError) as err:
+                c.NetworkOperations.get_news_sources(
+                    response_cache=response_cache,
+                    **airflow_context)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        actual_message = str(err.value)
+        assert "failed with status 401" in actual_message
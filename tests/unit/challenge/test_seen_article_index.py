@@ -0,0 +1,215 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the persistent index of the news articles delivered
+by earlier pipeline runs, used to write out only new articles.
+"""
+
+import datetime
+import importlib
+import os
+import pytest
+
+from unittest.mock import MagicMock
+
+from dags import challenge as c
+
+# the copy of the package the operations import, which holds the index
+# the transformation opens and the ArticleBatch class it filters.
+import challenge as operations_package
+
+
+def batch(urls, package=c):
+    """returns a batch with a dummy article per url."""
+
+    return package.ArticleBatch(
+        [package.Article(source_id="wired",
+                         source_name="Wired",
+                         author=None,
+                         title="Headline {}".format(index),
+                         description=None,
+                         url=url,
+                         url_to_image=None,
+                         published_at="2018-10-11T23:33:03Z",
+                         content=None)
+         for index, url in enumerate(urls)])
+
+
+def urls_of(news_data) -> list:
+    return [article.url for article in news_data]
+
+
+def transform_context(pipeline_name, execution_date) -> dict:
+    """returns the parts of an airflow context the transform task reads."""
+
+    dag = MagicMock()
+    dag.dag_id = pipeline_name
+
+    return {'dag': dag, 'execution_date': execution_date}
+
+
+@pytest.mark.seenindextests
+class TestSeenArticleIndex:
+    """tests the seen article index."""
+
+    def test_articles_delivered_by_earlier_runs_are_left_out(self, tmpdir):
+        """a run only keeps the articles no other run delivered; re-running
+        the same date keeps the same articles."""
+
+        # Arrange
+        path = os.path.join(str(tmpdir), "index.sqlite")
+        first_run = c.SeenArticleIndex(path, "2018-10-22")
+        second_run = c.SeenArticleIndex(path, "2018-10-23")
+        rerun = c.SeenArticleIndex(path, "2018-10-22")
+
+        # Act
+        first_run.open()
+        first = first_run.filter_batch(batch(["https://wired.com/a",
+                                              "https://wired.com/b"]))
+        first_run.close()
+
+        second_run.open()
+        second = second_run.filter_batch(batch(["https://www.wired.com/b/",
+                                                "https://wired.com/c",
+                                                None]))
+        second_run.close()
+
+        rerun.open()
+        repeated = rerun.filter_batch(batch(["https://wired.com/a",
+                                             "https://wired.com/b",
+                                             "https://wired.com/c"]))
+        rerun.close()
+
+        # Assert
+        assert urls_of(first) == ["https://wired.com/a",
+                                  "https://wired.com/b"]
+        assert urls_of(second) == ["https://wired.com/c", None]
+        assert second_run.delivered == 1
+        assert urls_of(repeated) == ["https://wired.com/a",
+                                     "https://wired.com/b"]
+
+    def test_articles_are_delivered_once_per_scope(self,
+                                                   monkeypatch,
+                                                   tmpdir):
+        """an article delivered under one keyword's scope is still kept
+        under another's, and left out under its own by later runs."""
+
+        # Arrange
+        for name in ['challenge', 'dags.challenge']:
+            storage = importlib.import_module(name + '.storage.'
+                                              'filestorage_operations')
+            monkeypatch.setattr(storage, 'HOME_DIRECTORY', str(tmpdir))
+
+        index = operations_package.seen_article_index
+        scope = operations_package.seen_article_scope
+        pipeline_name = "tempus_bonus_challenge_dag"
+        urls = ["https://wired.com/a"]
+
+        def deliver(keyword):
+            with scope(keyword):
+                return urls_of(operations_package.filter_delivered_articles(
+                    batch(urls, operations_package)))
+
+        # Act
+        with index(pipeline_name, "2018-10-22"):
+            first = [deliver("cancer"), deliver("immunotherapy")]
+        with index(pipeline_name, "2018-10-23") as second_run:
+            second = [deliver("cancer"), deliver("tempus")]
+
+        # Assert
+        assert first == [urls, urls]
+        assert second == [[], urls]
+        assert second_run.scope is None
+
+    def test_uncommitted_deliveries_are_discarded(self, tmpdir):
+        """articles recorded by a run whose index is closed without
+        committing count as new in the next run."""
+
+        # Arrange
+        path = os.path.join(str(tmpdir), "index.sqlite")
+        failed_run = c.SeenArticleIndex(path, "2018-10-22")
+        next_run = c.SeenArticleIndex(path, "2018-10-23")
+
+        # Act
+        failed_run.open()
+        failed_run.filter_batch(batch(["https://wired.com/a"]))
+        failed_run.close(commit=False)
+
+        next_run.open()
+        result = next_run.filter_batch(batch(["https://wired.com/a"]))
+        next_run.close()
+
+        # Assert
+        assert urls_of(result) == ["https://wired.com/a"]
+
+    def test_deliveries_older_than_retention_are_forgotten(self, tmpdir):
+        """articles delivered before the retention period count as new."""
+
+        # Arrange
+        path = os.path.join(str(tmpdir), "index.sqlite")
+        old_run = c.SeenArticleIndex(path, "2018-10-01")
+        recent_run = c.SeenArticleIndex(path, "2018-10-05")
+        late_run = c.SeenArticleIndex(path, "2018-10-20", retention_days=7)
+
+        # Act
+        old_run.open()
+        old_run.filter_batch(batch(["https://wired.com/old"]))
+        old_run.close()
+
+        recent_run.open()
+        recent_run.filter_batch(batch(["https://wired.com/recent"]))
+        recent_run.close()
+
+        late_run.open()
+        result = late_run.filter_batch(batch(["https://wired.com/old",
+                                              "https://wired.com/recent"]))
+        late_run.close()
+
+        # Assert
+        assert urls_of(result) == ["https://wired.com/old",
+                                   "https://wired.com/recent"]
+
+    def test_incremental_transform_writes_only_new_articles(self,
+                                                            monkeypatch,
+                                                            tmpdir):
+        """in incremental mode each transform run only passes on the
+        articles that no earlier successful run delivered."""
+
+        # Arrange
+        for name in ['challenge', 'dags.challenge']:
+            storage = importlib.import_module(name + '.storage.'
+                                              'filestorage_operations')
+            monkeypatch.setattr(storage, 'HOME_DIRECTORY', str(tmpdir))
+        monkeypatch.setenv(c.INCREMENTAL_ENV_VARIABLE, "1")
+        monkeypatch.delenv(c.DEDUPLICATE_TITLES_ENV_VARIABLE, raising=False)
+
+        transform = c.TransformOperations.transform_headlines_to_csv
+        pipeline_name = "tempus_bonus_challenge_dag"
+        delivered = []
+
+        def transformation(urls, status=True):
+            def transform_keyword_headlines(directory, timestamp):
+                news_data = operations_package.filter_delivered_articles(
+                    batch(urls, operations_package))
+                delivered.append(urls_of(news_data))
+                return status
+            return transform_keyword_headlines
+
+        runs = [(datetime.datetime(2018, 10, 22), ["https://a", "https://b"],
+                 True),
+                (datetime.datetime(2018, 10, 23), ["https://b", "https://c"],
+                 False),
+                (datetime.datetime(2018, 10, 24), ["https://b", "https://c"],
+                 True)]
+
+        # Act
+        for execution_date, urls, status in runs:
+            transform(tf_key_json_func=transformation(urls, status),
+                      **transform_context(pipeline_name, execution_date))
+
+        # Assert
+        assert delivered == [["https://a", "https://b"],
+                             ["https://c"],
+                             ["https://c"]]
+        assert os.path.isfile(os.path.join(str(tmpdir), 'tempdata', 'cache',
+                                           'seen_articles',
+                                           pipeline_name + ".sqlite"))
@@ -0,0 +1,127 @@
+"""Tempus Data Engineer Challenge  - Unit Tests.
+
+Defines unit tests for the per-source fetch statistics, used to schedule
+the slowest news sources' fetches first.
+"""
+
+import os
+import pytest
+import requests
+
+from dags import challenge as c
+
+from fake_newsapi import FakeNewsAPIServer
+
+import newsapi_benchmark as bench
+
+
+def statistics_store(tmpdir):
+    """returns a statistics store in a temporary directory."""
+    return c.SourceStatistics(os.path.join(str(tmpdir), "sources.json"))
+
+
+@pytest.mark.statisticstests
+class TestSourceStatistics:
+    """tests the per-source fetch statistics and the fetch schedule."""
+
+    def test_record_keeps_moving_averages(self, tmpdir):
+        """a source's statistics move part of the way towards each run's
+        latency and payload size."""
+
+        # Arrange
+        statistics = statistics_store(tmpdir)
+
+        # Act
+        statistics.record({"source:wired": (1.0, 1000)})
+        statistics.record({"source:wired": (2.0, 2000),
+                           "keyword:cancer": (0.5, 300)})
+        result = statistics.read()
+
+        # Assert
+        expected_latency = 1.0 + c.STATISTICS_SMOOTHING * (2.0 - 1.0)
+        assert result["source:wired"]["latency"] == pytest.approx(
+            expected_latency)
+        assert result["source:wired"]["samples"] == 2
+        assert result["keyword:cancer"] == {'latency': 0.5,
+                                            'bytes': 300,
+                                            'samples': 1}
+
+    def test_schedule_puts_slowest_first(self, tmpdir):
+        """sources are ordered slowest first, then largest; sources without
+        statistics count as average ones, and ties keep their order."""
+
+        # Arrange
+        statistics = statistics_store(tmpdir)
+        keys = ["source:a", "source:b", "source:c", "source:d", "source:e"]
+
+        # Act
+        unscheduled = statistics.schedule(keys)
+        statistics.record({"source:a": (0.1, 100),
+                           "source:b": (0.9, 100),
+                           "source:d": (0.5, 100),
+                           "source:e": (0.5, 900)})
+        scheduled = statistics.schedule(keys)
+
+        # Assert
+        assert unscheduled == keys
+        assert scheduled == ["source:b", "source:e", "source:c", "source:d",
+                             "source:a"]
+
+    def test_concurrent_fetch_starts_slowest_sources_first(self, tmpdir):
+        """the headlines of the sources slowest in earlier runs are
+        requested first, and this run's latencies recorded."""
+
+        # Arrange
+        statistics = statistics_store(tmpdir)
+        statistics.record({"source:source-1": (0.1, 100),
+                           "source:source-2": (0.9, 100),
+                           "keyword:tempus": (0.5, 100)})
+        limiter = c.RateLimiter(rate=1000, burst=1000)
+        engine = c.AsyncFetchEngine(max_connections=1, rate_limiter=limiter)
+
+        with FakeNewsAPIServer() as server:
+            url = server.url + "/v2/top-headlines"
+
+        # Act
+            result = c.NetworkOperations.get_headlines_concurrently(
+                source_ids=['source-1', 'source-2'],
+                keywords=['tempus'],
+                api_key='543',
+                url_endpoint=url,
+                engine=engine,
+                statistics=statistics)
+            requests_seen = [params.get('sources', params.get('q'))
+                             for _, params in server.requests_seen]
+
+        # Assert
+        assert requests_seen == ['source-2', 'tempus', 'source-1']
+        assert list(result['sources']) == ['source-1', 'source-2']
+        assert result['keywords']['tempus'].status_code == requests.codes.ok
+        assert statistics.read()["source:source-1"]["samples"] == 2
+
+    def test_headlines_task_fetches_slowest_sources_first(self,
+                                                          monkeypatch,
+                                                          tmpdir):
+        """the headlines task requests the first pages of the sources
+        slowest in earlier runs first, and records this run's latencies."""
+
+        # Arrange
+        bench.isolate_home(monkeypatch, tmpdir)
+        monkeypatch.delenv(c.HEDGING_ENV_VARIABLE, raising=False)
+
+        with FakeNewsAPIServer(source_count=3) as server:
+            bench.use_server(monkeypatch, server, max_concurrency=1)
+            statistics = c.SourceStatistics.shared()
+            statistics.record({"source:source-0": (0.1, 100),
+                               "source:source-1": (0.2, 100),
+                               "source:source-2": (0.9, 100)})
+
+        # Act
+            result = bench.run_headlines_benchmark(server)
+            requests_seen = [params['sources']
+                             for _, params in server.requests_seen]
+
+        # Assert
+        assert result['written'] == 3
+        assert requests_seen == ['source-2', 'source-1', 'source-0']
+        assert statistics.read()["source:source-0"]["samples"] == 2
@@ -5,10 +5,12 @@ the transforming the extracted of news data task performed in the DAGs.
 """
 
 import datetime
+import json
 import pandas as pd
 import pandas
 import os
 import pytest
+import sys
 
 from unittest.mock import MagicMock
 from unittest.mock import patch
@@ -232,6 +234,12 @@ class TestTransformOperations:
             patcher.fs.create_dir(headline_dir)
             patcher.fs.create_file(file_path)
 
+            # publish the files in the directory's manifest, as the
+            # upstream task does once it has written them
+            for path in [file_path]:
+                c.FileStorage.publish_manifest_entry(headline_dir,
+                                                     os.path.basename(path))
+
         # Act
             # function should raise errors on an empty directory
             result = transfm_fnc(directory=headline_dir,
@@ -294,6 +302,12 @@ class TestTransformOperations:
             patcher.fs.create_file(file_path_two)
             patcher.fs.create_file(file_path_three)
 
+            # publish the files in the directory's manifest, as the
+            # upstream task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(headline_dir,
+                                                     os.path.basename(path))
+
         # Act
             # function should raise errors on an empty directory
             result = transfm_fnc(directory=headline_dir,
@@ -354,6 +368,12 @@ class TestTransformOperations:
             patcher.fs.create_file(file_path_two)
             patcher.fs.create_file(file_path_three)
 
+            # publish the files in the directory's manifest, as the
+            # upstream task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(headline_dir,
+                                                     os.path.basename(path))
+
         # Act
             # function should raise errors on an empty directory
             result = tfnc(directory=headline_dir,
@@ -367,8 +387,37 @@ class TestTransformOperations:
         # to csv
         assert result is True
 
+    def test_transform_headlines_dataframe_to_csv_publishes_csv(self):
+        """the created csv file is published, with its row count, in the
+        csv directory's manifest for the upload task."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_headlines_dataframe_to_csv
+        frame = pd.DataFrame({'news_title': ['first', 'second', 'third']})
+        filename = "2018-10-22_top_headlines.csv"
+        csv_dir = c.FileStorage.get_csv_directory("tempus_challenge_dag")
+
+        with Patcher() as patcher:
+            # setup pyfakefs - the fake filesystem
+            patcher.setUp()
+
+            # create a fake filesystem csv directory to test the method
+            patcher.fs.create_dir(csv_dir)
+
+        # Act
+            result = tf_func(frame, filename)
+            manifest = c.FileStorage.read_manifest(csv_dir)
+
+            # clean up and remove the fake filesystem
+            patcher.tearDown()
+
+        # Assert
+        assert result is True
+        assert manifest["files"][0]["name"] == filename
+        assert manifest["files"][0]["records"] == 3
+
     def test_transform_data_to_dataframe_succeeds(self):
-        """conversion of a dictionary of numpy array news data into
+        """conversion of a batch of extracted news articles into
         a Pandas Dataframe succeed"""
 
         # Arrange
@@ -379,26 +428,27 @@ class TestTransformOperations:
         tf_func = c.TransformOperations.transform_data_to_dataframe
 
         # craft the dummy extracted news data
-        extracted_data = {'source_id': ["wired"],
-                          'source_name': ["Wired"],
-                          'author': ["Klint Finley"],
-                          'title': ["Microsoft Calls a Truce in Patent Wars"],
-                          'description': ["The software giant, whose\
+        article = c.Article(source_id="wired",
+                            source_name="Wired",
+                            author="Klint Finley",
+                            title="Microsoft Calls a Truce in Patent Wars",
+                            description="The software giant, whose\
                           former CEO once called\
                           Linux a \\\"cancer,\\\" will let others use 60,000\
-                          patents for Linux-related open source projects."],
-                          'url': ["https://www.wired.com/story/microsoft-ca\
-                          lls-truce-in-linux-patent-wars/"],
-                          'url_to_image': ["https://media.wired.com/photos/5bb\
+                          patents for Linux-related open source projects.",
+                            url="https://www.wired.com/story/microsoft-ca\
+                          lls-truce-in-linux-patent-wars/",
+                            url_to_image="https://media.wired.com/photos/5bb\
                           e9c0f2b915f2dff96d6f4/191:100/pass/Satya-Microsoft-M\
-                          ichelleG.jpg"],
-                          'published_at': ["2018-10-11T23:33:03Z"],
-                          'content': ["Microsoft is calling for a truce in the\
+                          ichelleG.jpg",
+                            published_at="2018-10-11T23:33:03Z",
+                            content="Microsoft is calling for a truce in the\
                            patent war. This week the company said it will\
                             allow more than 2,600 other companies, including\
                              traditional rivals like Google and IBM, to use\
                               the technology behind 60,000 Microsoft patents\
-                               for their own Linux related o… [+4435 chars]"]}
+                               for their own Linux related o… [+4435 chars]")
+        extracted_data = c.ArticleBatch([article])
 
         # Act
         result_df = tf_func(extracted_data)
@@ -997,6 +1047,12 @@ class TestTransformOperations:
             patcher.fs.create_file(file_path_two, contents='dummy rtf')
             patcher.fs.create_file(file_path_three, contents='dummy doc')
 
+            # publish the files in the directory's manifest, as the
+            # upstream task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(headline_dir,
+                                                     os.path.basename(path))
+
         # Act
             # function should raise errors on an empty directory
             with pytest.raises(FileNotFoundError) as err:
@@ -1048,6 +1104,12 @@ class TestTransformOperations:
             patcher.fs.create_file(file_path_two, contents='dummy rtf')
             patcher.fs.create_file(file_path_three, contents='dummy doc')
 
+            # publish the files in the directory's manifest, as the
+            # upstream task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(headline_dir,
+                                                     os.path.basename(path))
+
         # Act
             # function should raise errors on an empty directory
             with pytest.raises(FileNotFoundError) as err:
@@ -1106,6 +1168,12 @@ class TestTransformOperations:
             patcher.fs.create_file(file_path_two)
             patcher.fs.create_file(file_path_three)
 
+            # publish the files in the directory's manifest, as the
+            # upstream task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(headline_dir,
+                                                     os.path.basename(path))
+
         # Act
             # function should raise errors on an empty directory
             result = tfnc(directory=headline_dir,
@@ -1140,3 +1208,195 @@ class TestTransformOperations:
         # Assert
         actual_message = str(err.value)
         assert "news data argument cannot be empty" in actual_message
+
+    def test_transform_data_to_dataframe_sets_column_dtypes(self):
+        """the news source columns of the Dataframe are categoricals and
+        the publication dates are parsed into datetimes."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_data_to_dataframe
+
+        articles = [c.Article(source_id="wired",
+                              source_name="Wired",
+                              author="Klint Finley",
+                              title="Headline {}".format(index),
+                              description=None,
+                              url=None,
+                              url_to_image=None,
+                              published_at="2018-10-11T23:33:0{}Z".format(
+                                  index),
+                              content=None)
+                    for index in range(3)]
+        articles.append(articles[0]._replace(
+            published_at="2018-10-11T23:40:03.517Z"))
+        articles.append(articles[0]._replace(published_at=None))
+        extracted_data = c.ArticleBatch(articles)
+
+        # Act
+        result_df = tf_func(extracted_data)
+
+        # Assert
+        publication_dates = result_df['news_publication_date']
+        assert str(result_df['news_source_id'].dtype) == "category"
+        assert str(result_df['news_source_name'].dtype) == "category"
+        assert pd.api.types.is_datetime64_any_dtype(publication_dates)
+        assert publication_dates[2] == pd.Timestamp("2018-10-11 23:33:02",
+                                                    tz="UTC")
+        assert publication_dates[3] == pd.Timestamp(
+            "2018-10-11 23:40:03.517", tz="UTC")
+        assert pd.isnull(publication_dates[4])
+        assert list(result_df['news_title']) == ["Headline 0", "Headline 1",
+                                                 "Headline 2", "Headline 0",
+                                                 "Headline 0"]
+
+    def test_transform_data_to_dataframe_keeps_unparsable_dates(self):
+        """publication dates that cannot be parsed are written to the csv
+        as they were given, not left empty."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_data_to_dataframe
+        article = c.Article(source_id="wired",
+                            source_name="Wired",
+                            author=None,
+                            title="Headline",
+                            description=None,
+                            url=None,
+                            url_to_image=None,
+                            published_at="2018-10-11T23:33:03Z",
+                            content=None)
+        extracted_data = c.ArticleBatch(
+            [article, article._replace(published_at="not a date")])
+
+        # Act
+        result_df = tf_func(extracted_data)
+        typed_df = c.TransformOperations.apply_typed_schema(result_df)
+
+        # Assert
+        publication_dates = list(result_df['news_publication_date'])
+        assert publication_dates[0] == pd.Timestamp("2018-10-11 23:33:03",
+                                                    tz="UTC")
+        assert publication_dates[1] == "not a date"
+        assert "not a date" in result_df.to_csv()
+        assert typed_df.to_csv() == result_df.to_csv()
+
+    def test_transform_jsons_to_dataframe_merger_applies_typed_schema(
+            self, monkeypatch):
+        """the merged DataFrame of several sources gets the typed schema
+        when asked for, with the csv written from it unchanged."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+        data_to_df_func = c.TransformOperations.transform_data_to_dataframe
+
+        def source_frame(source_id):
+            return data_to_df_func(c.ArticleBatch(
+                [c.Article(source_id=source_id,
+                           source_name=source_id.title(),
+                           author=None,
+                           title="Headline {}".format(index),
+                           description="Description",
+                           url=None,
+                           url_to_image=None,
+                           published_at="2018-10-11T23:33:0{}Z".format(index),
+                           content=None)
+                 for index in range(2)]))
+
+        extract_func_mock = MagicMock(side_effect=lambda data: data)
+        tf_func_mock = MagicMock(side_effect=[source_frame("wired"),
+                                              source_frame("bbc-news"),
+                                              source_frame("wired"),
+                                              source_frame("bbc-news")])
+        json_files = ['wired.json', 'bbc-news.json']
+
+        # the merger accumulates its DataFrame in a module global, which
+        # has to be emptied before each merge.
+        transform_module = sys.modules[tf_func.__module__]
+
+        # Act
+        monkeypatch.setattr(transform_module, 'merged_df', pd.DataFrame())
+        untyped_df = tf_func(json_files, lambda file: {},
+                             extract_func_mock, tf_func_mock,
+                             typed_schema=False)
+        monkeypatch.setattr(transform_module, 'merged_df', pd.DataFrame())
+        typed_df = tf_func(json_files, lambda file: {},
+                           extract_func_mock, tf_func_mock,
+                           typed_schema=True)
+
+        # Assert
+        assert str(typed_df['news_source_id'].dtype) == "category"
+        assert str(typed_df['news_source_name'].dtype) == "category"
+        assert pd.api.types.is_datetime64_any_dtype(
+            typed_df['news_publication_date'])
+        assert list(typed_df['news_source_id'].cat.categories) == [
+            "bbc-news", "wired"]
+        assert typed_df.to_csv() == untyped_df.to_csv()
+
+    def test_transform_headlines_json_stream_to_csv_matches_whole_file(
+            self, tmpdir):
+        """transforming a json file a batch of articles at a time writes
+        the same csv as transforming it whole, and publishes it."""
+
+        # Arrange
+        articles = [{"source": {"id": "wired", "name": "Wired"},
+                     "author": "Author {}".format(index),
+                     "title": "Headline {}".format(index),
+                     "publishedAt": "2018-10-11T23:3{}:02Z".format(index)}
+                    for index in range(5)]
+        json_file = os.path.join(str(tmpdir), "tempus_headlines.json")
+        with open(json_file, "w") as outputfile:
+            json.dump({"status": "ok",
+                       "totalResults": 5,
+                       "articles": articles}, outputfile)
+        whole_df = c.TransformOperations.transform_data_to_dataframe(
+            c.ArticleBatch.from_json_articles(articles))
+
+        # Act
+        tf_func = c.TransformOperations.transform_headlines_json_stream_to_csv
+        result = tf_func(json_file,
+                         str(tmpdir),
+                         "2018-10-12_tempus_top_headlines.csv",
+                         batch_size=2)
+        manifest = c.FileStorage.read_manifest(str(tmpdir))
+
+        # Assert
+        assert result[0] is True
+        with open(os.path.join(str(tmpdir),
+                               "2018-10-12_tempus_top_headlines.csv")) as f:
+            assert f.read() == whole_df.to_csv()
+        assert manifest["files"][0]["records"] == 5
+
+    def test_transform_jsons_to_dataframe_merger_streaming_matches(
+            self, tmpdir, monkeypatch):
+        """merging json files a batch of articles at a time gives the same
+        DataFrame as merging each file whole."""
+
+        # Arrange
+        tf_func = c.TransformOperations.transform_jsons_to_dataframe_merger
+        json_files = []
+        for source_id in ("wired", "bbc-news"):
+            articles = [{"source": {"id": source_id, "name": source_id},
+                         "title": "{} {}".format(source_id, index),
+                         "url": "https://{}/{}".format(source_id, index)}
+                        for index in range(3)]
+            json_file = os.path.join(str(tmpdir), source_id + ".json")
+            with open(json_file, "w") as outputfile:
+                json.dump({"status": "ok",
+                           "totalResults": 3,
+                           "articles": articles}, outputfile)
+            json_files.append(json_file)
+
+        # the merger accumulates its DataFrame in a module global, which
+        # has to be emptied before each merge.
+        transform_module = sys.modules[tf_func.__module__]
+
+        # Act
+        monkeypatch.setattr(transform_module, 'merged_df', pd.DataFrame())
+        whole_df = tf_func(json_files,
+                           c.FileStorage.json_to_dataframe_reader,
+                           streaming=False)
+        monkeypatch.setattr(transform_module, 'merged_df', pd.DataFrame())
+        streamed_df = tf_func(json_files, streaming=True)
+
+        # Assert
+        assert len(streamed_df) == 6
+        assert streamed_df.to_csv() == whole_df.to_csv()
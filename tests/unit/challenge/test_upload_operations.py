@@ -147,6 +147,12 @@ class TestUploadOperations:
             patcher.fs.create_dir(news_dir)
             patcher.fs.create_file(file_path, contents='1,dummy,txt')
 
+            # publish the files in the directory's manifest, as the
+            # upstream transform task does once it has written them
+            for path in [file_path]:
+                c.FileStorage.publish_manifest_entry(csv_dir,
+                                                     os.path.basename(path))
+
         # Act
             # attempt uploading a file to a valid s3 bucket
             stat, msg = c.UploadOperations.upload_csv_to_s3(csv_dir,
@@ -224,6 +230,12 @@ class TestUploadOperations:
             patcher.fs.create_file(upload_path_two, contents='2,dummy,txt')
             patcher.fs.create_file(upload_path_three, contents='3,dummy,txt')
 
+            # publish the files in the directory's manifest, as the
+            # upstream transform task does once it has written them
+            for path in [upload_path_one, upload_path_two, upload_path_three]:
+                c.FileStorage.publish_manifest_entry(csv_dir,
+                                                     os.path.basename(path))
+
         # Act
             # access the created bucket and verify that the bucket is really
             # empty - its length should be 0 before the function call
@@ -317,6 +329,12 @@ class TestUploadOperations:
             patcher.fs.create_file(upload_path_two, contents='2,dummy,txt')
             patcher.fs.create_file(upload_path_three, contents='3,dummy,txt')
 
+            # publish the files in the directory's manifest, as the
+            # upstream transform task does once it has written them
+            for path in [upload_path_one, upload_path_two, upload_path_three]:
+                c.FileStorage.publish_manifest_entry(csv_dir,
+                                                     os.path.basename(path))
+
         # Act
             # access the created bucket and verify that the bucket is really
             # empty - its length should be 0 before the function call
@@ -385,6 +403,12 @@ class TestUploadOperations:
             patcher.fs.create_file(file_path_two, contents='2,dummy,rtf')
             patcher.fs.create_file(file_path_three, contents='3,dummy,doc')
 
+            # publish the files in the directory's manifest, as the
+            # upstream transform task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(csv_dir,
+                                                     os.path.basename(path))
+
         # Act
             # with csv files present, success status message is returned
             stat, msg, val = c.UploadOperations.upload_directory_check(csv_dir)
@@ -467,6 +491,12 @@ class TestUploadOperations:
             patcher.fs.create_file(file_path_two)
             patcher.fs.create_file(file_path_three)
 
+            # publish the files in the directory's manifest, as the
+            # upstream transform task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(csv_dir,
+                                                     os.path.basename(path))
+
         # Act
             # with no csv files present an error message is returned
             stat, msg, val = c.UploadOperations.upload_directory_check(csv_dir)
@@ -600,6 +630,12 @@ class TestUploadOperations:
             patcher.fs.create_file(file_path_two, contents='2,dummy,rtf')
             patcher.fs.create_file(file_path_three, contents='3,dumy,doc')
 
+            # publish the files in the directory's manifest, as the
+            # upstream transform task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(csv_dir,
+                                                     os.path.basename(path))
+
         # Act
             # with no valid bucket existing on the server
             # the function should raise errors
@@ -664,6 +700,12 @@ class TestUploadOperations:
             patcher.fs.create_file(file_path_two, contents='dummy rtf')
             patcher.fs.create_file(file_path_three, contents='dummy doc')
 
+            # publish the files in the directory's manifest, as the
+            # upstream transform task does once it has written them
+            for path in [file_path_one, file_path_two, file_path_three]:
+                c.FileStorage.publish_manifest_entry(csv_dir,
+                                                     os.path.basename(path))
+
         # Act
             # function should raise errors on an no csv files present
             stat, msg = c.UploadOperations.upload_csv_to_s3(csv_dir,